@@ -1,15 +1,18 @@
 import os
 import sys  # Ensures sys is included for exit functionality
 import time
-import smtplib
-from email.mime.text import MIMEText # Enable Email sending for server down
-from email.mime.multipart import MIMEMultipart # Enable Email sending for server down
-import psutil
-from datetime import datetime, timedelta
+from datetime import datetime
 import argparse
-import daemon
-import subprocess
-from pathlib import Path
+import threading
+from collections import deque
+
+import decnet_ncp
+import decnet_probe_cache
+
+# Heavy modules (smtplib, email.mime, psutil, daemon, subprocess) and the shared
+# modules that only the periodic jobs need (decnet_counters, decnet_nodedb,
+# decnet_scheduler, decnet_sweep) are imported inside the functions that use
+# them so that --version and --relaunch start quickly.
 
 def read_config_from_pyvenv():
     """Read configuration from pyvenv.cfg file."""
@@ -51,6 +54,13 @@ def validate_configuration():
         print("\nPlease run the setup script to reconfigure:")
         print("  python setup.py")
         sys.exit(1)
+
+    problems = validate_instances()
+    if problems:
+        print("ERROR: The PyDECNET instance configuration is invalid:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
     
     # Log configuration info
     if NAME_UPDATE_INTERVAL > 0:
@@ -68,8 +78,139 @@ SENDER_EMAIL = CONFIG.get('hecnet_sender_email', 'your-email@gmail.com')
 SENDER_PASSWORD = CONFIG.get('hecnet_sender_password', 'your-app-password')
 RECEIVER_EMAIL = CONFIG.get('hecnet_receiver_email', 'recipient@example.com')
 TARGET_HOST = CONFIG.get('hecnet_target_host', 'MIM')
-SLEEP_TIME = CONFIG.get('hecnet_sleep_time', 120)  # Default to 120 seconds if not set
+SMTP_HOST = CONFIG.get('hecnet_smtp_host', 'smtp.gmail.com')
+SMTP_PORT = int(CONFIG.get('hecnet_smtp_port', 587))
+SMTP_STARTTLS = CONFIG.get('hecnet_smtp_starttls', 'true').lower() in ('true', 'yes', '1')
+SMTP_TIMEOUT = 30  # Seconds before an unresponsive mail server is given up on
+SLEEP_TIME = int(CONFIG.get('hecnet_sleep_time', 120))  # Default to 120 seconds if not set
 NAME_UPDATE_INTERVAL = int(CONFIG.get('hecnet_name_update_interval', 2880))  # Default to 48 hours (2880 minutes)
+NAME_UPDATE_TIMEOUT = float(CONFIG.get('hecnet_name_update_timeout', 600))  # Seconds before a hung name update is killed
+
+# Periodic jobs (name updates, sweeps, counter collection, status log rotation)
+# run from a persistent schedule (see decnet_scheduler.py). Each run is spread
+# by up to +/- JOB_JITTER of its interval; JOB_CATCH_UP decides whether a job
+# that was missed while the daemon was down runs at startup ('once') or waits
+# for its next slot ('skip'). A job that failed or could not start is retried
+# after JOB_RETRY_INTERVAL (or its own interval if that is shorter).
+JOB_JITTER = float(CONFIG.get('hecnet_job_jitter', 0.05))
+JOB_CATCH_UP = CONFIG.get('hecnet_job_catch_up', 'once')  # decnet_scheduler.CATCH_UP_ONCE
+JOB_RETRY_INTERVAL = float(CONFIG.get('hecnet_job_retry_interval', 300))
+STATUS_LOG_MAX_BYTES = float(CONFIG.get('hecnet_status_log_max_mb', 10)) * 1024 * 1024  # 0 disables rotation
+STATUS_LOG_KEEP = 5  # Rotated status logs kept
+LOG_ROTATION_INTERVAL = 3600  # Seconds between status log size checks
+
+# Adaptive probe scheduling: probe quickly after a failure, back off toward the
+# ceiling (hecnet_sleep_time unless overridden) while the link is healthy.
+PROBE_RECHECK_INTERVAL = float(CONFIG.get('hecnet_probe_recheck_interval', 5))
+PROBE_BASE_INTERVAL = float(CONFIG.get('hecnet_probe_base_interval', 15))
+PROBE_MAX_INTERVAL = float(CONFIG.get('hecnet_probe_max_interval', SLEEP_TIME))
+PROBE_JITTER = float(CONFIG.get('hecnet_probe_jitter', 0.1))  # +/- fraction of each interval
+PROBE_CONFIRM_COUNT = int(CONFIG.get('hecnet_probe_confirm_count', 2))  # Failed probes before the link is declared down
+# Every probe command runs in its own process group and is killed with it after
+# PROBE_TIMEOUT seconds. Slow probes (loop bursts, sweeps) run on a small pool
+# of PROBE_WORKERS threads so they never hold up the next link check.
+PROBE_TIMEOUT = float(CONFIG.get('hecnet_probe_timeout', 20))
+PROBE_WORKERS = int(CONFIG.get('hecnet_probe_workers', 2))
+
+# Link quality probing: a burst of loop (echo) requests per cycle, used to
+# compute RTT percentiles and loss. Each request is one run of LOOP_COMMAND, so
+# the RTT includes the command's own startup time; compare it against itself.
+LOOP_COUNT = int(CONFIG.get('hecnet_loop_count', 0))  # Loop requests per burst; 0 disables quality probing
+LOOP_INTERVAL = float(CONFIG.get('hecnet_loop_interval', 0.2))  # Seconds between requests in a burst
+LOOP_TIMEOUT = float(CONFIG.get('hecnet_loop_timeout', 5))  # Seconds before a request counts as lost
+LOOP_COMMAND = CONFIG.get('hecnet_loop_command', 'ncp loop node {target} count 1')
+RTT_ALERT_MS = float(CONFIG.get('hecnet_rtt_alert_ms', 0))  # p95 RTT alert threshold; 0 disables
+LOSS_ALERT_PERCENT = float(CONFIG.get('hecnet_loss_alert_percent', 20))  # Loss alert threshold; 0 disables
+
+# Route-change tracking: the next node, cost, hops and circuit of each target
+# are compared with the last confirmed route. A new route must be seen on
+# ROUTE_CONFIRM_COUNT consecutive probes before it counts as a change, and
+# route-change emails are limited to one per ROUTE_NOTIFY_INTERVAL per target.
+ROUTE_CONFIRM_COUNT = int(CONFIG.get('hecnet_route_confirm_count', 2))
+ROUTE_HISTORY_SIZE = int(CONFIG.get('hecnet_route_history_size', 32))  # Route changes remembered per target
+ROUTE_NOTIFY_INTERVAL = float(CONFIG.get('hecnet_route_notify_interval', 3600))  # Seconds; 0 disables route emails
+
+# Known nodes sweep: one bulk query per SWEEP_INTERVAL seconds gives the
+# reachability, hops and cost of every node, diffed against the previous sweep.
+SWEEP_INTERVAL = float(CONFIG.get('hecnet_sweep_interval', 0))  # Seconds between sweeps; 0 disables sweeping
+SWEEP_COMMAND = CONFIG.get('hecnet_sweep_command', 'ncp show known nodes')
+SWEEP_TIMEOUT = float(CONFIG.get('hecnet_sweep_timeout', 30))
+SWEEP_LOG_LIMIT = 10  # Nodes listed by name per kind of change in the log
+
+# Circuit and line counters: one bulk query per kind every COUNTER_INTERVAL
+# seconds; the deltas since the previous reading are exported as totals and
+# rates and appended to a compact time series (see decnet_counters.py).
+COUNTER_INTERVAL = float(CONFIG.get('hecnet_counter_interval', 0))  # Seconds between collections; 0 disables them
+COUNTER_COMMANDS = [command.strip() for command in CONFIG.get(
+    'hecnet_counter_commands', 'ncp show known circuits counters; ncp show known lines counters').split(';')
+    if command.strip()]
+COUNTER_TIMEOUT = float(CONFIG.get('hecnet_counter_timeout', 30))
+
+# PyDECNET restart policy: a token bucket limits how many automatic restarts may
+# happen in a burst, consecutive attempts back off exponentially, and running
+# out of tokens puts the supervisor into a crash-loop state with a single alert.
+# The backoff only resets once PyDECNET has stayed up for
+# RESTART_STABLE_SECONDS after the last restart, so one that crashes shortly
+# after becoming ready still counts as crash-looping.
+RESTART_BURST = int(CONFIG.get('hecnet_restart_burst', 3))
+RESTART_REFILL_SECONDS = float(CONFIG.get('hecnet_restart_refill_seconds', 600))  # One token per interval
+RESTART_BACKOFF_BASE = float(CONFIG.get('hecnet_restart_backoff_base', 30))
+RESTART_BACKOFF_MAX = float(CONFIG.get('hecnet_restart_backoff_max', 1800))
+RESTART_STABLE_SECONDS = float(CONFIG.get('hecnet_restart_stable_seconds', 300))
+RESTART_LOG_KEEP = int(CONFIG.get('hecnet_restart_log_keep', 10))  # Rotated launch logs kept per stream
+
+# PyDECNET resource telemetry: RSS, open FDs, threads and CPU are sampled from
+# /proc every cycle. The trend window keeps at most one sample per
+# TELEMETRY_SAMPLE_INTERVAL, so TELEMETRY_WINDOW samples always span at least
+# TELEMETRY_MIN_SPAN however short the cycles get (outage rechecks, log-triggered
+# wakes, a short probe interval). A least-squares trend over the window
+# that keeps rising (slope above the threshold with a good fit) is reported as
+# a leak; with hecnet_leak_restart enabled PyDECNET is then restarted in a
+# planned way during the quiet hours, or right away if it is about to reach
+# PYDECNET_RSS_LIMIT_MB.
+TELEMETRY_WINDOW = int(CONFIG.get('hecnet_telemetry_window', 120))  # Samples kept per PyDECNET process
+TELEMETRY_MIN_SPAN = float(CONFIG.get('hecnet_telemetry_min_span', 3600))  # Seconds of samples needed for a trend
+TELEMETRY_SAMPLE_INTERVAL = TELEMETRY_MIN_SPAN / max(TELEMETRY_WINDOW - 1, 1)  # Seconds between window samples
+TREND_MIN_R2 = 0.8  # Fit quality below which growth counts as noise
+RSS_GROWTH_ALERT_MB_PER_HOUR = float(CONFIG.get('hecnet_rss_growth_alert_mb_per_hour', 5))
+FD_GROWTH_ALERT_PER_HOUR = float(CONFIG.get('hecnet_fd_growth_alert_per_hour', 20))
+THREAD_GROWTH_ALERT_PER_HOUR = float(CONFIG.get('hecnet_thread_growth_alert_per_hour', 5))
+PYDECNET_RSS_LIMIT_MB = float(CONFIG.get('hecnet_pydecnet_rss_limit_mb', 0))  # 0: no limit to project against
+LEAK_RESTART = CONFIG.get('hecnet_leak_restart', 'false').lower() in ('true', 'yes', '1')
+LEAK_RESTART_HOURS = CONFIG.get('hecnet_leak_restart_hours', '3-5')  # Local hours [start, end) for planned restarts
+LEAK_RESTART_URGENT_SECONDS = 3600  # Restart outside the quiet hours when the limit is this close
+
+# PyDECNET output follower: the launch logs are followed while PyDECNET runs and
+# every new line is matched against LOG_PATTERNS (one compiled alternation).
+# Matches are logged and counted at once, emailed at most once per
+# LOG_ALERT_INTERVAL per pattern, and wake the monitor loop for an early check
+# at most once per LOG_WAKE_INTERVAL per pattern, so a PyDECNET that keeps
+# logging errors does not turn the monitor loop into a busy probe loop.
+# Patterns are set with hecnet_log_pattern_<name> = <regex> (empty disables one).
+LOG_FOLLOW_INTERVAL = float(CONFIG.get('hecnet_log_follow_interval', 1))  # Seconds between checks for new output
+LOG_ALERT_INTERVAL = float(CONFIG.get('hecnet_log_alert_interval', 900))  # Seconds; 0 disables log alert emails
+LOG_WAKE_INTERVAL = float(CONFIG.get('hecnet_log_wake_interval', 900))  # Seconds; 0 disables early checks
+LOG_EVENTS_LOGGED = 20  # Matching lines copied to the status log per check
+DEFAULT_LOG_PATTERNS = {
+    'traceback': r'Traceback \(most recent call last\)',
+    'error': r'\b(?:ERROR|CRITICAL|FATAL)\b',
+    'circuit_down': r'(?i)\b(?:circuit|adjacency|line)\b.*\b(?:down|failed|lost|rejected)\b',
+    'address_in_use': r'(?i)address already in use',
+    'permission_denied': r'(?i)permission denied',
+}
+LOG_PATTERNS = dict(DEFAULT_LOG_PATTERNS)
+LOG_PATTERNS.update({key[len('hecnet_log_pattern_'):]: value for key, value in CONFIG.items()
+                     if key.startswith('hecnet_log_pattern_')})
+
+# On-demand profiling: SIGUSR1 (sent by 'decnet-daemon.py --profile') makes the
+# running daemon profile itself for PROFILE_SECONDS. The monitor loop (the main
+# thread) is traced with cProfile, the stacks of all other threads are sampled
+# every PROFILE_SAMPLE_INTERVAL seconds, and tracemalloc records the memory
+# allocated meanwhile. Nothing is traced or sampled outside a profile.
+PROFILE_SECONDS = float(CONFIG.get('hecnet_profile_seconds', 60))
+PROFILE_KEEP = int(CONFIG.get('hecnet_profile_keep', 5))  # Profiles kept in LOG_DIR
+PROFILE_SAMPLE_INTERVAL = 0.01
+PROFILE_TRACEMALLOC_FRAMES = 10  # Stack depth recorded per allocation
 
 # Get the directory of the current script and construct paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -77,10 +218,6 @@ VENV_DIR = os.path.join(SCRIPT_DIR, "hecnet")
 LOG_DIR = os.path.join(VENV_DIR, "logs")
 CONFIG_DIR = os.path.join(SCRIPT_DIR, "config")
 
-# Create logs and config directories if they don't exist
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(CONFIG_DIR, exist_ok=True)
-
 PYDECNET_CONFIG_FILES = [
     os.path.join(CONFIG_DIR, "dev-logging.json"),
     os.path.join(CONFIG_DIR, "theark.conf"),
@@ -90,10 +227,159 @@ LOG_INFO_PATH = os.path.join(LOG_DIR, "decnet-launch-info.log")
 LOG_ERROR_PATH = os.path.join(LOG_DIR, "decnet-status-error.log")
 STATUS_LOG_PATH = os.path.join(LOG_DIR, "decnet-status.log")
 SOCKET_PATH = "/tmp/decnetapi.sock"
-USER_HOME = str(Path.home())
+USER_HOME = os.path.expanduser("~")
 PYDECNET_BIN = CONFIG.get('hecnet_pydecnet_bin', os.path.join(USER_HOME, "hecnet", "bin", "pydecnet"))
 DECNET_NAME_UPDATE_SCRIPT = os.path.join(SCRIPT_DIR, "decnet-name-update.py")
 NAME_UPDATE_TIMESTAMP_FILE = os.path.join(LOG_DIR, "last_name_update.txt")
+SCHEDULE_PATH = os.path.join(LOG_DIR, "job-schedule.json")
+METRICS_PATH = os.path.join(LOG_DIR, "hecnet-daemon.prom")
+PIDFILE_PATH = os.path.join(LOG_DIR, "decnet-daemon.pid")
+PROBE_CACHE_PATH = os.path.join(LOG_DIR, "probe-cache.bin")
+QUALITY_HISTORY_PATH = os.path.join(LOG_DIR, "link-quality.jsonl")
+KNOWN_NODES_PATH = os.path.join(LOG_DIR, "known-nodes.bin")
+AREA_HISTORY_PATH = os.path.join(LOG_DIR, "area-history.bin")
+COUNTER_HISTORY_PATH = os.path.join(LOG_DIR, "circuit-counters.bin")
+# Compiled node list written by decnet-name-update.py next to nodenames.conf
+NODE_DB_PATH = CONFIG.get('hecnet_node_db', os.path.join(USER_HOME, ".local", "bin", "nodenames.db"))
+QUALITY_HISTORY_MAX_BYTES = 5 * 1024 * 1024  # Rotated like the launch logs beyond this size
+STARTUP_TIMEOUT = float(CONFIG.get('hecnet_startup_timeout', 30))  # Seconds to wait for PyDECNET to become ready
+STOP_TIMEOUT = float(CONFIG.get('hecnet_stop_timeout', 10))  # Seconds between SIGTERM and SIGKILL
+STOP_KILL_TIMEOUT = 5  # Seconds to wait for SIGKILL to take effect
+
+# PyDECNET instances: by default the daemon supervises a single PyDECNET using
+# the paths above. Hosts running several PyDECNET nodes list them with
+# hecnet_instances = <name>, <name>, ... and describe each one with
+# hecnet_instance_<name>_<setting> keys (see pyvenv.cfg.template). Named
+# instances are checked concurrently and only ever stopped or restarted on
+# their own; the first one also runs the known nodes sweep and name updates.
+INSTANCE_NAMES = [name.strip() for name in CONFIG.get('hecnet_instances', '').split(',') if name.strip()]
+
+# Daemon metrics, written in Prometheus text format to METRICS_PATH
+METRICS = {}
+METRICS_LOCK = threading.Lock()  # Instance cycles update metrics concurrently
+
+# Last probe result per (instance, target), shared with decnet-status.py through PROBE_CACHE_PATH
+PROBE_RESULTS = {}
+PROBE_CACHE_LOCK = threading.Lock()
+JOB_SCHEDULE_LOCK = threading.Lock()  # Background jobs record their runs while the cycle pops due jobs
+
+# Thread pool for background probes, created on first use
+PROBE_POOL = None
+
+# Set by the log follower to end the monitor loop's sleep early
+WAKE_EVENT = None
+
+# Thread pool running the monitoring cycles of named instances side by side, created on first use
+INSTANCE_POOL = None
+
+# Profile in progress: the main thread's cProfile, and the events connecting the
+# signal handlers with the profiler thread (see install_profile_handler)
+PROFILE = {'profiler': None, 'request': None, 'done': None}
+
+# Instances append to the shared counter history from their own background jobs
+COUNTER_HISTORY_LOCK = threading.Lock()
+
+# Mapped node directory and the (inode, mtime) of the file it was opened from
+NODE_DIRECTORY = {'db': None, 'stat': None}
+NODE_DIRECTORY_LOCK = threading.Lock()
+
+def default_instance():
+    """Describe the single PyDECNET of an installation without hecnet_instances."""
+    return {
+        'name': 'pydecnet',
+        'label': None,  # Unlabelled metrics and messages, as before instances existed
+        'config_files': PYDECNET_CONFIG_FILES,
+        'socket': SOCKET_PATH,
+        'pidfile': None,
+        'schedule': SCHEDULE_PATH,
+        'log_info': LOG_INFO_PATH,
+        'log_error': LOG_ERROR_PATH,
+        'targets': [TARGET_HOST],
+        'ncp': ['ncp'],
+        'match': None,  # Every PyDECNET process belongs to it
+        'primary': True,
+    }
+
+def named_instance(name, primary=False):
+    """Describe the PyDECNET instance `name` from its hecnet_instance_<name>_* keys."""
+    import shlex
+    prefix = f'hecnet_instance_{name}_'
+    # Relative config paths are looked up in CONFIG_DIR (os.path.join keeps absolute ones)
+    config_files = [os.path.join(CONFIG_DIR, path.strip())
+                    for path in CONFIG.get(prefix + 'config', '').split(',') if path.strip()]
+    targets = [target.strip() for target in CONFIG.get(prefix + 'targets', TARGET_HOST).split(',') if target.strip()]
+    return {
+        'name': name,
+        'label': name,
+        'config_files': config_files,
+        'socket': CONFIG.get(prefix + 'socket', f"/tmp/decnetapi-{name}.sock"),
+        'pidfile': os.path.join(LOG_DIR, f"pydecnet-{name}.pid"),
+        'schedule': os.path.join(LOG_DIR, f"job-schedule-{name}.json"),
+        'log_info': os.path.join(LOG_DIR, f"decnet-launch-info-{name}.log"),
+        'log_error': os.path.join(LOG_DIR, f"decnet-status-error-{name}.log"),
+        'targets': targets,
+        'ncp': shlex.split(CONFIG.get(prefix + 'ncp', 'ncp')),
+        'match': config_files,  # Its processes are the ones started with its config files
+        'primary': primary,
+    }
+
+def get_instances():
+    """Return the descriptions of all supervised PyDECNET instances, primary first."""
+    if not INSTANCE_NAMES:
+        return [default_instance()]
+    return [named_instance(name, primary=index == 0) for index, name in enumerate(INSTANCE_NAMES)]
+
+def instance_label(instance):
+    """Name an instance in messages: "PyDECNET" or "PyDECNET 'name'"."""
+    if instance is None or instance['label'] is None:
+        return "PyDECNET"
+    return f"PyDECNET '{instance['label']}'"
+
+def instance_metric(name, instance):
+    """Add an instance="..." label to a metric name of a named instance."""
+    if instance is None or instance['label'] is None:
+        return name
+    label = f'instance="{instance["label"]}"'
+    if name.endswith('}'):
+        return f"{name[:-1]},{label}}}"
+    return f"{name}{{{label}}}"
+
+def instance_command(instance, command):
+    """Split a probe command and run 'ncp' through the instance's own ncp command."""
+    import shlex
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    if instance is not None and args and args[0] == 'ncp':
+        args = instance['ncp'] + args[1:]
+    return args
+
+def validate_instances():
+    """Return a list of problems with the hecnet_instances configuration."""
+    import re
+    problems = []
+    if len(set(INSTANCE_NAMES)) != len(INSTANCE_NAMES):
+        problems.append("hecnet_instances lists an instance more than once")
+    sockets = {}
+    for instance in get_instances():
+        if instance['label'] is None:
+            continue
+        name = instance['name']
+        if not re.fullmatch(r'[A-Za-z0-9_-]+', name):
+            problems.append(f"instance name '{name}' may only contain letters, digits, '_' and '-'")
+        elif len(name) > decnet_probe_cache.NAME_SIZE:
+            problems.append(f"instance name '{name}' is longer than {decnet_probe_cache.NAME_SIZE} characters")
+        if not instance['config_files']:
+            problems.append(f"hecnet_instance_{name}_config is missing")
+        if not instance['targets']:
+            problems.append(f"hecnet_instance_{name}_targets is empty")
+        if instance['socket'] in sockets:
+            problems.append(f"instances '{sockets[instance['socket']]}' and '{name}' share the socket {instance['socket']}")
+        sockets[instance['socket']] = name
+    return problems
+
+def ensure_directories():
+    """Create the logs and config directories if they don't exist."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(CONFIG_DIR, exist_ok=True)
 
 # Function to log messages to both stdout and a file
 def log_message(message):
@@ -106,16 +392,37 @@ def log_message(message):
     except Exception as e:
         print(f"[ERROR] Failed to write to log file: {e}")
 
+def set_metric(name, value):
+    """Set a gauge metric (name may include a Prometheus label set)."""
+    METRICS[name] = value
+
+def increment_metric(name, amount=1):
+    """Increase a counter metric."""
+    with METRICS_LOCK:
+        METRICS[name] = METRICS.get(name, 0) + amount
+
+def write_metrics():
+    """Atomically write all metrics to METRICS_PATH in Prometheus text format.
+
+    The file can be picked up by the node_exporter textfile collector.
+    """
+    with METRICS_LOCK:
+        lines = [f"hecnet_{name} {value}" for name, value in sorted(METRICS.items())]
+    temp_path = METRICS_PATH + ".tmp"
+    try:
+        with open(temp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, METRICS_PATH)
+    except OSError as e:
+        log_message(f"Failed to write metrics file: {e}")
+
 # Function to send an email notification
-def send_email(output, isDown):
-    log_message("Sending email notification.")
-    if isDown:
-        subject = f"DECNET link to {TARGET_HOST} is down"
-        body = f"The DECNET link to {TARGET_HOST} is down. Here is the output of 'ncp sho node {TARGET_HOST.lower()}':\n\n{output}"
-    else:
-        subject = f"DECNET link to {TARGET_HOST} is up"
-        body = f"The DECNET link to {TARGET_HOST} is up. Here is the output of 'ncp sho node {TARGET_HOST.lower()}':\n\n{output}"
+def send_notification(subject, body):
+    import smtplib
+    from email.mime.text import MIMEText # Enable Email sending for server down
+    from email.mime.multipart import MIMEMultipart # Enable Email sending for server down
 
+    log_message("Sending email notification.")
     msg = MIMEMultipart()
     msg['From'] = SENDER_EMAIL
     msg['To'] = RECEIVER_EMAIL
@@ -123,66 +430,818 @@ def send_email(output, isDown):
     msg.attach(MIMEText(body, 'plain'))
 
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+            if SMTP_STARTTLS:
+                server.starttls()
             server.login(SENDER_EMAIL, SENDER_PASSWORD)
             server.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, msg.as_string())
         log_message("Email sent successfully.")
     except Exception as e:
         log_message(f"Failed to send email: {e}")
 
+# Function to send a link status email notification
+def send_email(output, isDown, target=None):
+    target = target or TARGET_HOST
+    if isDown:
+        subject = f"DECNET link to {target} is down"
+        body = f"The DECNET link to {target} is down. Here is the output of 'ncp sho node {target.lower()}':\n\n{output}"
+    else:
+        subject = f"DECNET link to {target} is up"
+        body = f"The DECNET link to {target} is up. Here is the output of 'ncp sho node {target.lower()}':\n\n{output}"
+    send_notification(subject, body)
+
+# Function to run a probe command with a hard deadline
+def run_probe(command, timeout=None):
+    """Run a probe command in its own process group and return a CompletedProcess.
+
+    If the command has not finished after `timeout` seconds (PROBE_TIMEOUT by
+    default), the whole process group is killed, so a wedged ncp and anything
+    it started are gone, and subprocess.TimeoutExpired is raised.
+    """
+    import shlex
+    import signal
+    import subprocess
+    timeout = PROBE_TIMEOUT if timeout is None else timeout
+    args = shlex.split(command) if isinstance(command, str) else command
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                            start_new_session=True)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            proc.communicate(timeout=STOP_KILL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log_message(f"Probe '{' '.join(args)}' (PID: {proc.pid}) did not exit after SIGKILL.")
+        raise
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
 # Function to check the DECNET link
-def check_decnet_link():
-    log_message(f"Checking DECNET link status to {TARGET_HOST}.")
-    result = os.popen(f"ncp sho node {TARGET_HOST.lower()}").read()
-    if "Unreachable" in result:
-        send_email(result, True)
-        log_message(f"DECNET link to {TARGET_HOST} is down")
+def check_decnet_link(target=None, instance=None):
+    """Probe the DECNET link to target (TARGET_HOST by default) and return (is_up, output, node_state).
+
+    The probe runs through the instance's ncp command. A probe that times out,
+    cannot be run or exits with a non-zero status counts as a failed probe.
+    """
+    import subprocess
+    target = target or TARGET_HOST
+    log_message(f"Checking DECNET link status to {target}.")
+    labels = f'{{target="{target}"}}'
+    timeouts = instance_metric(f"probe_timeouts_total{labels}", instance)
+    errors = instance_metric(f"probe_errors_total{labels}", instance)
+    started = time.monotonic()
+    try:
+        completed = run_probe(instance_command(instance, ["ncp", "sho", "node", target.lower()]))
+    except subprocess.TimeoutExpired:
+        latency = time.monotonic() - started
+        log_message(f"DECNET link probe to {target} timed out after {latency:.0f} seconds; killed it.")
+        increment_metric(timeouts)
+        record_probe_result(target, decnet_probe_cache.STATUS_TIMEOUT, "", latency, instance)
+        return False, "", decnet_ncp.EMPTY_NODE_STATE
+    except OSError as e:
+        latency = time.monotonic() - started
+        log_message(f"DECNET link probe to {target} could not be run: {e}")
+        increment_metric(errors)
+        record_probe_result(target, decnet_probe_cache.STATUS_ERROR, str(e), latency, instance)
+        return False, str(e), decnet_ncp.EMPTY_NODE_STATE
+    latency = time.monotonic() - started
+    result = completed.stdout
+    if completed.returncode != 0:
+        output = (completed.stdout + completed.stderr).strip()
+        log_message(f"DECNET link probe to {target} failed with exit status {completed.returncode}: {output}")
+        increment_metric(errors)
+        record_probe_result(target, decnet_probe_cache.STATUS_ERROR, output, latency, instance)
+        return False, output, decnet_ncp.EMPTY_NODE_STATE
+    node_state = decnet_ncp.parse_show_node(result)
+    if not node_state.reachable:
+        log_message(f"DECNET link to {target} is down")
+        record_probe_result(target, decnet_probe_cache.STATUS_DOWN, result, latency, instance)
+        return False, result, node_state
+    log_message(f"DECNET link to {target} is up ({decnet_ncp.describe_node_state(node_state)}).")
+    record_probe_result(target, decnet_probe_cache.STATUS_UP, result, latency, instance)
+    return True, result, node_state
+
+def record_probe_result(target, status, output, latency, instance=None):
+    """Remember an instance's probe result and publish it to the shared probe cache."""
+    label = instance['label'] if instance is not None else None
+    result = decnet_probe_cache.make_probe_result(target, status, output, latency, instance=label)
+    set_metric(instance_metric(f'probe_latency_seconds{{target="{target}"}}', instance), round(latency, 3))
+    try:
+        with PROBE_CACHE_LOCK:
+            PROBE_RESULTS[decnet_probe_cache.probe_key(target, label)] = result
+            dropped = decnet_probe_cache.write_probe_cache(PROBE_CACHE_PATH, list(PROBE_RESULTS.values()))
+            if dropped != METRICS.get('probe_cache_dropped_targets', 0):
+                log_message(f"The probe cache holds {decnet_probe_cache.MAX_TARGETS} targets; "
+                            f"{dropped} probed targets are left out of it.")
+            set_metric('probe_cache_dropped_targets', dropped)
+    except OSError as e:
+        log_message(f"Failed to write probe cache: {e}")
+
+# Function to send a single loop (echo) request
+def send_loop_request(target, instance=None):
+    """Send one loop request to target; return the round trip time in seconds or None if lost."""
+    import subprocess
+    started = time.monotonic()
+    try:
+        result = run_probe(instance_command(instance, LOOP_COMMAND.format(target=target.lower())), timeout=LOOP_TIMEOUT)
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    rtt = time.monotonic() - started
+    if result.returncode != 0 or decnet_ncp.loop_failed(result.stdout + result.stderr):
+        return None
+    return rtt
+
+def percentile(sorted_values, pct):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)  # ceil(pct/100 * n)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+# Function to measure link quality with a burst of loop requests
+def measure_link_quality(target, count=None, instance=None):
+    """Send a burst of loop requests and summarize RTT percentiles and loss."""
+    count = LOOP_COUNT if count is None else count
+    samples = []
+    for index in range(count):
+        if index:
+            time.sleep(LOOP_INTERVAL)
+        samples.append(send_loop_request(target, instance))
+
+    rtts = sorted(round(sample * 1000, 2) for sample in samples if sample is not None)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'target': target,
+        'sent': count,
+        'received': len(rtts),
+        'loss_percent': round(100 * (count - len(rtts)) / count, 1) if count else 0.0,
+        'rtt_min_ms': rtts[0] if rtts else None,
+        'rtt_p50_ms': percentile(rtts, 50),
+        'rtt_p95_ms': percentile(rtts, 95),
+        'rtt_p99_ms': percentile(rtts, 99),
+        'rtt_max_ms': rtts[-1] if rtts else None,
+    }
+
+def record_link_quality(quality, instance=None):
+    """Append a quality measurement to the history file and export it as metrics."""
+    import json
+    labels = f'{{target="{quality["target"]}"}}'
+    set_metric(instance_metric(f"link_loss_percent{labels}", instance), quality['loss_percent'])
+    for key in ('rtt_p50_ms', 'rtt_p95_ms', 'rtt_p99_ms'):
+        if quality[key] is not None:
+            set_metric(instance_metric(f"link_{key}{labels}", instance), quality[key])
+    try:
+        if os.path.exists(QUALITY_HISTORY_PATH) and os.path.getsize(QUALITY_HISTORY_PATH) > QUALITY_HISTORY_MAX_BYTES:
+            rotate_log_file(QUALITY_HISTORY_PATH, keep=3)
+        with open(QUALITY_HISTORY_PATH, "a") as f:
+            f.write(json.dumps(quality) + "\n")
+    except OSError as e:
+        log_message(f"Failed to write link quality history: {e}")
+
+def check_quality_thresholds(quality_state, quality):
+    """Alert once when a target's RTT or loss crosses its threshold, and once when it recovers."""
+    target = quality['target']
+    problems = []
+    if LOSS_ALERT_PERCENT > 0 and quality['loss_percent'] >= LOSS_ALERT_PERCENT:
+        problems.append(f"loss {quality['loss_percent']:.0f}% (threshold {LOSS_ALERT_PERCENT:.0f}%)")
+    if RTT_ALERT_MS > 0 and quality['rtt_p95_ms'] is not None and quality['rtt_p95_ms'] >= RTT_ALERT_MS:
+        problems.append(f"p95 RTT {quality['rtt_p95_ms']:.0f} ms (threshold {RTT_ALERT_MS:.0f} ms)")
+
+    summary = (f"{quality['received']}/{quality['sent']} loop replies, "
+               f"RTT p50/p95/p99 {quality['rtt_p50_ms']}/{quality['rtt_p95_ms']}/{quality['rtt_p99_ms']} ms")
+    was_degraded = quality_state.get(target, False)
+    if problems and not was_degraded:
+        log_message(f"DECNET link to {target} is degraded: {', '.join(problems)}.")
+        send_notification(f"DECNET link to {target} is degraded",
+                          f"The DECNET link to {target} is degraded: {', '.join(problems)}.\n\n{summary}")
+    elif not problems and was_degraded:
+        log_message(f"DECNET link quality to {target} is back to normal.")
+        send_notification(f"DECNET link quality to {target} is back to normal",
+                          f"The DECNET link to {target} is no longer degraded.\n\n{summary}")
+    quality_state[target] = bool(problems)
+
+def run_link_quality_probe(quality_state, target, instance=None):
+    """Measure, record and check the link quality to target (runs on the probe pool)."""
+    quality = measure_link_quality(target, instance=instance)
+    log_message(f"Link quality to {target}: {quality['received']}/{quality['sent']} replies, "
+                f"p50 {quality['rtt_p50_ms']} ms, p95 {quality['rtt_p95_ms']} ms.")
+    record_link_quality(quality, instance)
+    check_quality_thresholds(quality_state, quality)
+    return quality
+
+def format_route(route):
+    """Format a (next node, cost, hops, circuit) route as a short description."""
+    next_node, cost, hops, circuit = route
+    parts = [f"next node {next_node or 'unknown'}"]
+    if cost is not None:
+        parts.append(f"cost {cost}")
+    if hops is not None:
+        parts.append(f"hops {hops}")
+    if circuit:
+        parts.append(f"via {circuit}")
+    return ", ".join(parts)
+
+def new_route_state():
+    """Create the route tracking state of one target."""
+    return {
+        'route': None,          # Last confirmed route
+        'candidate': None,      # Differing route waiting for confirmation
+        'candidate_count': 0,
+        'history': deque(maxlen=ROUTE_HISTORY_SIZE),  # (timestamp, old route, new route)
+        'last_notified': None,  # Monotonic time of the last route-change email
+        'suppressed': 0,        # Changes not emailed because of ROUTE_NOTIFY_INTERVAL
+    }
+
+def track_route(routes, target, node_state):
+    """Compare a target's current route with its confirmed route; return (old, new) on a confirmed change.
+
+    Only reachable targets that report routing data are tracked, so an outage
+    is left to the link state and does not show up as a route change. The work
+    per call is a dict lookup and a tuple comparison.
+    """
+    if not node_state.reachable:
+        return None
+    route = decnet_ncp.route_of(node_state)
+    if route == (None, None, None, None):
+        return None
+
+    state = routes.get(target)
+    if state is None:
+        state = routes[target] = new_route_state()
+    if state['route'] is None:
+        state['route'] = route
+        log_message(f"Route to {target}: {format_route(route)}.")
+        return None
+    if route == state['route']:
+        state['candidate'] = None
+        state['candidate_count'] = 0
+        return None
+
+    if route == state['candidate']:
+        state['candidate_count'] += 1
     else:
-        log_message(f"DECNET link to {TARGET_HOST} is up.")
+        state['candidate'] = route
+        state['candidate_count'] = 1
+    if state['candidate_count'] < ROUTE_CONFIRM_COUNT:
+        return None
 
-# Function to stop PyDECNET if running
-def stop_pydecnet():
-    log_message("Stopping PyDECNET process if it is running.")
-    for proc in psutil.process_iter(['pid', 'name']):
-        if proc.info['name'] == 'pydecnet':
-            log_message(f"PyDECNET is running. Stopping it (PID: {proc.info['pid']}).")
-           # proc.terminate()
-           # proc.wait()
-            subprocess.run(["sudo", "pkill", "-f", "pydecnet"], check=True)
-
-# Function to remove locked socket
-def remove_locked_socket():
-    log_message("Checking for locked socket.")
-    if os.path.exists(SOCKET_PATH):
-        log_message("PyDECNET Socket is locked. Removing it.")
+    old_route = state['route']
+    state['route'] = route
+    state['candidate'] = None
+    state['candidate_count'] = 0
+    state['history'].append((time.time(), old_route, route))
+    return old_route, route
+
+def report_route_change(routes, target, old_route, new_route, instance=None):
+    """Log, count and (rate limited) email a confirmed route change."""
+    state = routes[target]
+    labels = f'{{target="{target}"}}'
+    log_message(f"Route to {target} changed from {format_route(old_route)} to {format_route(new_route)}.")
+    increment_metric(instance_metric(f"route_changes_total{labels}", instance))
+    set_metric(instance_metric(f"route_last_change_timestamp_seconds{labels}", instance), int(time.time()))
+
+    if ROUTE_NOTIFY_INTERVAL <= 0:
+        return
+    now = time.monotonic()
+    if state['last_notified'] is not None and now - state['last_notified'] < ROUTE_NOTIFY_INTERVAL:
+        state['suppressed'] += 1
+        log_message(f"Route change email for {target} suppressed (one per {ROUTE_NOTIFY_INTERVAL:.0f} seconds).")
+        return
+
+    body = (f"The route to {target} has changed.\n\n"
+            f"Old route: {format_route(old_route)}\n"
+            f"New route: {format_route(new_route)}\n")
+    if state['suppressed']:
+        body += f"\n{state['suppressed']} earlier route change(s) were not emailed.\n"
+    recent = list(state['history'])[-5:]
+    if len(recent) > 1:
+        body += "\nRecent route changes:\n"
+        for timestamp, _, route in recent:
+            body += f"  {datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')}  {format_route(route)}\n"
+    send_notification(f"Route to {target} changed", body)
+    state['last_notified'] = now
+    state['suppressed'] = 0
+
+# Function to sweep all known nodes with one bulk query
+def sweep_known_nodes(sweep_state, instance=None):
+    """Run SWEEP_COMMAND once, diff the result against the previous sweep and return the SnapshotDiff.
+
+    Returns None when the sweep could not be run. The first sweep after
+    startup is compared with the snapshot saved by the previous daemon run.
+    """
+    import subprocess
+    import decnet_sweep
+    try:
+        result = run_probe(instance_command(instance, SWEEP_COMMAND), timeout=SWEEP_TIMEOUT)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        log_message(f"Known nodes sweep failed: {e}")
+        increment_metric("sweep_failures_total")
+        return None
+
+    states = decnet_ncp.parse_known_nodes(result.stdout)
+    if not states:
+        log_message(f"Known nodes sweep returned no nodes: {(result.stderr or result.stdout).strip()[:200]}")
+        increment_metric("sweep_failures_total")
+        return None
+    snapshot = decnet_sweep.build_snapshot(states)
+    previous = sweep_state['snapshot'] or decnet_sweep.read_snapshot(KNOWN_NODES_PATH)
+    sweep_state['snapshot'] = snapshot
+    try:
+        decnet_sweep.write_snapshot(KNOWN_NODES_PATH, snapshot)
+    except OSError as e:
+        log_message(f"Failed to save known nodes snapshot: {e}")
+
+    reachable = decnet_sweep.count_bits(snapshot.reachable)
+    set_metric("sweep_known_nodes", len(states))
+    set_metric("sweep_reachable_nodes", reachable)
+    counts = decnet_sweep.area_counts(snapshot.reachable)
+    for area, count in counts.items():
+        set_metric(f'area_reachable_nodes{{area="{area}"}}', count)
+    try:
+        decnet_sweep.append_area_history(AREA_HISTORY_PATH, snapshot.timestamp, counts)
+    except OSError as e:
+        log_message(f"Failed to write area history: {e}")
+    if previous is None:
+        log_message(f"Known nodes sweep: {reachable} of {len(states)} nodes reachable.")
+        return decnet_sweep.SnapshotDiff([], [], [])
+
+    diff = decnet_sweep.diff_snapshots(previous, snapshot)
+    set_metric("sweep_nodes_came_up", len(diff.came_up))
+    set_metric("sweep_nodes_went_down", len(diff.went_down))
+    set_metric("sweep_route_changes", len(diff.route_changed))
+    log_message(f"Known nodes sweep: {reachable} of {len(states)} nodes reachable, {len(diff.came_up)} came up, "
+                f"{len(diff.went_down)} went down, {len(diff.route_changed)} changed route.")
+    for label, indexes in (("came up", diff.came_up), ("went down", diff.went_down)):
+        if indexes:
+            log_message(f"Nodes that {label}: {format_node_list(indexes, snapshot.names)}")
+    return diff
+
+def get_node_directory():
+    """Return the mapped node directory (see decnet_nodedb), or None if there is none.
+
+    The directory is mapped once and mapped again only after a name update
+    replaced the file, so a lookup costs one stat.
+    """
+    import decnet_nodedb
+    try:
+        stat = os.stat(NODE_DB_PATH)
+        key = (stat.st_ino, stat.st_mtime_ns)
+    except OSError:
+        key = None
+    with NODE_DIRECTORY_LOCK:
+        if key != NODE_DIRECTORY['stat']:
+            decnet_nodedb.close_node_db(NODE_DIRECTORY['db'])
+            NODE_DIRECTORY['db'] = decnet_nodedb.open_node_db(NODE_DB_PATH) if key else None
+            NODE_DIRECTORY['stat'] = key
+        return NODE_DIRECTORY['db']
+
+def format_node_list(indexes, names):
+    """Format node indexes as "1.13 (MIM), 2.10, ..." listing at most SWEEP_LOG_LIMIT nodes.
+
+    Names missing from the sweep come from the node directory when there is one.
+    """
+    import decnet_nodedb
+    import decnet_sweep
+    db = get_node_directory()
+    listed = []
+    for index in indexes[:SWEEP_LOG_LIMIT]:
+        address = decnet_sweep.index_address(index)
+        name = names.get(index) or (db and decnet_nodedb.name_at(db, index))
+        listed.append(f"{address} ({name})" if name else address)
+    if len(indexes) > SWEEP_LOG_LIMIT:
+        listed.append(f"and {len(indexes) - SWEEP_LOG_LIMIT} more")
+    return ", ".join(listed)
+
+def new_counter_state():
+    """Create the state of the circuit and line counter collector."""
+    return {
+        'readings': {},  # (kind, name) -> (monotonic time, {counter: value})
+        'totals': {},    # metric name -> sum of deltas, which survives counter resets
+    }
+
+# Function to collect circuit and line counters
+def collect_counters(counter_state, instance=None):
+    """Read all circuit and line counters with COUNTER_COMMANDS and record what changed.
+
+    Deltas against the previous reading are exported as <kind>_counter_total
+    (reset-proof running totals) and <kind>_counter_rate (per second) metrics
+    and appended to COUNTER_HISTORY_PATH. Returns the number of entities read.
+    """
+    import subprocess
+    import decnet_counters
+    readings = {}
+    for command in COUNTER_COMMANDS:
         try:
-            # os.remove(SOCKET_PATH)
-            subprocess.run(["sudo", "rm", "/tmp/decnetapi.sock"], check=True)
-        except Exception as e:
-            log_message(f"Failed to remove locked socket: {e}")
+            result = run_probe(instance_command(instance, command), timeout=COUNTER_TIMEOUT)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            log_message(f"Counter collection '{command}' failed: {e}")
+            increment_metric(instance_metric("counter_collection_failures_total", instance))
+            continue
+        readings.update(decnet_ncp.parse_counters(result.stdout))
+    if not readings:
+        return 0
+
+    now = time.monotonic()
+    prefix = f"{instance['label']} " if instance and instance['label'] else ""
+    samples = []
+    for (kind, name), counters in readings.items():
+        previous = counter_state['readings'].get((kind, name))
+        counter_state['readings'][(kind, name)] = (now, counters)
+        if previous is None:
+            continue
+        deltas, reset = decnet_counters.counter_deltas(previous[1], counters)
+        seconds = decnet_counters.counter_interval(previous[1], counters, now - previous[0])
+        if reset:
+            log_message(f"Counters of {kind} {name} were zeroed since the last reading.")
+            increment_metric(instance_metric(f'counter_resets_total{{{kind}="{name}"}}', instance))
+        for counter, delta in deltas.items():
+            labels = f'{{{kind}="{name}",counter="{counter}"}}'
+            total = instance_metric(f"{kind}_counter_total{labels}", instance)
+            counter_state['totals'][total] = counter_state['totals'].get(total, 0) + delta
+            set_metric(total, counter_state['totals'][total])
+            if seconds > 0:
+                set_metric(instance_metric(f"{kind}_counter_rate{labels}", instance), round(delta / seconds, 3))
+            samples.append((f"{prefix}{kind} {name} {counter}", seconds, delta))
+    if samples:
+        try:
+            with COUNTER_HISTORY_LOCK:
+                decnet_counters.append_counter_history(COUNTER_HISTORY_PATH, time.time(), samples)
+        except OSError as e:
+            log_message(f"Failed to write counter history: {e}")
+    return len(readings)
+
+def new_link_state():
+    """Create the link state tracked across monitoring cycles."""
+    return {
+        'confirmed_up': None,  # None until the first verdict
+        'last_result': None,
+        'streak': 0,           # Consecutive probes with the same result
+    }
+
+def update_link_state(link_state, is_up, output, target=None):
+    """Record a probe result and send notifications on confirmed transitions.
+
+    A single failed probe is only a suspicion; the link is declared down after
+    PROBE_CONFIRM_COUNT consecutive failures, which the fast recheck interval
+    confirms within seconds. Recovery is declared on the first good probe.
+    """
+    if is_up == link_state['last_result']:
+        link_state['streak'] += 1
+    else:
+        link_state['last_result'] = is_up
+        link_state['streak'] = 1
+
+    target = target or TARGET_HOST
+    if is_up:
+        if link_state['confirmed_up'] is False:
+            log_message(f"DECNET link to {target} has recovered.")
+            send_email(output, False, target)
+        link_state['confirmed_up'] = True
+    elif link_state['confirmed_up'] is not False:
+        if link_state['streak'] >= PROBE_CONFIRM_COUNT:
+            log_message(f"DECNET link to {target} confirmed down after {link_state['streak']} failed probes.")
+            link_state['confirmed_up'] = False
+            send_email(output, True, target)
+        else:
+            log_message(f"DECNET link to {target} probe failed; rechecking to confirm.")
+
+def next_probe_interval(is_up, streak):
+    """Return the number of seconds to wait before the next probe.
+
+    Healthy links back off exponentially from PROBE_BASE_INTERVAL toward
+    PROBE_MAX_INTERVAL. Failing links are rechecked after PROBE_RECHECK_INTERVAL,
+    backing off no further than PROBE_BASE_INTERVAL so recovery is found fast.
+    Jitter spreads the probes of many hosts so they don't hit MIM together.
+    """
+    import random
+    exponent = min(max(streak, 1) - 1, 30)
+    if is_up:
+        interval = min(PROBE_BASE_INTERVAL * 2 ** exponent, PROBE_MAX_INTERVAL)
     else:
+        interval = min(PROBE_RECHECK_INTERVAL * 2 ** exponent, max(PROBE_BASE_INTERVAL, PROBE_RECHECK_INTERVAL))
+    if PROBE_JITTER > 0:
+        interval *= random.uniform(1 - PROBE_JITTER, 1 + PROBE_JITTER)
+    return interval
+
+# Function to signal a single PyDECNET process
+def signal_pydecnet(proc, sig):
+    """Send sig to one PyDECNET process, using 'sudo kill' for that PID if it runs as another user."""
+    import psutil
+    import subprocess
+    try:
+        proc.send_signal(sig)
+        return True
+    except psutil.NoSuchProcess:
+        return True
+    except psutil.AccessDenied:
+        result = subprocess.run(["sudo", "-n", "kill", f"-{int(sig)}", str(proc.pid)],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            log_message(f"Failed to signal PyDECNET (PID: {proc.pid}): {result.stderr.strip() or 'permission denied'}")
+            return False
+        return True
+
+# Function to stop PyDECNET if running
+def stop_pydecnet(pids=None, timeout=None, instance=None):
+    """Stop the supervised PyDECNET process(es) and return {pid: exit status}.
+
+    Sends SIGTERM to the given PIDs only (by default the processes of the
+    instance), waits up to `timeout` seconds (STOP_TIMEOUT by default) for
+    them to exit and escalates to SIGKILL for any that are still alive.
+    """
+    import psutil
+    import signal
+    timeout = STOP_TIMEOUT if timeout is None else timeout
+    who = instance_label(instance)
+    log_message(f"Stopping {who} process if it is running.")
+    pids = find_instance_pids(instance) if pids is None else pids
+    statuses = {}
+    procs = []
+    for pid in pids:
+        try:
+            proc = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            statuses[pid] = "already exited"
+            continue
+        log_message(f"{who} is running. Stopping it (PID: {pid}).")
+        if signal_pydecnet(proc, signal.SIGTERM):
+            procs.append(proc)
+        else:
+            statuses[pid] = "could not be signalled"
+    if not procs:
+        return statuses
+
+    start = time.monotonic()
+    gone, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in gone:
+        statuses[proc.pid] = "terminated" if proc.returncode is None else f"exited with status {proc.returncode}"
+
+    if alive:
+        log_message(f"{who} did not exit within {timeout:.0f} seconds; sending SIGKILL.")
+        for proc in alive:
+            signal_pydecnet(proc, signal.SIGKILL)
+        killed, still_alive = psutil.wait_procs(alive, timeout=STOP_KILL_TIMEOUT)
+        for proc in killed:
+            statuses[proc.pid] = "killed"
+        for proc in still_alive:
+            statuses[proc.pid] = "still running"
+        increment_metric(instance_metric("pydecnet_forced_kills_total", instance), len(alive))
+
+    elapsed = time.monotonic() - start
+    set_metric(instance_metric("pydecnet_stop_seconds", instance), round(elapsed, 3))
+    for pid, status in sorted(statuses.items()):
+        log_message(f"{who} (PID: {pid}) {status}.")
+    log_message(f"{who} stopped in {elapsed:.2f} seconds.")
+    return statuses
+
+# Function to tell a stale API socket from a live one
+def socket_is_stale(path, timeout=0.5):
+    """Return True if path is a Unix socket that nobody is listening on.
+
+    Only a refused connection counts as stale; timeouts and other errors are
+    treated as "possibly live" so a busy PyDECNET never loses its socket.
+    """
+    import socket
+    import stat
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            return False
+    except OSError:
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        return False
+    except ConnectionRefusedError:
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+# Function to remove a stale PyDECNET API socket
+def reclaim_stale_socket(path=None):
+    """Remove the API socket at path (SOCKET_PATH by default) if it is left over from a dead PyDECNET.
+
+    Returns True if the path is free for a new PyDECNET, False if a live
+    process is listening on it or it could not be removed.
+    """
+    path = path or SOCKET_PATH
+    log_message("Checking for locked socket.")
+    if not os.path.lexists(path):
         log_message("Socket does not exist. Proceeding.")
+        return True
+    if not socket_is_stale(path):
+        log_message(f"{path} is in use by a live process or is not a socket; leaving it in place.")
+        return False
+    log_message("PyDECNET socket is stale. Removing it.")
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log_message(f"Failed to remove stale socket: {e}. Remove {path} manually or run the daemon as its owner.")
+        return False
+    return True
+
+def runs_pydecnet_bin(cmdline):
+    """Return True if cmdline executes PYDECNET_BIN (directly or through a Python interpreter).
+
+    Editors, pagers or status scripts that merely mention the path don't match.
+    """
+    if cmdline and cmdline[0] == PYDECNET_BIN:
+        return True
+    return (len(cmdline) > 1 and cmdline[1] == PYDECNET_BIN and
+            os.path.basename(cmdline[0]).startswith('python'))
+
+# Function to find running PyDECNET processes
+def find_pydecnet_pids():
+    """Return the PIDs of running (non-zombie) PyDECNET processes, oldest first."""
+    import psutil
+    found = []
+    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time', 'status']):
+        try:
+            if proc.info['status'] == psutil.STATUS_ZOMBIE:
+                continue
+            if proc.info['name'] == 'pydecnet' or runs_pydecnet_bin(proc.info['cmdline'] or []):
+                found.append((proc.info['create_time'], proc.info['pid']))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return [pid for _, pid in sorted(found)]
+
+def find_instance_pids(instance=None):
+    """Return the PIDs of the running processes of one PyDECNET instance, oldest first.
+
+    A named instance owns the PyDECNET processes whose command line holds all
+    of its config files, so one instance never sees (or stops) another's. The
+    PID in its pidfile is used without scanning the process table as long as
+    that process is still one of its own.
+    """
+    if instance is not None and instance['match'] is not None:
+        pid = read_instance_pidfile(instance)
+        if pid is not None:
+            return [pid]
+    pids = find_pydecnet_pids()
+    if instance is None or instance['match'] is None:
+        return pids
+    return [pid for pid in pids if is_instance_process(instance, pid)]
+
+def is_instance_process(instance, pid):
+    """Return True if pid is a live process started with all of a named instance's config files."""
+    import psutil
+    try:
+        proc = psutil.Process(pid)
+        if proc.status() == psutil.STATUS_ZOMBIE:
+            return False
+        cmdline = proc.cmdline()
+    except psutil.Error:
+        return False
+    return all(path in cmdline for path in instance['match'])
+
+def read_instance_pidfile(instance):
+    """Return the PID recorded in the instance's pidfile, or None if there is none or it is stale.
+
+    A stale pidfile (left behind by a crash, or naming a PID that now belongs
+    to another process) is removed.
+    """
+    if not instance['pidfile']:
+        return None
+    try:
+        with open(instance['pidfile']) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    if is_instance_process(instance, pid):
+        return pid
+    try:
+        os.remove(instance['pidfile'])
+    except OSError:
+        pass
+    return None
+
+def write_instance_pidfile(instance, pid):
+    """Record the PID of a freshly started instance in its pidfile, if it has one."""
+    if not instance['pidfile']:
+        return
+    try:
+        with open(instance['pidfile'], "w") as f:
+            f.write(f"{pid}\n")
+    except OSError as e:
+        log_message(f"Failed to write {instance['pidfile']}: {e}")
+
+# Function to check whether a Unix socket has a listener
+def socket_accepts_connections(path, timeout=0.5):
+    """Return True if something is listening on the Unix socket at path."""
+    import socket
+    if not os.path.exists(path):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def process_listens_on(pid, path):
+    """Return True if process pid has the Unix socket at path open."""
+    import psutil
+    try:
+        process = psutil.Process(pid)
+        # psutil < 6.0 only has connections()
+        connections = (getattr(process, 'net_connections', None) or process.connections)(kind='unix')
+    except psutil.Error:
+        return False
+    return any(connection.laddr == path for connection in connections)
+
+# Function to wait for a freshly started PyDECNET to become ready
+def wait_for_pydecnet_ready(launcher, timeout=None, instance=None):
+    """Wait for the API socket to accept connections and the daemonized PID to appear.
+
+    `launcher` is the Popen object of 'pydecnet --daemon', which forks and exits.
+    The launcher's own PID only counts once it has the socket open itself, i.e.
+    when PyDECNET did not daemonize. Returns the PID of the surviving PyDECNET
+    process, or None if PyDECNET is not ready within `timeout` seconds
+    (STARTUP_TIMEOUT by default).
+    """
+    instance = instance or default_instance()
+    who = instance_label(instance)
+    timeout = STARTUP_TIMEOUT if timeout is None else timeout
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+        returncode = launcher.poll()
+        if returncode is not None and returncode != 0:
+            log_message(f"{who} launcher exited with status {returncode}; see {instance['log_error']}.")
+            break
+
+        # Until the launcher has forked and exited, any PID but its own is the daemonized child
+        candidates = [pid for pid in find_instance_pids(instance) if pid != launcher.pid]
+        if not candidates and returncode is None and process_listens_on(launcher.pid, instance['socket']):
+            # PyDECNET did not daemonize: the launcher itself is the final process
+            candidates = [launcher.pid]
+        if candidates and socket_accepts_connections(instance['socket']):
+            elapsed = time.monotonic() - start
+            set_metric(instance_metric("pydecnet_startup_seconds", instance), round(elapsed, 3))
+            set_metric(instance_metric("pydecnet_ready", instance), 1)
+            log_message(f"{who} is ready after {elapsed:.1f} seconds (PID: {candidates[-1]}).")
+            return candidates[-1]
+
+        if time.monotonic() >= deadline:
+            log_message(f"{who} did not become ready within {timeout:.0f} seconds.")
+            break
+        time.sleep(0.25)
+
+    set_metric(instance_metric("pydecnet_ready", instance), 0)
+    increment_metric(instance_metric("pydecnet_startup_failures_total", instance))
+    return None
 
 # Function to start PyDECNET
-def start_pydecnet():
-    log_message("Starting new PyDECNET process with configuration.")
-    command = [PYDECNET_BIN, "--daemon", "--log-config"] + PYDECNET_CONFIG_FILES
+def start_pydecnet(instance=None):
+    """Start a PyDECNET instance and wait for it to become ready; return its PID or None."""
+    import subprocess
+    instance = instance or default_instance()
+    who = instance_label(instance)
+    failures = instance_metric("pydecnet_startup_failures_total", instance)
+    log_message(f"Starting new {who} process with configuration.")
+    command = [PYDECNET_BIN, "--daemon", "--log-config"] + instance['config_files']
     try:
-        with open(LOG_INFO_PATH, "w") as info_log, open(LOG_ERROR_PATH, "w") as error_log:
+        # Keep the output of previous attempts instead of truncating it
+        rotate_log_file(instance['log_info'])
+        rotate_log_file(instance['log_error'])
+        with open(instance['log_info'], "w") as info_log, open(instance['log_error'], "w") as error_log:
             # Use subprocess.Popen to start the process with redirected logs
             process = subprocess.Popen(
                 command,
                 stdout=info_log,
                 stderr=error_log
             )
-        log_message(f"PyDECNET started successfully (PID: {process.pid}).")
+        log_message(f"{who} launched (launcher PID: {process.pid}); waiting for it to become ready.")
     except FileNotFoundError:
-        log_message("Failed to start PyDECNET: Executable not found. Please check PYDECNET_BIN path.")
+        log_message(f"Failed to start {who}: Executable not found. Please check PYDECNET_BIN path.")
+        increment_metric(failures)
+        return None
     except Exception as e:
-        log_message(f"Failed to start PyDECNET: {e}")
+        log_message(f"Failed to start {who}: {e}")
+        increment_metric(failures)
+        return None
+
+    pid = wait_for_pydecnet_ready(process, instance=instance)
+    if pid is not None:
+        log_message(f"{who} started successfully (PID: {pid}).")
+        write_instance_pidfile(instance, pid)
+    else:
+        log_message(f"{who} startup failed.")
+    return pid
 
 def start_pydecnet_1 ():
+    import psutil
     log_message("Starting new PyDECNET process with configuration.")
     command = [PYDECNET_BIN, "--daemon", "--log-config"] + PYDECNET_CONFIG_FILES
     try:
@@ -192,23 +1251,302 @@ def start_pydecnet_1 ():
     except Exception as e:
         log_message(f"Failed to start PyDECNET: {e}")
 
+# Function to rotate a launch log so each start attempt keeps its own file
+def rotate_log_file(path, keep=None):
+    """Shift path -> path.1 -> path.2 ... keeping at most `keep` old copies."""
+    keep = RESTART_LOG_KEEP if keep is None else keep
+    if keep <= 0:
+        return
+    try:
+        if os.path.exists(f"{path}.{keep}"):
+            os.remove(f"{path}.{keep}")
+        for index in range(keep - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            os.replace(path, f"{path}.1")
+    except OSError as e:
+        log_message(f"Failed to rotate log file {path}: {e}")
+
 # Function to restart PyDECNET
-def restart_pydecnet():
-    log_message("Relaunching PyDECNET process.")
-    stop_pydecnet()
-    remove_locked_socket()
-    start_pydecnet()
+def restart_pydecnet(instance=None):
+    instance = instance or default_instance()
+    log_message(f"Relaunching {instance_label(instance)} process.")
+    increment_metric(instance_metric("pydecnet_restarts_total", instance))
+    stop_pydecnet(instance=instance)
+    if not reclaim_stale_socket(instance['socket']):
+        log_message(f"Not starting {instance_label(instance)}: its API socket is unavailable.")
+        increment_metric(instance_metric("pydecnet_startup_failures_total", instance))
+        return None
+    return start_pydecnet(instance)
+
+def new_restart_state():
+    """Create the restart budget state used by supervise_restart()."""
+    return {
+        'tokens': float(RESTART_BURST),
+        'last_refill': time.monotonic(),
+        'attempts': 0,            # Consecutive restarts without PyDECNET staying up
+        'next_allowed': 0.0,      # Monotonic time before which no restart is attempted
+        'last_restart': None,     # Monotonic time of the last restart attempt
+        'crash_loop': False,
+        'total_restarts': 0,
+    }
+
+def refill_restart_tokens(restart_state, now):
+    """Add the tokens earned since the last refill, up to RESTART_BURST."""
+    if RESTART_REFILL_SECONDS > 0:
+        earned = (now - restart_state['last_refill']) / RESTART_REFILL_SECONDS
+        restart_state['tokens'] = min(float(RESTART_BURST), restart_state['tokens'] + earned)
+    restart_state['last_refill'] = now
+
+def supervise_restart(restart_state, instance=None):
+    """Restart a PyDECNET instance if its restart budget and backoff allow it.
+
+    Returns True if a restart was attempted.
+    """
+    instance = instance or default_instance()
+    who = instance_label(instance)
+    now = time.monotonic()
+    refill_restart_tokens(restart_state, now)
+
+    if now < restart_state['next_allowed']:
+        remaining = restart_state['next_allowed'] - now
+        log_message(f"{who} restart deferred, backing off for another {remaining:.0f} seconds.")
+        return False
+
+    if restart_state['tokens'] < 1:
+        if not restart_state['crash_loop']:
+            restart_state['crash_loop'] = True
+            log_message(f"{who} is crash-looping: {restart_state['attempts']} restarts failed. "
+                        "Automatic restarts are paused until the restart budget refills.")
+            send_notification(
+                f"{who} is crash-looping",
+                f"{who} was restarted {restart_state['attempts']} times without staying up.\n"
+                f"Automatic restarts are limited to {RESTART_BURST} per "
+                f"{RESTART_BURST * RESTART_REFILL_SECONDS / 60:.0f} minutes until it recovers.\n\n"
+                f"The output of recent attempts is kept in {instance['log_info']}.N and {instance['log_error']}.N."
+            )
+        else:
+            log_message(f"{who} restart budget exhausted; waiting for it to refill.")
+        return False
+
+    restart_state['tokens'] -= 1
+    restart_state['attempts'] += 1
+    restart_state['total_restarts'] += 1
+    restart_state['last_restart'] = now
+    backoff = min(RESTART_BACKOFF_BASE * 2 ** min(restart_state['attempts'] - 1, 30), RESTART_BACKOFF_MAX)
+    restart_state['next_allowed'] = now + backoff
+    log_message(f"{who} restart attempt {restart_state['attempts']} "
+                f"({restart_state['tokens']:.1f} restarts left in budget, next retry no sooner than {backoff:.0f} seconds).")
+    if restart_pydecnet(instance) is None:
+        log_message(f"{who} restart attempt {restart_state['attempts']} failed: it never became ready.")
+    return True
+
+def record_pydecnet_running(restart_state, instance=None):
+    """Reset the backoff once PyDECNET has stayed up RESTART_STABLE_SECONDS after a restart."""
+    if restart_state['attempts'] == 0 and not restart_state['crash_loop']:
+        return
+    last_restart = restart_state['last_restart']
+    if last_restart is not None and time.monotonic() - last_restart < RESTART_STABLE_SECONDS:
+        return
+    if restart_state['crash_loop']:
+        log_message(f"{instance_label(instance)} is running again; leaving crash-loop state.")
+    restart_state['attempts'] = 0
+    restart_state['next_allowed'] = 0.0
+    restart_state['crash_loop'] = False
+
+# Function to read the resource usage of a process
+def read_process_resources(pid):
+    """Return {'rss_bytes', 'open_fds', 'threads', 'cpu_seconds'} for pid, or None if it is gone.
+
+    Reads /proc/<pid>/stat and lists /proc/<pid>/fd, which costs a few system
+    calls; psutil is used where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # Fields after the command name, which may itself contain spaces
+            fields = f.read().rsplit(b")", 1)[1].split()
+        return {
+            'rss_bytes': int(fields[21]) * os.sysconf('SC_PAGE_SIZE'),
+            'open_fds': len(os.listdir(f"/proc/{pid}/fd")),
+            'threads': int(fields[17]),
+            'cpu_seconds': (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'),
+        }
+    except FileNotFoundError:
+        if os.path.isdir("/proc/self"):
+            return None
+    except (OSError, IndexError, ValueError):
+        return None
+
+    import psutil
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            times = proc.cpu_times()
+            return {
+                'rss_bytes': proc.memory_info().rss,
+                'open_fds': proc.num_fds() if hasattr(proc, 'num_fds') else 0,
+                'threads': proc.num_threads(),
+                'cpu_seconds': times.user + times.system,
+            }
+    except psutil.Error:
+        return None
+
+def fit_trend(points):
+    """Least-squares fit of [(t, value)]; return (slope per second, r squared)."""
+    count = len(points)
+    if count < 3:
+        return 0.0, 0.0
+    mean_t = sum(t for t, _ in points) / count
+    mean_v = sum(v for _, v in points) / count
+    var_t = sum((t - mean_t) ** 2 for t, _ in points)
+    var_v = sum((v - mean_v) ** 2 for _, v in points)
+    if var_t == 0:
+        return 0.0, 0.0
+    covariance = sum((t - mean_t) * (v - mean_v) for t, v in points)
+    slope = covariance / var_t
+    r2 = covariance ** 2 / (var_t * var_v) if var_v else 0.0
+    return slope, r2
+
+def new_telemetry_state():
+    """Create the resource telemetry state of the supervised PyDECNET."""
+    return {
+        'pid': None,
+        'samples': deque(maxlen=TELEMETRY_WINDOW),  # (monotonic time, resources dict)
+        'last': None,          # The latest reading, for the CPU rate
+        'leaking': [],         # Resources currently growing beyond their threshold
+        'restart_due': False,  # A planned restart is waiting for the quiet hours
+    }
+
+def sample_pydecnet_resources(telemetry, pid, instance=None):
+    """Record one resource sample of pid and export it as metrics; return the sample or None."""
+    if telemetry['pid'] != pid:
+        telemetry['pid'] = pid
+        telemetry['samples'].clear()
+        telemetry['last'] = None
+        telemetry['leaking'] = []
+        telemetry['restart_due'] = False
+    resources = read_process_resources(pid)
+    if resources is None:
+        return None
+    now = time.monotonic()
+    if telemetry['last'] is not None:
+        previous_time, previous = telemetry['last']
+        if now > previous_time:
+            cpu = 100 * (resources['cpu_seconds'] - previous['cpu_seconds']) / (now - previous_time)
+            set_metric(instance_metric("pydecnet_cpu_percent", instance), round(max(cpu, 0.0), 1))
+    telemetry['last'] = (now, resources)
+    samples = telemetry['samples']
+    if not samples or now - samples[-1][0] >= TELEMETRY_SAMPLE_INTERVAL:
+        samples.append((now, resources))
+    set_metric(instance_metric("pydecnet_rss_bytes", instance), resources['rss_bytes'])
+    set_metric(instance_metric("pydecnet_open_fds", instance), resources['open_fds'])
+    set_metric(instance_metric("pydecnet_threads", instance), resources['threads'])
+    return resources
+
+def resource_trends(telemetry):
+    """Return {resource: (growth per hour, r squared)} once the window spans TELEMETRY_MIN_SPAN."""
+    samples = telemetry['samples']
+    if len(samples) < 3 or samples[-1][0] - samples[0][0] < TELEMETRY_MIN_SPAN:
+        return {}
+    trends = {}
+    for key in ('rss_bytes', 'open_fds', 'threads'):
+        slope, r2 = fit_trend([(t, resources[key]) for t, resources in samples])
+        trends[key] = (slope * 3600, r2)
+    return trends
+
+def in_quiet_hours(hour=None):
+    """Return True if the local hour is within LEAK_RESTART_HOURS ("start-end", may wrap midnight)."""
+    hour = datetime.now().hour if hour is None else hour
+    try:
+        start, end = (int(part) for part in LEAK_RESTART_HOURS.split('-'))
+    except ValueError:
+        return False
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+def check_resource_trends(telemetry, link_state, instance=None):
+    """Alert on sustained resource growth of a PyDECNET instance and run planned restarts.
+
+    Returns True if PyDECNET was restarted.
+    """
+    who = instance_label(instance)
+    trends = resource_trends(telemetry)
+    if not trends:
+        return False
+    thresholds = {
+        'rss_bytes': RSS_GROWTH_ALERT_MB_PER_HOUR * 1024 * 1024,
+        'open_fds': FD_GROWTH_ALERT_PER_HOUR,
+        'threads': THREAD_GROWTH_ALERT_PER_HOUR,
+    }
+    set_metric(instance_metric("pydecnet_rss_growth_bytes_per_hour", instance), round(trends['rss_bytes'][0]))
+    leaking = [key for key, (growth, r2) in trends.items()
+               if thresholds[key] > 0 and growth >= thresholds[key] and r2 >= TREND_MIN_R2]
+    set_metric(instance_metric("pydecnet_resource_leak", instance), int(bool(leaking)))
+
+    latest = telemetry['samples'][-1][1]
+    describe = {
+        'rss_bytes': lambda growth: f"RSS {latest['rss_bytes'] / 1048576:.0f} MB, growing {growth / 1048576:.1f} MB/hour",
+        'open_fds': lambda growth: f"{latest['open_fds']} open files, growing {growth:.0f}/hour",
+        'threads': lambda growth: f"{latest['threads']} threads, growing {growth:.1f}/hour",
+    }
+    summary = "; ".join(describe[key](trends[key][0]) for key in leaking)
+    if leaking and not telemetry['leaking']:
+        log_message(f"{who} (PID: {telemetry['pid']}) resources are growing steadily: {summary}.")
+        send_notification(f"{who} resource usage is growing",
+                          f"{who} (PID: {telemetry['pid']}) shows sustained growth: {summary}.\n\n"
+                          + ("A planned restart will run during the quiet hours "
+                             f"({LEAK_RESTART_HOURS})." if LEAK_RESTART else
+                             "Set hecnet_leak_restart = true to restart it automatically during quiet hours."))
+    elif not leaking and telemetry['leaking']:
+        log_message(f"{who} (PID: {telemetry['pid']}) resource usage is no longer growing.")
+    telemetry['leaking'] = leaking
+    telemetry['restart_due'] = bool(leaking) and LEAK_RESTART
+    if not telemetry['restart_due']:
+        return False
+
+    urgent = False
+    rss_growth = trends['rss_bytes'][0]
+    if PYDECNET_RSS_LIMIT_MB > 0 and rss_growth > 0:
+        seconds_left = (PYDECNET_RSS_LIMIT_MB * 1048576 - latest['rss_bytes']) / rss_growth * 3600
+        set_metric(instance_metric("pydecnet_rss_limit_eta_seconds", instance), round(max(seconds_left, 0)))
+        urgent = seconds_left < LEAK_RESTART_URGENT_SECONDS
+    # Only restart while the link is otherwise healthy, so an outage is never made worse
+    if not urgent and not (in_quiet_hours() and link_state['confirmed_up']):
+        return False
+
+    reason = "it is about to reach its memory limit" if urgent else "it is leaking resources"
+    log_message(f"Planned restart of {who} (PID: {telemetry['pid']}) because {reason}: {summary}.")
+    increment_metric(instance_metric("pydecnet_planned_restarts_total", instance))
+    pid = restart_pydecnet(instance)
+    send_notification(f"Planned {who} restart",
+                      f"{who} was restarted because {reason}: {summary}.\n\n"
+                      + (f"The new {who} is running (PID: {pid})." if pid else
+                         f"The new {who} did not become ready; the supervisor will keep trying."))
+    # The new process starts with a fresh window
+    telemetry['pid'] = None
+    telemetry['samples'].clear()
+    telemetry['leaking'] = []
+    telemetry['restart_due'] = False
+    return True
 
 # Function to update DECNET names
 def update_decnet_names():
+    """Run the name update script; return True if it succeeded."""
+    import subprocess
     log_message("Running DECNET name update script.")
     try:
-        subprocess.run([sys.executable, DECNET_NAME_UPDATE_SCRIPT], check=True)
+        subprocess.run([sys.executable, DECNET_NAME_UPDATE_SCRIPT], check=True, timeout=NAME_UPDATE_TIMEOUT)
         log_message("DECNET name update completed successfully.")
         # Update the timestamp file
         update_name_update_timestamp()
+        return True
+    except subprocess.TimeoutExpired:
+        log_message(f"DECNET name update did not finish within {NAME_UPDATE_TIMEOUT:.0f} seconds; killed it.")
     except Exception as e:
         log_message(f"Failed to run DECNET name update script: {e}")
+    return False
 
 def get_last_name_update_time():
     """Get the timestamp of the last name update."""
@@ -233,79 +1571,740 @@ def update_name_update_timestamp():
     except Exception as e:
         log_message(f"Failed to update name update timestamp: {e}")
 
-def should_update_names():
-    """Check if it's time to update DECNET names based on the configured interval."""
-    if NAME_UPDATE_INTERVAL <= 0:
-        return False  # Automatic updates disabled
-    
-    last_update = get_last_name_update_time()
-    current_time = datetime.now()
-    time_since_update = current_time - last_update
-    
-    # Convert interval from minutes to seconds for comparison
-    interval_seconds = NAME_UPDATE_INTERVAL * 60
-    
-    return time_since_update.total_seconds() >= interval_seconds
-
-def check_and_update_names_if_needed():
-    """Check if names need updating and update them if necessary."""
-    if should_update_names():
-        last_update = get_last_name_update_time()
-        hours_since_update = (datetime.now() - last_update).total_seconds() / 3600
-        log_message(f"Automatic name update due (last update: {hours_since_update:.1f} hours ago)")
-        update_decnet_names()
+def rotate_status_log():
+    """Rotate the status log once it has grown beyond STATUS_LOG_MAX_BYTES."""
+    try:
+        size = os.path.getsize(STATUS_LOG_PATH)
+    except OSError:
+        return
+    if size > STATUS_LOG_MAX_BYTES:
+        rotate_log_file(STATUS_LOG_PATH, STATUS_LOG_KEEP)
+        log_message(f"Rotated the status log ({size / 1024 / 1024:.1f} MB).")
+
+# Function to set up the periodic jobs of an instance
+def new_job_schedule(instance):
+    """Load the instance's job schedule and register its periodic jobs.
+
+    The known nodes snapshot, the node names and the status log are shared, so
+    only the primary instance runs the sweep, name update and rotation jobs.
+    """
+    import decnet_scheduler
+    schedule = decnet_scheduler.load_scheduler(instance['schedule'])
+    jobs = {'counters': COUNTER_INTERVAL}
+    if instance['primary']:
+        jobs['sweep'] = SWEEP_INTERVAL
+        jobs['log rotation'] = LOG_ROTATION_INTERVAL if STATUS_LOG_MAX_BYTES > 0 else 0
+        jobs['names'] = NAME_UPDATE_INTERVAL * 60
+        # Carry over an update recorded before the schedule existed, or run by hand with --update-names
+        adopt_manual_name_update(schedule)
+    now, wall = time.monotonic(), time.time()
+    for name, interval in jobs.items():
+        decnet_scheduler.register_job(schedule, name, interval, now, wall, JOB_JITTER, JOB_CATCH_UP)
+    until_names = decnet_scheduler.seconds_until(schedule, 'names', now)
+    if until_names:
+        log_message(f"Next automatic name update in {until_names / 3600:.1f} hours")
+    return schedule
+
+def pop_due_jobs(schedule):
+    """Return the names of the scheduled jobs that are due now; each must report back with finish_job()."""
+    import decnet_scheduler
+    with JOB_SCHEDULE_LOCK:
+        return decnet_scheduler.pop_due_jobs(schedule, time.monotonic())
+
+def finish_job(schedule, name, succeeded):
+    """Record and save a successful run of job `name`, or schedule a retry after a failure."""
+    import decnet_scheduler
+    with JOB_SCHEDULE_LOCK:
+        if not succeeded:
+            delay = min(JOB_RETRY_INTERVAL, schedule['jobs'][name]['interval'])
+            decnet_scheduler.retry_job(schedule, name, delay, time.monotonic())
+            log_message(f"Scheduled job '{name}' did not complete; retrying in {delay:.0f} seconds.")
+            return
+        decnet_scheduler.record_run(schedule, name, time.time())
+        try:
+            decnet_scheduler.save_scheduler(schedule)
+        except OSError as e:
+            log_message(f"Failed to save the job schedule: {e}")
+
+def run_scheduled_job(schedule, name, function, *args):
+    """Run function(*args) as job `name`; a true result counts as a successful run."""
+    succeeded = False
+    try:
+        result = function(*args)
+        succeeded = bool(result)
+        return result
+    finally:
+        finish_job(schedule, name, succeeded)
+
+def submit_scheduled_job(state, name, function, *args):
+    """Run a due job of the instance in the background; a job still running from before is retried later."""
+    if not submit_background_probe(state['jobs'], name, run_scheduled_job, state['schedule'], name, function, *args):
+        finish_job(state['schedule'], name, False)
+
+def adopt_manual_name_update(schedule):
+    """Take over a name update newer than the scheduled one (see NAME_UPDATE_TIMESTAMP_FILE).
+
+    A successful update, manual ones included, writes the timestamp file.
+    Returns True if the schedule's record was moved forward.
+    """
+    if not os.path.exists(NAME_UPDATE_TIMESTAMP_FILE):
+        return False
+    last_update = get_last_name_update_time().timestamp()
+    record = schedule['records'].setdefault('names', {})
+    if last_update <= record.get('last_run', 0):
+        return False
+    record['last_run'] = last_update
+    return True
+
+def defer_name_update(schedule):
+    """Return True if a name update run by hand since makes the due one unnecessary.
+
+    The name update job is then rescheduled one interval after the manual run.
+    """
+    import decnet_scheduler
+    with JOB_SCHEDULE_LOCK:
+        if not adopt_manual_name_update(schedule):
+            return False
+        delay = decnet_scheduler.register_job(schedule, 'names', NAME_UPDATE_INTERVAL * 60, time.monotonic(),
+                                              time.time(), JOB_JITTER, JOB_CATCH_UP)
+        if not delay:
+            return False
+        try:
+            decnet_scheduler.save_scheduler(schedule)
+        except OSError as e:
+            log_message(f"Failed to save the job schedule: {e}")
+        return True
+
+def record_manual_name_update():
+    """Record a successful --update-names run in the primary instance's job schedule."""
+    import decnet_scheduler
+    schedule = decnet_scheduler.load_scheduler(get_instances()[0]['schedule'])
+    decnet_scheduler.record_run(schedule, 'names', time.time())
+    try:
+        decnet_scheduler.save_scheduler(schedule)
+    except OSError as e:
+        log_message(f"Failed to save the job schedule: {e}")
+
+# Function to run slow probes in the background
+def submit_background_probe(jobs, name, function, *args):
+    """Run function(*args) on the probe pool unless the previous `name` job is still running.
+
+    At most one job per name is in flight, so a probe that is slower than the
+    cycle never piles up work. Returns True if the job was submitted.
+    """
+    global PROBE_POOL
+    running = jobs.get(name)
+    if running is not None and not running.done():
+        log_message(f"Background probe '{name}' is still running; skipping this cycle's run.")
+        increment_metric(f'background_probe_skipped_total{{probe="{name}"}}')
+        return False
+    if PROBE_POOL is None:
+        from concurrent.futures import ThreadPoolExecutor
+        PROBE_POOL = ThreadPoolExecutor(max_workers=max(PROBE_WORKERS, 1), thread_name_prefix="probe")
+    jobs[name] = PROBE_POOL.submit(function, *args)
+    return True
+
+def collect_background_probes(jobs):
+    """Forget finished background probes, logging any that failed."""
+    for name, future in list(jobs.items()):
+        if not future.done():
+            continue
+        del jobs[name]
+        error = future.exception()
+        if error is not None:
+            log_message(f"Background probe '{name}' failed: {error}")
+            increment_metric(f'background_probe_errors_total{{probe="{name}"}}')
+
+# Function to compile the PyDECNET log patterns
+def compile_log_patterns(patterns):
+    """Compile {name: regex} into one alternation with a named group per pattern.
+
+    Names must be identifiers; invalid names or expressions are logged and left out.
+    """
+    import re
+    parts = []
+    for name, pattern in patterns.items():
+        if not pattern:
+            continue
+        if not name.isidentifier():
+            log_message(f"Ignoring log pattern '{name}': the name must be a valid identifier.")
+            continue
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            log_message(f"Ignoring log pattern '{name}': {e}")
+            continue
+        # Inline flags such as (?i) only apply to their own pattern
+        flags, body = re.match(r'((?:\(\?[aiLmsux]+\))*)(.*)', pattern, re.DOTALL).groups()
+        flags = ''.join(sorted(set(flags.replace('(?', '').replace(')', ''))))
+        parts.append(f"(?P<{name}>(?{flags}:{body}))" if flags else f"(?P<{name}>{body})")
+    return re.compile('|'.join(parts)) if parts else None
+
+def match_log_lines(matcher, lines):
+    """Return (pattern name, line) for every line the matcher finds something in."""
+    events = []
+    for line in lines:
+        match = matcher.search(line)
+        if match:
+            events.append((match.lastgroup, line))
+    return events
+
+def read_new_lines(path, position):
+    """Read the complete lines appended to path since position.
+
+    position is (inode, offset) or None. A new inode or a file shorter than the
+    offset means the log was rotated or truncated, and reading starts over.
+    Returns (lines, new position).
+    """
+    try:
+        with open(path, 'rb') as f:
+            info = os.fstat(f.fileno())
+            offset = 0
+            if position is not None and position[0] == info.st_ino and position[1] <= info.st_size:
+                offset = position[1]
+            if offset == info.st_size:
+                return [], (info.st_ino, offset)
+            f.seek(offset)
+            data = f.read(info.st_size - offset)
+    except OSError:
+        return [], position
+    end = data.rfind(b'\n') + 1  # A line still being written is read next time
+    lines = data[:end].decode('utf-8', errors='replace').splitlines()
+    return lines, (info.st_ino, offset + end)
+
+def new_log_alert_state():
+    """Create the per-pattern alert state of the log follower."""
+    return {'last_alert': {}, 'suppressed': {}, 'last_wake': {}}
+
+def handle_log_events(events, alert_state, source, instance=None):
+    """Log, count and (rate limited) email matches from a PyDECNET log; (rate limited) wake the monitor loop."""
+    if not events:
+        return
+    by_pattern = {}
+    for name, line in events:
+        by_pattern.setdefault(name, []).append(line)
+        increment_metric(instance_metric(f'pydecnet_log_events_total{{pattern="{name}"}}', instance))
+    for name, line in events[:LOG_EVENTS_LOGGED]:
+        log_message(f"PyDECNET {source} [{name}]: {line.strip()}")
+    if len(events) > LOG_EVENTS_LOGGED:
+        log_message(f"... and {len(events) - LOG_EVENTS_LOGGED} more matching PyDECNET {source} lines.")
+    now = time.monotonic()
+    if WAKE_EVENT is not None and LOG_WAKE_INTERVAL > 0:
+        for name in by_pattern:
+            last = alert_state['last_wake'].get(name)
+            if last is None or now - last >= LOG_WAKE_INTERVAL:
+                alert_state['last_wake'][name] = now
+                WAKE_EVENT.set()
+
+    if LOG_ALERT_INTERVAL <= 0:
+        return
+    for name, lines in by_pattern.items():
+        last = alert_state['last_alert'].get(name)
+        if last is not None and now - last < LOG_ALERT_INTERVAL:
+            alert_state['suppressed'][name] = alert_state['suppressed'].get(name, 0) + len(lines)
+            continue
+        body = f"PyDECNET wrote {len(lines)} line(s) matching '{name}' to its {source}:\n\n"
+        body += "\n".join(line.rstrip() for line in lines[:LOG_EVENTS_LOGGED])
+        suppressed = alert_state['suppressed'].pop(name, 0)
+        if suppressed:
+            body += f"\n\n{suppressed} earlier matching line(s) were not emailed."
+        send_notification(f"PyDECNET {source}: {name}", body)
+        alert_state['last_alert'][name] = now
+
+def follow_pydecnet_logs(stop_event, interval=None, instances=None):
+    """Follow the output logs of every instance until stop_event is set (runs in its own thread).
+
+    Output written before the follower started is skipped; after a rotation the
+    new file is read from its beginning.
+    """
+    interval = LOG_FOLLOW_INTERVAL if interval is None else interval
+    matcher = compile_log_patterns(LOG_PATTERNS)
+    if matcher is None:
+        return
+    sources = {}
+    for instance in instances or [default_instance()]:
+        prefix = f"'{instance['label']}' " if instance['label'] else ""
+        sources[instance['log_info']] = (f"{prefix}output", instance)
+        sources[instance['log_error']] = (f"{prefix}error output", instance)
+    positions = {}
+    for path in sources:
+        try:
+            info = os.stat(path)
+            positions[path] = (info.st_ino, info.st_size)
+        except OSError:
+            positions[path] = None
+    alert_state = new_log_alert_state()
+    while not stop_event.wait(interval):
+        for path, (source, instance) in sources.items():
+            try:
+                lines, positions[path] = read_new_lines(path, positions[path])
+                handle_log_events(match_log_lines(matcher, lines), alert_state, source, instance)
+            except Exception as e:
+                log_message(f"Failed to follow {path}: {e}")
+
+def start_log_follower(instances=None):
+    """Start following the PyDECNET logs in a background thread; return its stop event."""
+    global WAKE_EVENT
+    WAKE_EVENT = threading.Event()
+    stop_event = threading.Event()
+    threading.Thread(target=follow_pydecnet_logs, args=(stop_event, None, instances),
+                     name="log-follower", daemon=True).start()
+    return stop_event
+
+def install_profile_handler():
+    """Make SIGUSR1 profile the running daemon; return False where that is not supported.
+
+    The handlers only switch cProfile on and off (on the main thread, which runs
+    the monitor loop) and set events; sampling and writing the results happen on
+    the profiler thread, which otherwise just waits.
+    """
+    import signal
+    if not hasattr(signal, 'SIGUSR1') or not hasattr(signal, 'setitimer'):
+        return False
+    import cProfile  # Loaded now so the signal handler never imports
+    PROFILE['request'] = threading.Event()
+    PROFILE['done'] = threading.Event()
+    signal.signal(signal.SIGALRM, handle_profile_alarm)
+    signal.signal(signal.SIGUSR1, handle_profile_signal)
+    threading.Thread(target=run_profiler, args=(PROFILE['request'],), name="profiler", daemon=True).start()
+    return True
+
+def handle_profile_signal(signum, frame):
+    """Start a profile: trace the main thread and wake the profiler thread."""
+    import cProfile
+    import signal
+    if PROFILE['profiler'] is not None:
+        return  # A profile is already running
+    PROFILE['done'].clear()
+    PROFILE['profiler'] = cProfile.Profile()
+    PROFILE['profiler'].enable()
+    signal.setitimer(signal.ITIMER_REAL, PROFILE_SECONDS)
+    PROFILE['request'].set()
+
+def handle_profile_alarm(signum, frame):
+    """End the main thread's tracing when the profile's time is up."""
+    if PROFILE['profiler'] is not None:
+        PROFILE['profiler'].disable()
+    PROFILE['done'].set()
+
+def run_profiler(request):
+    """Capture a profile whenever one is requested; runs on the profiler thread."""
+    while True:
+        request.wait()
+        request.clear()
+        try:
+            capture_profile(PROFILE['profiler'], PROFILE['done'], PROFILE_SECONDS)
+        except Exception as e:
+            log_message(f"Profiling failed: {e!r}")
+        PROFILE['profiler'] = None
+
+def sample_stacks(stop_event, seconds, interval=None):
+    """Sample the stacks of all other threads until stop_event is set or seconds pass.
+
+    Returns {collapsed stack: samples}, where a collapsed stack is the thread
+    name followed by "function (file:line)" frames, outermost first, joined by ';'.
+    """
+    interval = PROFILE_SAMPLE_INTERVAL if interval is None else interval
+    own = threading.get_ident()
+    stacks = {}
+    deadline = time.monotonic() + seconds
+    while not stop_event.wait(interval) and time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            stack = ";".join(reversed(frames))
+            stacks[stack] = stacks.get(stack, 0) + 1
+    return stacks
+
+def capture_profile(profiler, done, seconds):
+    """Sample, then write the profile to LOG_DIR; return the path prefix of the files written.
+
+    profile-<time>.pstats     - cProfile of the monitor loop (pstats / snakeviz)
+    profile-<time>.collapsed  - sampled stacks of the other threads (flamegraph.pl, speedscope)
+    profile-<time>.tracemalloc - allocations made during the profile (tracemalloc.Snapshot.load)
+    """
+    import tracemalloc
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+    log_message(f"Profiling the daemon for {seconds:.0f} seconds.")
+    try:
+        stacks = sample_stacks(done, seconds)
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    prefix = os.path.join(LOG_DIR, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    if profiler is not None and done.wait(5):
+        profiler.dump_stats(f"{prefix}.pstats")
+    else:
+        log_message("The monitor loop's cProfile did not stop in time; writing sampled stacks only.")
+    with open(f"{prefix}.collapsed", "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+    snapshot.dump(f"{prefix}.tracemalloc")
+    prune_profiles()
+    increment_metric("profiles_total")
+
+    top = snapshot.statistics('lineno')[:3]
+    allocations = ", ".join(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size / 1024:.0f} KiB"
+                            for stat in top)
+    log_message(f"Profile written to {prefix}.* ({sum(stacks.values())} stack samples). "
+                f"Largest allocations: {allocations or 'none'}.")
+    return prefix
+
+def prune_profiles(keep=None):
+    """Remove all but the newest `keep` profiles from LOG_DIR."""
+    keep = PROFILE_KEEP if keep is None else keep
+    try:
+        names = [name for name in os.listdir(LOG_DIR) if name.startswith("profile-")]
+    except OSError:
+        return
+    stems = sorted({name.split(".")[0] for name in names}, reverse=True)
+    for name in names:
+        if name.split(".")[0] not in stems[:keep]:
+            try:
+                os.remove(os.path.join(LOG_DIR, name))
+            except OSError as e:
+                log_message(f"Failed to remove old profile {name}: {e}")
+
+def request_daemon_profile():
+    """Ask the running daemon to profile itself (SIGUSR1); return True if it was signalled."""
+    import signal
+    try:
+        import fcntl
+    except ImportError:
+        print("ERROR: Profiling a running daemon is not supported on this platform.")
+        return False
+    try:
+        with open(PIDFILE_PATH) as pidfile:
+            try:
+                # If we can get a shared lock, no daemon holds the exclusive one
+                fcntl.flock(pidfile.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                print("ERROR: The HECNET daemon is not running.")
+                return False
+            except OSError:
+                pass
+            pid = int(pidfile.read().strip())
+        os.kill(pid, signal.SIGUSR1)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not signal the HECNET daemon: {e}")
+        return False
+    print(f"Profiling the HECNET daemon (PID: {pid}) for {PROFILE_SECONDS:.0f} seconds; "
+          f"the results will be written to {LOG_DIR}/profile-*.")
+    return True
+
+# Function to run a single monitoring cycle
+def new_monitor_state(instance=None):
+    """Create all state carried from one monitoring cycle of an instance to the next."""
+    instance = instance or default_instance()
+    links = {target: new_link_state() for target in instance['targets']}
+    return {
+        'instance': instance,
+        'link': links[instance['targets'][0]],  # The primary target, reported to systemd
+        'links': links,  # target -> link state
+        'restart': new_restart_state(),
+        'quality': {},  # target -> True while the link is degraded
+        'routes': {},   # target -> route tracking state
+        'sweep': {'snapshot': None},
+        'counters': new_counter_state(),
+        'schedule': new_job_schedule(instance),
+        'jobs': {},     # name -> Future of a background probe
+        'telemetry': new_telemetry_state(),
+    }
+
+def monitor_cycle(state):
+    """Check one PyDECNET instance and its DECNET links once; return True if every link is up."""
+    instance = state['instance']
+    who = instance_label(instance)
+    link_state = state['link']
+    restart_state = state['restart']
+    log_message(f"Monitoring {who} process.")
+    pids = find_instance_pids(instance)
+    if not pids:
+        log_message(f"{who} is off. Restarting!")
+        supervise_restart(restart_state, instance)
     else:
-        if NAME_UPDATE_INTERVAL > 0:
-            last_update = get_last_name_update_time()
-            next_update_time = last_update + timedelta(minutes=NAME_UPDATE_INTERVAL)
-            time_until_next = next_update_time - datetime.now()
-            hours_until_next = time_until_next.total_seconds() / 3600
-            if hours_until_next > 0:
-                log_message(f"Next automatic name update in {hours_until_next:.1f} hours")
+        log_message(f"{who} process is running.")
+        record_pydecnet_running(restart_state, instance)
+        sample_pydecnet_resources(state['telemetry'], pids[0], instance)
+        check_resource_trends(state['telemetry'], link_state, instance)
+
+    up_targets = []
+    for target in instance['targets']:
+        is_up, output, node_state = check_decnet_link(target, instance)
+        update_link_state(state['links'][target], is_up, output, target)
+        set_metric(instance_metric(f'link_up{{target="{target}"}}', instance), int(is_up))
+        if node_state.hops is not None:
+            set_metric(instance_metric(f'route_hops{{target="{target}"}}', instance), node_state.hops)
+        if node_state.cost is not None:
+            set_metric(instance_metric(f'route_cost{{target="{target}"}}', instance), node_state.cost)
+        change = track_route(state['routes'], target, node_state)
+        if change:
+            report_route_change(state['routes'], target, *change, instance=instance)
+        if is_up:
+            up_targets.append(target)
+    set_metric(instance_metric("pydecnet_restart_budget_tokens", instance), round(restart_state['tokens'], 2))
+    set_metric(instance_metric("pydecnet_crash_loop", instance), int(restart_state['crash_loop']))
+
+    # Measure RTT and loss while the links are reachable, and sweep all nodes when due,
+    # in the background so they don't delay the next link check
+    collect_background_probes(state['jobs'])
+    if LOOP_COUNT > 0:
+        for target in up_targets:
+            submit_background_probe(state['jobs'], f'quality {target}', run_link_quality_probe,
+                                    state['quality'], target, instance)
+    due = pop_due_jobs(state['schedule'])
+    if 'counters' in due:
+        submit_scheduled_job(state, 'counters', collect_counters, state['counters'], instance)
+    if 'sweep' in due:
+        submit_scheduled_job(state, 'sweep', sweep_known_nodes, state['sweep'], instance)
+    if 'log rotation' in due:
+        rotate_status_log()
+        finish_job(state['schedule'], 'log rotation', True)
+    if 'names' in due:
+        if defer_name_update(state['schedule']):
+            log_message("Names were updated by hand since; automatic name update postponed.")
+        else:
+            # A name update fetches and compiles the whole node list, which can outlast the watchdog
+            log_message("Automatic name update due.")
+            submit_scheduled_job(state, 'names', update_decnet_names)
+    return len(up_targets) == len(instance['targets'])
+
+def run_monitor_cycles(states):
+    """Run the monitoring cycle of every instance; return their results in the same order.
+
+    Several instances are checked side by side on INSTANCE_POOL, so a slow probe
+    or restart of one does not delay the others. An error in a cycle is logged
+    and counted, and the loop carries on, whether there is one instance or more.
+    """
+    global INSTANCE_POOL
+    if len(states) == 1:
+        return [guarded_monitor_cycle(states[0])]
+    if INSTANCE_POOL is None:
+        from concurrent.futures import ThreadPoolExecutor
+        INSTANCE_POOL = ThreadPoolExecutor(max_workers=len(states), thread_name_prefix="instance")
+    futures = [INSTANCE_POOL.submit(guarded_monitor_cycle, state) for state in states]
+    return [future.result() for future in futures]
+
+def guarded_monitor_cycle(state):
+    """Run one instance's monitoring cycle; log and count an error and report the instance as down."""
+    try:
+        return monitor_cycle(state)
+    except Exception as e:
+        log_message(f"Monitoring cycle of {instance_label(state['instance'])} failed: {e!r}")
+        increment_metric(instance_metric("monitor_cycle_errors_total", state['instance']))
+        return False
+
+def next_cycle_interval(states):
+    """Return the shortest probe interval wanted by any link, shortened to when the next job is due."""
+    import decnet_scheduler
+    interval = min(next_probe_interval(link_state['last_result'], link_state['streak'])
+                   for state in states for link_state in state['links'].values())
+    now = time.monotonic()
+    for state in states:
+        until_job = decnet_scheduler.seconds_until_next(state['schedule'], now)
+        if until_job is not None:
+            interval = min(interval, max(until_job, 1))
+    return interval
+
+# Function to send a systemd notification
+def sd_notify(message):
+    """Send a notification such as READY=1 to systemd over $NOTIFY_SOCKET.
+
+    Does nothing (and returns False) when not started by systemd with
+    Type=notify. Abstract socket addresses ('@...') are supported.
+    """
+    import socket
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    if address.startswith('@'):
+        address = '\0' + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(message.encode('utf-8'))
+        return True
+    except OSError as e:
+        log_message(f"Failed to notify systemd: {e}")
+        return False
+
+def watchdog_interval():
+    """Return the systemd watchdog timeout in seconds, or None if the watchdog is off."""
+    usec = os.environ.get('WATCHDOG_USEC')
+    pid = os.environ.get('WATCHDOG_PID')
+    if not usec or (pid and pid != str(os.getpid())):
+        return None
+    try:
+        return int(usec) / 1000000
+    except ValueError:
+        return None
+
+def format_daemon_status(link_state, restart_state, target=None):
+    """Summarize the daemon's own state for systemd's STATUS= field."""
+    if link_state['confirmed_up'] is None:
+        link = "unknown"
+    else:
+        link = "up" if link_state['confirmed_up'] else "down"
+    last_probe = "up" if link_state['last_result'] else "failed"
+    status = (f"Link to {target or TARGET_HOST} {link} (last probe {last_probe}), "
+              f"PyDECNET restarts: {restart_state['total_restarts']}")
+    if restart_state['crash_loop']:
+        status += ", crash-looping"
+    return status
+
+def format_supervisor_status(states):
+    """Summarize every instance for systemd's STATUS= field."""
+    if len(states) == 1:
+        state = states[0]
+        return format_daemon_status(state['link'], state['restart'], state['instance']['targets'][0])
+    return "; ".join(f"{state['instance']['name']}: "
+                     f"{format_daemon_status(state['link'], state['restart'], state['instance']['targets'][0])}"
+                     for state in states)
+
+def sleep_with_watchdog(interval):
+    """Sleep for interval seconds, pinging the systemd watchdog often enough to keep it fed.
+
+    Only called after a monitoring cycle completed, so the pings during the
+    wait still reflect a healthy loop; a hung cycle stops the pings.
+    """
+    watchdog = watchdog_interval()
+    deadline = time.monotonic() + interval
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if wait_for_wake(min(remaining, watchdog / 2) if watchdog else remaining):
+            log_message("PyDECNET logged a problem; checking now.")
+            break
+        if watchdog:
+            sd_notify("WATCHDOG=1")
+
+def wait_for_wake(seconds):
+    """Sleep for up to seconds; return True early if the log follower asked for a check."""
+    if WAKE_EVENT is None:
+        time.sleep(seconds)
+        return False
+    woken = WAKE_EVENT.wait(seconds)
+    WAKE_EVENT.clear()
+    return woken
 
 # Function to monitor the DECNET process
 def monitor_process():
+    instances = get_instances()
+    states = [new_monitor_state(instance) for instance in instances]
+    start_log_follower(instances)
+    sd_notify("READY=1\nSTATUS=Starting first monitoring cycle")
     while True:
-        log_message("Monitoring PyDECNET process.")
-        if not any(proc.info['name'] == 'pydecnet' for proc in psutil.process_iter(['name'])):
-            log_message("DECNET is off. Restarting!")
-            restart_pydecnet()
-        else:
-            log_message("DECNET process is running.")
-        
-        check_decnet_link()
-        
-        # Check if automatic name update is needed
-        check_and_update_names_if_needed()
-        
-        log_message(f"Checking again in {SLEEP_TIME} seconds.")
-        time.sleep(SLEEP_TIME)
+        run_monitor_cycles(states)
+        interval = next_cycle_interval(states)
+        write_metrics()
+        sd_notify(f"WATCHDOG=1\nSTATUS={format_supervisor_status(states)}")
+        log_message(f"Checking again in {interval:.0f} seconds.")
+        sleep_with_watchdog(interval)
 
 # Daemon entry point
 def daemon_main():
     log_message("Daemon started. Monitoring DECNET.")
-    monitor_process()
+    install_profile_handler()
+    try:
+        monitor_process()
+    finally:
+        sd_notify("STOPPING=1")
+
+# Function to make sure only one daemon monitors this installation
+def acquire_instance_lock():
+    """Take an exclusive lock on PIDFILE_PATH and write our PID to it.
+
+    Exits with an error naming the holder's PID if another daemon already has
+    the lock. The returned file must stay open for as long as the daemon runs;
+    the lock is released automatically when the process exits.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        log_message("Single-instance locking is not supported on this platform.")
+        return None
+    lock_file = open(PIDFILE_PATH, "a+")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.seek(0)
+        holder = lock_file.read().strip() or "unknown"
+        lock_file.close()
+        print(f"ERROR: Another HECNET daemon is already running (PID: {holder}).")
+        print(f"Lock file: {PIDFILE_PATH}")
+        sys.exit(1)
+    write_pidfile(lock_file)
+    return lock_file
+
+def write_pidfile(lock_file):
+    """Replace the contents of the locked pidfile with the current PID."""
+    if lock_file is None:
+        return
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
 
 # Main function to handle command-line arguments
 def main():
-    # Validate configuration before proceeding
-    validate_configuration()
-    
     parser = argparse.ArgumentParser(description="DECNET Management Script")
     parser.add_argument("--relaunch", action="store_true", help="Restart the PyDECNET process.")
+    parser.add_argument("--instance", metavar="NAME",
+                        help="With --relaunch, restart only this PyDECNET instance (default: all of them).")
     parser.add_argument("--update-names", action="store_true", help="Update DECNET node names from HECnet.")
-    parser.add_argument("--version", action="store_true", version=DAEMON_VERSION)
+    parser.add_argument("--profile", action="store_true",
+                        help="Make the running daemon profile itself and write the results to the log directory.")
+    parser.add_argument("--foreground", action="store_true",
+                        help="Run the monitor in the foreground (for systemd Type=notify) instead of daemonizing.")
+    parser.add_argument("--version", action="store_true", help="Show the daemon version and exit.")
     args = parser.parse_args()
     if args.version:
         print(f"HECNET Daemon Version: {DAEMON_VERSION}")
         sys.exit(0)
+
+    # Create directories and validate configuration before proceeding
+    ensure_directories()
+    validate_configuration()
+
     if args.relaunch:
-        restart_pydecnet()
+        instances = get_instances()
+        if args.instance:
+            instances = [instance for instance in instances if instance['name'] == args.instance]
+            if not instances:
+                print(f"ERROR: Unknown PyDECNET instance '{args.instance}'.")
+                sys.exit(1)
+        for instance in instances:
+            restart_pydecnet(instance)
+        write_metrics()
     elif args.update_names:
-        update_decnet_names()
+        if update_decnet_names():
+            record_manual_name_update()
+    elif args.profile:
+        if not request_daemon_profile():
+            sys.exit(1)
+    elif args.foreground:
+        # Stay attached so systemd (or another process manager) can track the daemon
+        lock_file = acquire_instance_lock()
+        daemon_main()
     else:
-        # Start the daemon
-        with daemon.DaemonContext():
+        # Take the lock before forking so a second instance fails fast in the foreground
+        lock_file = acquire_instance_lock()
+        import daemon
+        preserve = [lock_file] if lock_file is not None else []
+        with daemon.DaemonContext(files_preserve=preserve):
+            # The daemonized process has a new PID
+            write_pidfile(lock_file)
             daemon_main()
 
 if __name__ == "__main__":
@@ -10,8 +10,11 @@ Based on the original hecnetupd.sh script by Supratim Sanyal.
 Converted to Python for better integration with the HECNET daemon project.
 """
 
+import argparse
+import json
 import os
 import sys
+import time
 import urllib.request
 import urllib.error
 import re
@@ -19,6 +22,9 @@ import socket
 from datetime import datetime
 from pathlib import Path
 
+import decnet_nodedb
+import decnet_sweep
+
 def get_script_directory():
     """Get the directory where this script is located."""
     return os.path.dirname(os.path.abspath(__file__))
@@ -58,7 +64,12 @@ def get_output_directory():
         print(f"Warning: Could not create {local_bin_dir}, using home directory")
         return home_dir
 
-def download_node_list(url="http://mim.stupi.net/hecnod", timeout=30):
+DEFAULT_NODE_LIST_URL = "http://mim.stupi.net/hecnod"
+NODE_ENTRY_RE = re.compile(r'^\s*\d+\.\d+\s+\([^)]+\)', re.MULTILINE)
+# A fresh list with fewer than this fraction of the cached entries is treated as truncated
+MIN_NODE_LIST_FRACTION = 0.5
+
+def download_node_list(url=DEFAULT_NODE_LIST_URL, timeout=30):
     """Download the HECnet node list from MIM."""
     print(f"Downloading HECnet node list from {url}...")
     
@@ -74,6 +85,101 @@ def download_node_list(url="http://mim.stupi.net/hecnod", timeout=30):
         print(f"Unexpected error downloading node list: {e}")
         return None
 
+def count_node_entries(content):
+    """Count the node entries in a node list without printing anything."""
+    return len(NODE_ENTRY_RE.findall(content)) if content else 0
+
+def get_node_list_urls(config):
+    """Return the node list URLs to try: hecnet_node_list_urls (comma separated) or MIM."""
+    urls = [url.strip() for url in config.get('hecnet_node_list_urls', '').split(',') if url.strip()]
+    return urls or [DEFAULT_NODE_LIST_URL]
+
+def fetch_node_list_hedged(urls, timeout=30, hedge_delay=5):
+    """Download the node list from the first mirror that answers with a usable list.
+
+    The first URL is tried alone; every hedge_delay seconds without a usable
+    answer the next mirror is started in parallel. The first response that
+    contains node entries wins; the other requests are left to time out.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    pending = {}
+    remaining = list(urls)
+    try:
+        while remaining or pending:
+            if remaining:
+                url = remaining.pop(0)
+                pending[executor.submit(download_node_list, url, timeout)] = url
+            done, _ = wait(pending, timeout=hedge_delay if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                content = future.result()
+                if count_node_entries(content):
+                    return content, url
+                if content:
+                    print(f"No node entries in the list from {url}")
+        return None, None
+    finally:
+        executor.shutdown(wait=False)
+
+def fetch_node_list(urls, timeout=30, retries=3, hedge_delay=5, backoff=10):
+    """Fetch the node list with hedged mirror requests, retrying whole rounds with exponential backoff."""
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"Retrying node list download in {delay} seconds (attempt {attempt + 1} of {retries + 1})...")
+            time.sleep(delay)
+        content, url = fetch_node_list_hedged(urls, timeout, hedge_delay)
+        if content:
+            print(f"Using node list from {url}")
+            return content
+    return None
+
+def read_cached_node_list(path):
+    """Return (content, modification time) of the last good node list, or (None, None)."""
+    try:
+        with open(path, 'r') as f:
+            return f.read(), os.path.getmtime(path)
+    except OSError:
+        return None, None
+
+def write_cached_node_list(path, content):
+    """Atomically store a good node list as the fallback for failed downloads."""
+    temp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not cache the node list at {path}: {e}")
+
+def get_node_list(config, cache_path):
+    """Return the node list to use: a fresh download if it is usable, otherwise the cached copy.
+
+    A download counts as usable when it has at least MIN_NODE_LIST_FRACTION of
+    the cached copy's entries, so a truncated answer never replaces a complete
+    list and name resolution never goes backwards after a transient failure.
+    """
+    content = fetch_node_list(get_node_list_urls(config),
+                              timeout=float(config.get('hecnet_node_list_timeout', 30)),
+                              retries=int(config.get('hecnet_node_list_retries', 3)),
+                              hedge_delay=float(config.get('hecnet_node_list_hedge_delay', 5)))
+    cached, cached_time = read_cached_node_list(cache_path)
+    cached_count = count_node_entries(cached)
+    if content and count_node_entries(content) >= cached_count * MIN_NODE_LIST_FRACTION:
+        write_cached_node_list(cache_path, content)
+        return content
+    if content:
+        print(f"Downloaded list has only {count_node_entries(content)} nodes, "
+              f"the cached copy has {cached_count}; keeping the cached copy.")
+    if cached_count:
+        age_hours = (time.time() - cached_time) / 3600
+        print(f"Using cached node list from {cache_path} ({age_hours:.1f} hours old)")
+        return cached
+    return None
+
 def parse_node_list(content):
     """Parse the downloaded node list and extract valid node entries."""
     if not content:
@@ -109,6 +215,11 @@ def parse_node_list(content):
     
     return nodes
 
+def node_sort_key(node):
+    """Sort key for an (address, name) pair: the address as one integer."""
+    area, _, number = node[0].partition('.')
+    return (int(area) << 16) + int(number)
+
 def generate_nodenames_file(nodes, output_path):
     """Generate the nodenames.conf file for PyDECNET."""
     hostname = socket.gethostname()
@@ -125,7 +236,7 @@ def generate_nodenames_file(nodes, output_path):
             f.write("node 1.13  MIM\n")
             
             # Write all discovered nodes
-            for node_addr, node_name in sorted(nodes, key=lambda x: tuple(map(int, x[0].split('.')))):
+            for node_addr, node_name in sorted(nodes, key=node_sort_key):
                 # Skip MIM since we already added it
                 if node_addr == "1.13":
                     continue
@@ -140,6 +251,131 @@ def generate_nodenames_file(nodes, output_path):
         print(f"Error writing to {output_path}: {e}")
         return False
 
+def get_node_db_path(config, output_dir=None):
+    """Return where the node directory goes: hecnet_node_db, or nodenames.db next to nodenames.conf."""
+    return config.get('hecnet_node_db') or os.path.join(output_dir or get_output_directory(), "nodenames.db")
+
+def generate_node_db(nodes, output_path):
+    """Compile the node list into the binary node directory (see decnet_nodedb) next to nodenames.conf."""
+    print(f"Generating node directory: {output_path}")
+    # MIM keeps its name, as in nodenames.conf
+    nodes = [node for node in nodes if node[0] != "1.13"] + [("1.13", "MIM")]
+    try:
+        count = decnet_nodedb.write_node_db(output_path, nodes)
+    except OSError as e:
+        print(f"Error writing to {output_path}: {e}")
+        return False
+    print(f"Successfully wrote {count} nodes to {output_path}")
+    return True
+
+def get_log_directory():
+    """Get the daemon's log directory, where it keeps the sweep snapshot and area history."""
+    return os.path.join(get_script_directory(), "hecnet", "logs")
+
+def read_nodenames_file(path):
+    """Read the (address, name) pairs from a nodenames.conf file written by generate_nodenames_file."""
+    nodes = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0] == "node":
+                    nodes.append((parts[1], parts[2]))
+    except OSError:
+        return []
+    return nodes
+
+def build_area_report(nodes, snapshot, history):
+    """Join the node list with the last sweep snapshot and the area history.
+
+    Known nodes are turned into the same address bitmap as the sweep's
+    reachability, so the join is one AND per report. Trends come from the
+    per-area counts the daemon stores after each sweep.
+    """
+    known = bytearray(decnet_sweep.BITMAP_BYTES)
+    for address, _ in nodes:
+        index = decnet_sweep.node_index(address)
+        if index is not None:
+            known[index >> 3] |= 1 << (index & 7)
+    known = int.from_bytes(known, 'little')
+    reachable = snapshot.reachable if snapshot else 0
+
+    known_counts = decnet_sweep.area_counts(known)
+    reachable_known_counts = decnet_sweep.area_counts(known & reachable)
+    reachable_counts = decnet_sweep.area_counts(reachable)
+
+    areas = []
+    for area in sorted(set(known_counts) | set(reachable_counts)):
+        series = [counts[area] for _, counts in history]
+        entry = {
+            'area': area,
+            'known': known_counts.get(area, 0),
+            'reachable': reachable_known_counts.get(area, 0),
+            'reachable_unlisted': reachable_counts.get(area, 0) - reachable_known_counts.get(area, 0),
+            'trend': None,
+        }
+        if series:
+            entry['trend'] = {
+                'min': min(series),
+                'max': max(series),
+                'average': round(sum(series) / len(series), 1),
+                'change': series[-1] - series[0],
+            }
+        areas.append(entry)
+
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'snapshot_time': datetime.fromtimestamp(snapshot.timestamp).isoformat(timespec='seconds') if snapshot else None,
+        'history_samples': len(history),
+        'history_start': datetime.fromtimestamp(history[0][0]).isoformat(timespec='seconds') if history else None,
+        'known': sum(known_counts.values()),
+        'reachable': sum(reachable_known_counts.values()),
+        'areas': areas,
+    }
+
+def print_area_report(report):
+    """Print an area report as a table."""
+    print("HECnet Area Reachability")
+    print("=" * 40)
+    print(f"Known nodes:     {report['known']}")
+    if report['snapshot_time']:
+        print(f"Reachable nodes: {report['reachable']} (sweep at {report['snapshot_time']})")
+    else:
+        print("Reachable nodes: unknown (no sweep snapshot; set hecnet_sweep_interval for the daemon)")
+    if report['history_start']:
+        print(f"Trend: {report['history_samples']} sweeps since {report['history_start']}")
+    print()
+    print(f"{'Area':>4}  {'Known':>5}  {'Reachable':>9}  {'Unlisted':>8}  {'Min':>4}  {'Max':>4}  {'Avg':>6}  {'Change':>6}")
+    for entry in report['areas']:
+        trend = entry['trend']
+        if trend:
+            trend_columns = f"{trend['min']:>4}  {trend['max']:>4}  {trend['average']:>6}  {trend['change']:>+6}"
+        else:
+            trend_columns = f"{'-':>4}  {'-':>4}  {'-':>6}  {'-':>6}"
+        print(f"{entry['area']:>4}  {entry['known']:>5}  {entry['reachable']:>9}  {entry['reachable_unlisted']:>8}  {trend_columns}")
+
+def area_report(as_json=False, hours=24):
+    """Print the area reachability report for the last `hours` hours of history."""
+    nodenames_path = os.path.join(get_output_directory(), "nodenames.conf")
+    db = decnet_nodedb.open_node_db(get_node_db_path(read_config_from_pyvenv()))
+    if db:
+        nodes = list(decnet_nodedb.iter_nodes(db))
+        decnet_nodedb.close_node_db(db)
+    else:
+        nodes = read_nodenames_file(nodenames_path)
+    if not nodes:
+        print(f"No node list found at {nodenames_path}. Run this script without --area-report first.")
+        sys.exit(1)
+    log_dir = get_log_directory()
+    snapshot = decnet_sweep.read_snapshot(os.path.join(log_dir, "known-nodes.bin"))
+    history = decnet_sweep.read_area_history(os.path.join(log_dir, "area-history.bin"),
+                                             since=time.time() - hours * 3600)
+    report = build_area_report(nodes, snapshot, history)
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_area_report(report)
+
 def validate_configuration():
     """Validate that the configuration is present (optional for this script)."""
     config = read_config_from_pyvenv()
@@ -154,6 +390,16 @@ def validate_configuration():
 
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description="HECnet node name update")
+    parser.add_argument("--area-report", action="store_true",
+                        help="Show known and reachable nodes per area instead of updating the node list")
+    parser.add_argument("--json", action="store_true", help="Print the area report as JSON")
+    parser.add_argument("--hours", type=float, default=24, help="Hours of area history used for trends (default: 24)")
+    args = parser.parse_args()
+    if args.area_report:
+        area_report(args.json, args.hours)
+        return
+
     print("DECNET Name Update Script")
     print("=" * 40)
     print("Downloading HECnet node list and generating PyDECNET configuration...")
@@ -170,10 +416,10 @@ def main():
     print(f"Output file: {output_file}")
     print()
     
-    # Download the node list
-    content = download_node_list()
+    # Download the node list, falling back to the last good copy
+    content = get_node_list(config, os.path.join(get_log_directory(), "hecnod-cache.txt"))
     if not content:
-        print("Failed to download node list. Exiting.")
+        print("Failed to download node list and no cached copy is available. Exiting.")
         sys.exit(1)
     
     # Parse the node list
@@ -188,6 +434,8 @@ def main():
     if generate_nodenames_file(nodes, output_file):
         print(f"\n✓ Successfully generated {output_file}")
         print(f"✓ Added {len(nodes)} nodes to the configuration")
+        if generate_node_db(nodes, get_node_db_path(config, output_dir)):
+            print("✓ Compiled the node directory for fast lookups")
         
         # Show some statistics
         unique_areas = set(addr.split('.')[0] for addr, _ in nodes)
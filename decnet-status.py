@@ -10,10 +10,15 @@ and if DECNET is connected to the target host.
 import os
 import sys
 import time
-import psutil
-import subprocess
+import argparse
 from datetime import datetime
 
+import decnet_ncp
+import decnet_probe_cache
+
+# psutil, subprocess and decnet_nodedb are imported inside the functions that need them so
+# that importing this script (and its cheap code paths) stays fast.
+
 def get_script_directory():
     """Get the directory where this script is located."""
     return os.path.dirname(os.path.abspath(__file__))
@@ -34,8 +39,55 @@ def read_config_from_pyvenv():
     
     return config
 
+def get_log_directory():
+    """Get the directory the daemon writes its logs, pidfile and metrics to."""
+    return os.path.join(get_script_directory(), "hecnet", "logs")
+
+def read_daemon_pidfile():
+    """Return the PID of the running daemon from its pidfile.
+
+    Returns None if no daemon holds the pidfile lock, and False if there is no
+    pidfile at all (e.g. a daemon started by an older version).
+    """
+    pidfile_path = os.path.join(get_log_directory(), "decnet-daemon.pid")
+    try:
+        pidfile = open(pidfile_path, "r")
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return None
+
+    with pidfile:
+        try:
+            import fcntl
+            try:
+                # If we can get a shared lock, no daemon holds the exclusive one
+                fcntl.flock(pidfile.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                return None
+            except OSError:
+                pass
+        except ImportError:
+            pass
+        try:
+            return int(pidfile.read().strip())
+        except ValueError:
+            return None
+
 def check_daemon_status():
     """Check if the HECNET daemon is running."""
+    import psutil
+
+    # Fast path: the daemon records its PID in a locked pidfile
+    pid = read_daemon_pidfile()
+    if pid is None:
+        return []
+    if pid is not False:
+        try:
+            return [psutil.Process(pid)]
+        except psutil.NoSuchProcess:
+            return []
+
+    # No pidfile: fall back to scanning the process table
     daemon_processes = []
     
     for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
@@ -52,6 +104,7 @@ def check_daemon_status():
 
 def check_pydecnet_status():
     """Check if PyDECNET process is running."""
+    import psutil
     pydecnet_processes = []
     
     for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
@@ -67,6 +120,7 @@ def check_pydecnet_status():
 
 def check_decnet_connectivity(target_host):
     """Check DECNET connectivity to target host."""
+    import subprocess
     try:
         # Run the ncp command to check node status
         result = subprocess.run(
@@ -78,7 +132,7 @@ def check_decnet_connectivity(target_host):
         
         if result.returncode == 0:
             output = result.stdout
-            if "Unreachable" in output:
+            if not decnet_ncp.parse_show_node(output).reachable:
                 return False, "Unreachable", output
             else:
                 return True, "Connected", output
@@ -92,15 +146,57 @@ def check_decnet_connectivity(target_host):
     except Exception as e:
         return False, "Error", str(e)
 
-def get_log_tail(log_path, lines=5):
-    """Get the last few lines from a log file."""
+def check_cached_connectivity(target_host, max_age, instance=''):
+    """Return the daemon's cached probe result for target_host, or None if it is missing or stale.
+
+    With hecnet_instances the result of the given instance is used. The result
+    has the same (is_connected, status, output) shape as
+    check_decnet_connectivity().
+    """
+    cache_path = os.path.join(get_log_directory(), "probe-cache.bin")
+    result = decnet_probe_cache.lookup_probe(cache_path, target_host, max_age=max_age, instance=instance)
+    if result is None:
+        return None
+    age = time.time() - result.timestamp
+    status = decnet_probe_cache.STATUS_NAMES.get(result.status, "Unknown")
+    status = f"{status} (probed by daemon {age:.0f}s ago in {result.latency * 1000:.0f} ms)"
+    return result.status == decnet_probe_cache.STATUS_UP, status, result.output
+
+def describe_target(target_host, config):
+    """Return the target as "MIM (1.13)" using the node directory, or just its name."""
+    default_path = os.path.join(os.path.expanduser("~"), ".local", "bin", "nodenames.db")
+    path = config.get('hecnet_node_db', default_path)
+    if not os.path.exists(path):
+        return target_host
+    import decnet_nodedb
+    db = decnet_nodedb.open_node_db(path)
+    if db is None:
+        return target_host
+    address = decnet_nodedb.lookup_address(db, target_host)
+    decnet_nodedb.close_node_db(db)
+    return f"{target_host} ({address})" if address else target_host
+
+def get_log_tail(log_path, lines=5, block_size=8192):
+    """Get the last few lines from a log file.
+
+    Reads backwards from the end in blocks, so the cost depends on the length
+    of the last lines and not on the size of the log.
+    """
     if not os.path.exists(log_path):
         return "Log file not found"
     
     try:
-        with open(log_path, 'r') as f:
-            all_lines = f.readlines()
-            return ''.join(all_lines[-lines:]).strip()
+        with open(log_path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            data = b''
+            # One newline more than requested, unless the file ends first
+            while position > 0 and data.count(b'\n') <= lines:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+            tail = data.decode('utf-8', errors='replace').splitlines()
+            return '\n'.join(tail[-lines:]).strip()
     except Exception as e:
         return f"Error reading log: {e}"
 
@@ -136,6 +232,7 @@ def print_status_header():
 
 def print_daemon_status(daemon_processes):
     """Print daemon status information."""
+    import psutil
     print("🔧 HECNET Daemon Status:")
     print("-" * 30)
     
@@ -156,6 +253,7 @@ def print_daemon_status(daemon_processes):
 
 def print_pydecnet_status(pydecnet_processes):
     """Print PyDECNET status information."""
+    import psutil
     print("🌐 PyDECNET Status:")
     print("-" * 20)
     
@@ -174,9 +272,9 @@ def print_pydecnet_status(pydecnet_processes):
     
     print()
 
-def print_connectivity_status(is_connected, status, output, target_host):
+def print_connectivity_status(is_connected, status, output, target_host, target_label=None):
     """Print DECNET connectivity status."""
-    print(f"🔗 DECNET Connectivity to {target_host}:")
+    print(f"🔗 DECNET Connectivity to {target_label or target_host}:")
     print("-" * 35)
     
     if is_connected:
@@ -186,8 +284,11 @@ def print_connectivity_status(is_connected, status, output, target_host):
     
     print(f"   Status: {status}")
     
-    # Show relevant parts of the output
-    if output and len(output) > 100:
+    # Show the parsed route if NCP reported one, otherwise relevant parts of the output
+    node_state = decnet_ncp.parse_show_node(output or "")
+    if node_state.address or node_state.hops is not None or node_state.next_node:
+        print(f"   Route: {decnet_ncp.describe_node_state(node_state)}")
+    elif output and len(output) > 100:
         print("   Output (truncated):")
         lines = output.split('\n')
         for line in lines[:3]:  # Show first 3 lines
@@ -202,9 +303,7 @@ def print_connectivity_status(is_connected, status, output, target_host):
 
 def print_log_summary():
     """Print recent log entries."""
-    script_dir = get_script_directory()
-    log_dir = os.path.join(script_dir, "hecnet", "logs")
-    status_log = os.path.join(log_dir, "decnet-status.log")
+    status_log = os.path.join(get_log_directory(), "decnet-status.log")
     
     print("📋 Recent Log Entries:")
     print("-" * 22)
@@ -239,11 +338,20 @@ def print_configuration_info(config):
 
 def main():
     """Main status checking function."""
+    parser = argparse.ArgumentParser(description="HECNET Daemon Status Report")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Probe the DECNET link now instead of using the daemon's cached result.")
+    args = parser.parse_args()
+
     print_status_header()
     
     # Read configuration
     config = read_config_from_pyvenv()
     target_host = config.get('hecnet_target_host', 'MIM')
+    cache_ttl = float(config.get('hecnet_status_cache_ttl', 180))
+    # The primary (first) instance probes the link when several are supervised
+    instances = [name.strip() for name in config.get('hecnet_instances', '').split(',') if name.strip()]
+    primary_instance = instances[0] if instances else ''
     
     # Check daemon status
     daemon_processes = check_daemon_status()
@@ -253,9 +361,13 @@ def main():
     pydecnet_processes = check_pydecnet_status()
     print_pydecnet_status(pydecnet_processes)
     
-    # Check DECNET connectivity
-    is_connected, status, output = check_decnet_connectivity(target_host)
-    print_connectivity_status(is_connected, status, output, target_host)
+    # Check DECNET connectivity, reusing the daemon's recent probe unless --fresh
+    cached = None if args.fresh else check_cached_connectivity(target_host, cache_ttl, primary_instance)
+    if cached is not None:
+        is_connected, status, output = cached
+    else:
+        is_connected, status, output = check_decnet_connectivity(target_host)
+    print_connectivity_status(is_connected, status, output, target_host, describe_target(target_host, config))
     
     # Show configuration
     print_configuration_info(config)
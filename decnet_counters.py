@@ -0,0 +1,135 @@
+"""
+DECNET Circuit Counters
+
+Turns successive readings of the circuit and line counters (as parsed by
+decnet_ncp.parse_counters) into per-interval deltas, and keeps those deltas in
+a compact time series:
+
+  * <name>.bin         - fixed-size records (timestamp, seconds covered, series id, delta)
+  * <name>-series.json - the series names ("circuit TCP-0-0 data_blocks_sent"), indexed by id
+
+A collection appends one 18 byte record per counter, so the cost per circuit
+stays constant however long the history grows. Readers walk the newest
+records backwards from the end of the file, like the area history.
+"""
+
+import json
+import os
+import struct
+
+# Seconds since the counters were zeroed; used to spot resets, not stored as a series
+ZEROED_COUNTER = 'seconds_since_last_zeroed'
+
+RECORD = struct.Struct('<dfHI')  # timestamp (epoch), seconds covered, series id, delta
+HISTORY_MAX_RECORDS = 200000  # About 3.5 MB; the oldest half is dropped beyond this
+MAX_DELTA = 2 ** 32 - 1
+
+# Series names per history file, loaded once
+_SERIES = {}
+
+def counter_deltas(previous, current):
+    """Compare two readings of one entity's counters; return ({counter: delta}, reset).
+
+    A counter that went down was zeroed (by 'zero counters' or a PyDECNET
+    restart), so everything it shows now was counted since; the same holds for
+    every counter when seconds_since_last_zeroed went down. Counters missing
+    from either reading are skipped.
+    """
+    zeroed = current.get(ZEROED_COUNTER, 0) < previous.get(ZEROED_COUNTER, 0)
+    reset = zeroed
+    deltas = {}
+    for counter, value in current.items():
+        if counter == ZEROED_COUNTER or counter not in previous:
+            continue
+        if zeroed or value < previous[counter]:
+            deltas[counter] = value
+            reset = True
+        else:
+            deltas[counter] = value - previous[counter]
+    return deltas, reset
+
+def counter_interval(previous, current, elapsed):
+    """Return the seconds the deltas cover: elapsed, or less after a reset that seconds_since_last_zeroed dates."""
+    zeroed = current.get(ZEROED_COUNTER)
+    if zeroed is not None and zeroed < previous.get(ZEROED_COUNTER, 0) and 0 < zeroed < elapsed:
+        return float(zeroed)
+    return elapsed
+
+def series_path(path):
+    """Return the path of the series index that belongs to a history file."""
+    return f"{os.path.splitext(path)[0]}-series.json"
+
+def read_series(path):
+    """Return the list of series names of a history file (index = series id)."""
+    try:
+        with open(series_path(path)) as f:
+            names = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return names if isinstance(names, list) else []
+
+def _series_ids(path, names):
+    """Map series names to ids, adding (and saving) the names that are new."""
+    series = _SERIES.get(path)
+    if series is None:
+        series = {name: index for index, name in enumerate(read_series(path))}
+        _SERIES[path] = series
+    added = False
+    for name in names:
+        if name not in series and len(series) < 65536:
+            series[name] = len(series)
+            added = True
+    if added:
+        temp_path = f"{series_path(path)}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(sorted(series, key=series.get), f)
+        os.replace(temp_path, series_path(path))
+    return series
+
+def append_counter_history(path, timestamp, samples):
+    """Append one collection to the counter history; samples is [(series name, seconds, delta)]."""
+    series = _series_ids(path, [name for name, _, _ in samples])
+    data = b''.join(RECORD.pack(timestamp, seconds, series[name], min(delta, MAX_DELTA))
+                    for name, seconds, delta in samples if name in series)
+    with open(path, 'ab') as f:
+        f.write(data)
+        size = f.tell()
+    if size > RECORD.size * HISTORY_MAX_RECORDS:
+        keep = HISTORY_MAX_RECORDS // 2
+        with open(path, 'rb') as f:
+            f.seek(-RECORD.size * keep, os.SEEK_END)
+            tail = f.read()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(tail)
+        os.replace(temp_path, path)
+
+def read_counter_history(path, since=None, series=None):
+    """Return [(timestamp, seconds, series name, delta)] of the newest records, oldest first.
+
+    Reads backwards from the end of the file and stops at the first record
+    older than `since` (epoch seconds); `series` limits the result to those names.
+    """
+    names = read_series(path)
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return []
+    records = []
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end - end % RECORD.size
+        batch = 4096 * RECORD.size
+        while position > 0:
+            start = max(position - batch, 0)
+            f.seek(start)
+            data = f.read(position - start)
+            for offset in range(len(data) - RECORD.size, -1, -RECORD.size):
+                timestamp, seconds, series_id, delta = RECORD.unpack_from(data, offset)
+                if since is not None and timestamp < since:
+                    return records[::-1]
+                name = names[series_id] if series_id < len(names) else f"series {series_id}"
+                if series is None or name in series:
+                    records.append((timestamp, seconds, name, delta))
+            position = start
+    return records[::-1]
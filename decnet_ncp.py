@@ -0,0 +1,266 @@
+"""
+DECNET NCP Output Parser
+
+Turns the text printed by 'ncp show node' into NodeState records, so the
+daemon and the status tool can look at the state, hops, cost, circuit and next
+node of a target instead of searching the output for "Unreachable".
+
+Both layouts NCP uses are understood:
+
+  * key/value lines, e.g. "State = reachable" or "Hops = 2, Cost = 5"
+  * column tables with a header row, e.g.
+
+        Node           State      Active  Delay  Type     Cost  Hops  Circuit    Next node
+                                  Links
+     1.13 (MIM)        reachable                 area        5     2  TCP-0-0    1.13 (MIM)
+
+All regular expressions are compiled once; parsing is a single pass over the
+lines of the output.
+
+Counter listings ('ncp show known circuits counters', 'ncp show known lines
+counters') are parsed by parse_counters into plain {counter: value} dicts per
+circuit or line. loop_failed recognizes the failure lines of 'ncp loop'.
+"""
+
+import re
+from collections import namedtuple
+
+NodeState = namedtuple('NodeState', [
+    'address',       # "1.13"
+    'name',          # "MIM"
+    'state',         # "reachable", "unreachable", ... (lower case)
+    'reachable',     # bool
+    'hops',          # int
+    'cost',          # int
+    'circuit',       # "TCP-0-0"
+    'next_node',     # "1.13 (MIM)"
+    'adjacency',     # Adjacent node, when NCP reports one
+    'active_links',  # int
+    'delay',         # int
+    'type',          # "area", "routing IV", ...
+])
+
+EMPTY_NODE_STATE = NodeState(None, None, None, False, None, None, None, None, None, None, None, None)
+
+# Column headers, in the form they appear in NCP tables, mapped to field names
+COLUMNS = {
+    'node': 'node',
+    'state': 'state',
+    'active': 'active_links',
+    'delay': 'delay',
+    'type': 'type',
+    'cost': 'cost',
+    'hops': 'hops',
+    'circuit': 'circuit',
+    'line': 'circuit',
+    'next node': 'next_node',
+    'adjacency': 'adjacency',
+}
+
+# Keys of "Key = value" lines mapped to field names
+KEYS = {
+    'state': 'state',
+    'node state': 'state',
+    'hops': 'hops',
+    'cost': 'cost',
+    'circuit': 'circuit',
+    'line': 'circuit',
+    'next node': 'next_node',
+    'adjacent node': 'adjacency',
+    'adjacency': 'adjacency',
+    'active links': 'active_links',
+    'delay': 'delay',
+    'type': 'type',
+    'remote node': 'node',
+    'node': 'node',
+}
+
+INT_FIELDS = ('hops', 'cost', 'active_links', 'delay')
+
+NODE_RE = re.compile(r'^(\d+\.\d+)(?:\s+\(([^)]*)\))?')
+KEY_VALUE_RE = re.compile(r'([A-Za-z][A-Za-z ]*?)\s*=\s*([^,]+)')
+HEADER_RE = re.compile(r'^\s*Node\s{2,}\S', re.IGNORECASE)
+HEADER_COLUMN_RE = re.compile(r'Next node|\S+', re.IGNORECASE)
+# A node address with its optional "(NAME)" is one token; anything else splits on whitespace
+TOKEN_RE = re.compile(r'\d+\.\d+(?:\s+\([^)]*\))?|\S+')
+DATA_LINE_RE = re.compile(r'^\s*\d+\.\d+')
+UNREACHABLE_STATES = ('unreachable', 'off')
+
+# "Circuit = TCP-0-0" starts the counters of one entity, "   1234  Data blocks sent" is one counter;
+# a latched counter is shown as ">65534"
+COUNTER_ENTITY_RE = re.compile(r'^\s*(Circuit|Line|Node)\s*=\s*(\S.*?)\s*$', re.IGNORECASE)
+COUNTER_RE = re.compile(r'^\s*(>?)(\d+)\s+([A-Za-z].*?)\s*$')
+COUNTER_NAME_RE = re.compile(r'[^a-z0-9]+')
+
+# Lines with which ncp reports a failed command, anchored at the start of a line
+# so that node names or counter descriptions containing "error" do not match
+LOOP_FAILURE_RE = re.compile(
+    r'^\s*(?:'
+    r'%NCP-[EFW]-'                                       # %NCP-F-CONNECT, Connect failed
+    r'|NCP\s*--\s*Listener response'                     # NCP -- Listener response - ...
+    r'|Loop (?:node )?test (?:failed|aborted)'
+    r'|(?:Remote )?node (?:is )?unreachable'
+    r'|Connect(?:ion)? (?:failed|refused|timed out)'
+    r'|(?:error|failed|failure|timeout|timed out)\s*[:,-]'  # Error: ..., Timeout - ...
+    r')', re.IGNORECASE | re.MULTILINE)
+
+def parse_show_node(output):
+    """Parse 'ncp show node' output into a NodeState (EMPTY_NODE_STATE if nothing was found)."""
+    fields = {}
+    columns = None
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        if columns is None and HEADER_RE.match(line):
+            columns = _column_spans(line)
+            continue
+        if columns is not None and DATA_LINE_RE.match(line):
+            if 'node' not in fields:
+                _parse_table_row(line, columns, fields)
+            continue
+        if '=' in line:
+            for match in KEY_VALUE_RE.finditer(line):
+                field = KEYS.get(match.group(1).strip().lower())
+                if field and field not in fields:
+                    fields[field] = match.group(2).strip()
+    return _build_node_state(fields, output)
+
+def parse_known_nodes(output):
+    """Parse 'ncp show known nodes' (or active nodes) output into a list of NodeState, one per node.
+
+    Every table row is one node; in the key/value layout each "Remote node ="
+    line starts a new node.
+    """
+    states = []
+    columns = None
+    fields = block = None
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        if HEADER_RE.match(line):
+            columns = _column_spans(line)
+            continue
+        if columns is not None and DATA_LINE_RE.match(line):
+            row = {}
+            _parse_table_row(line, columns, row)
+            states.append(_build_node_state(row, line))
+            continue
+        if '=' in line:
+            for match in KEY_VALUE_RE.finditer(line):
+                field = KEYS.get(match.group(1).strip().lower())
+                if field == 'node':
+                    if fields:
+                        states.append(_build_node_state(fields, "\n".join(block)))
+                    fields, block = {}, []
+                if field and fields is not None and field not in fields:
+                    fields[field] = match.group(2).strip()
+            if block is not None:
+                block.append(line)
+    if fields:
+        states.append(_build_node_state(fields, "\n".join(block)))
+    return states
+
+def parse_counters(output):
+    """Parse NCP counter listings into {(kind, name): {counter: value}}.
+
+    kind is "circuit", "line" or "node"; counter names are the descriptions in
+    snake case ("Data errors inbound, including:" -> "data_errors_inbound").
+    Latched counters (">65534") are returned one above the number shown.
+    """
+    entities = {}
+    counters = None
+    for line in output.splitlines():
+        match = COUNTER_ENTITY_RE.match(line)
+        if match:
+            counters = entities.setdefault((match.group(1).lower(), match.group(2)), {})
+            continue
+        if counters is None:
+            continue
+        match = COUNTER_RE.match(line)
+        if match:
+            latched, value, description = match.groups()
+            name = COUNTER_NAME_RE.sub('_', description.split(',')[0].lower()).strip('_')
+            counters[name] = int(value) + (1 if latched else 0)
+    return entities
+
+def loop_failed(output):
+    """Return True if 'ncp loop' output contains one of ncp's failure lines."""
+    return LOOP_FAILURE_RE.search(output) is not None
+
+def _column_spans(header):
+    """Return (start, end, field) for each header column; a column extends to the start of the next one."""
+    matches = list(HEADER_COLUMN_RE.finditer(header))
+    spans = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else 1 << 30
+        spans.append((match.start(), end, COLUMNS.get(match.group(0).lower())))
+    return spans
+
+def _parse_table_row(line, columns, fields):
+    """Assign the tokens of one table row to the header column they overlap most."""
+    values = {}
+    for token in TOKEN_RE.finditer(line):
+        start, end = token.start(), token.end()
+        best, best_overlap, best_distance = None, 0, None
+        for column_start, span_end, field in columns:
+            overlap = min(end, span_end) - max(start, column_start)
+            distance = abs(start - column_start)
+            if overlap > best_overlap or (best_overlap <= 0 and overlap <= 0 and
+                                          (best_distance is None or distance < best_distance)):
+                best, best_overlap, best_distance = field, overlap, distance
+        if best:
+            values.setdefault(best, []).append(token.group(0))
+    for field, tokens in values.items():
+        fields.setdefault(field, ' '.join(tokens))
+
+def _to_int(value):
+    """Convert an NCP number to int, or None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _build_node_state(fields, output):
+    """Turn the raw field strings into a NodeState."""
+    address = name = None
+    node = fields.get('node')
+    if node:
+        match = NODE_RE.match(node)
+        if match:
+            address, name = match.group(1), match.group(2)
+    state = fields.get('state')
+    state = state.lower() if state else None
+    if state:
+        reachable = state not in UNREACHABLE_STATES
+    else:
+        reachable = bool(output.strip()) and 'unreachable' not in output.lower()
+
+    values = {field: _to_int(fields.get(field)) for field in INT_FIELDS}
+    return NodeState(
+        address=address,
+        name=name.upper() if name else None,
+        state=state,
+        reachable=reachable,
+        circuit=fields.get('circuit'),
+        next_node=fields.get('next_node'),
+        adjacency=fields.get('adjacency'),
+        type=fields.get('type'),
+        **values
+    )
+
+def route_of(node_state):
+    """Return the (next node, cost, hops, circuit) tuple that identifies a route."""
+    return (node_state.next_node, node_state.cost, node_state.hops, node_state.circuit)
+
+def describe_node_state(node_state):
+    """Format a NodeState as a one-line human readable summary."""
+    parts = [node_state.state or ("reachable" if node_state.reachable else "unreachable")]
+    if node_state.hops is not None:
+        parts.append(f"hops {node_state.hops}")
+    if node_state.cost is not None:
+        parts.append(f"cost {node_state.cost}")
+    if node_state.circuit:
+        parts.append(f"via {node_state.circuit}")
+    if node_state.next_node:
+        parts.append(f"next node {node_state.next_node}")
+    return ", ".join(parts)
@@ -0,0 +1,144 @@
+"""
+DECNET Node Directory
+
+Compiled form of nodenames.conf, written next to it by decnet-name-update.py,
+so the daemon, decnet-status.py and other scripts can resolve node addresses
+and names without parsing the text file. The file is opened with mmap: a
+lookup only touches the pages it needs, and every process shares the same
+page-cache copy.
+
+Layout (little endian):
+
+  * header        - magic, version, name size, node count, build time (epoch)
+  * address table - 65536 slots of NAME_SIZE bytes, one per node index
+                    (area * 1024 + node, as in decnet_sweep); an empty slot is all zero
+  * name index    - one (name, node index) entry per node, sorted by name
+
+Names are stored in upper case; lookups by name are case-insensitive.
+"""
+
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import decnet_sweep
+
+MAGIC = b'HNDB'
+VERSION = 1
+NAME_SIZE = 8  # Phase IV node names have at most 6 characters
+# magic, version, name size, node count, build time
+HEADER = struct.Struct('<4sHHId')
+ENTRY = struct.Struct(f'<{NAME_SIZE}sH')
+TABLE_OFFSET = HEADER.size
+INDEX_OFFSET = TABLE_OFFSET + decnet_sweep.ADDRESS_SPACE * NAME_SIZE
+
+NodeDirectory = namedtuple('NodeDirectory', ['data', 'count', 'timestamp'])
+
+def build_node_db(nodes, timestamp=None):
+    """Build the file image for an iterable of (address, name) pairs; return (image, nodes stored).
+
+    Addresses outside 0.0-63.1023 and names longer than NAME_SIZE are left
+    out; when an address appears twice, the last name wins.
+    """
+    names = {}
+    for address, name in nodes:
+        index = decnet_sweep.node_index(address)
+        encoded = name.upper().encode('ascii', errors='replace')
+        if index is not None and encoded and len(encoded) <= NAME_SIZE:
+            names[index] = encoded
+    entries = sorted((name, index) for index, name in names.items())
+
+    image = bytearray(INDEX_OFFSET + ENTRY.size * len(entries))
+    HEADER.pack_into(image, 0, MAGIC, VERSION, NAME_SIZE, len(entries),
+                     time.time() if timestamp is None else timestamp)
+    for index, name in names.items():
+        offset = TABLE_OFFSET + index * NAME_SIZE
+        image[offset:offset + len(name)] = name
+    for position, (name, index) in enumerate(entries):
+        ENTRY.pack_into(image, INDEX_OFFSET + position * ENTRY.size, name, index)
+    return image, len(entries)
+
+def write_node_db(path, nodes, timestamp=None):
+    """Atomically write the node directory for (address, name) pairs to path; return the nodes stored."""
+    image, count = build_node_db(nodes, timestamp)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(image)
+    os.replace(temp_path, path)
+    return count
+
+def open_node_db(path):
+    """Map the node directory at path; return a NodeDirectory, or None if it is missing or invalid.
+
+    Close it with close_node_db. A directory replaced by a newer name update
+    stays readable (as the old version) until it is closed.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) >= HEADER.size:
+        magic, version, name_size, count, timestamp = HEADER.unpack_from(data, 0)
+        if (magic, version, name_size) == (MAGIC, VERSION, NAME_SIZE) and len(data) == INDEX_OFFSET + ENTRY.size * count:
+            return NodeDirectory(data, count, timestamp)
+    data.close()
+    return None
+
+def close_node_db(db):
+    """Unmap a NodeDirectory returned by open_node_db."""
+    if db is not None:
+        db.data.close()
+
+def lookup_name(db, address):
+    """Return the name of the node at a DECnet address such as "1.13", or None."""
+    index = decnet_sweep.node_index(address)
+    if index is None:
+        return None
+    return name_at(db, index)
+
+def name_at(db, index):
+    """Return the name stored for a node index, or None."""
+    offset = TABLE_OFFSET + index * NAME_SIZE
+    name = db.data[offset:offset + NAME_SIZE].rstrip(b'\0')
+    return name.decode('ascii') if name else None
+
+def lookup_address(db, name):
+    """Return the DECnet address of the node called name (any case), or None.
+
+    A binary search over the name index reads about log2(count) entries.
+    """
+    key = name.upper().encode('ascii', errors='replace')
+    if len(key) > NAME_SIZE:
+        return None
+    key = key.ljust(NAME_SIZE, b'\0')
+    low, high = 0, db.count
+    while low < high:
+        middle = (low + high) // 2
+        offset = INDEX_OFFSET + middle * ENTRY.size
+        if db.data[offset:offset + NAME_SIZE] < key:
+            low = middle + 1
+        else:
+            high = middle
+    if low < db.count:
+        entry_name, index = ENTRY.unpack_from(db.data, INDEX_OFFSET + low * ENTRY.size)
+        if entry_name == key:
+            return decnet_sweep.index_address(index)
+    return None
+
+def iter_nodes(db):
+    """Yield (address, name) for every node, in address order."""
+    entries = sorted(ENTRY.unpack_from(db.data, INDEX_OFFSET + position * ENTRY.size)[::-1]
+                     for position in range(db.count))
+    for index, name in entries:
+        yield decnet_sweep.index_address(index), name.rstrip(b'\0').decode('ascii')
+
+def known_bitmap(db):
+    """Return an int bitmap (as used by decnet_sweep) with the bit of every named node set."""
+    bitmap = bytearray(decnet_sweep.BITMAP_BYTES)
+    for position in range(db.count):
+        _, index = ENTRY.unpack_from(db.data, INDEX_OFFSET + position * ENTRY.size)
+        bitmap[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bitmap, 'little')
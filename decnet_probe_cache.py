@@ -0,0 +1,119 @@
+"""
+DECNET Probe Cache
+
+Shared cache of the daemon's most recent link probe results, so that
+decnet-status.py (and other scripts) can report connectivity without running
+their own 'ncp sho node' probe.
+
+The cache is a small fixed-layout binary file: a header followed by MAX_TARGETS
+fixed-size slots. The daemon rewrites the whole file and renames it into place,
+so readers always see a complete snapshot and can mmap it without locking.
+
+Results are keyed by (instance, target): instances supervised side by side
+may probe the same target, and each keeps its own slot. The PyDECNET of an
+installation without hecnet_instances is the instance ''.
+"""
+
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+MAGIC = b'HNPC'
+VERSION = 2
+MAX_TARGETS = 16
+NAME_SIZE = 16  # Bytes kept of instance and target names
+OUTPUT_SIZE = 2048  # Bytes of raw ncp output kept per target
+
+# magic, version, slot count, slot size
+HEADER = struct.Struct('<4sHHI')
+# instance name, target name, status, reserved, output length, timestamp (epoch), latency (seconds)
+SLOT = struct.Struct(f'<{NAME_SIZE}s{NAME_SIZE}sBxHdd{OUTPUT_SIZE}s')
+
+STATUS_EMPTY = 0
+STATUS_UP = 1
+STATUS_DOWN = 2
+STATUS_TIMEOUT = 3
+STATUS_ERROR = 4
+
+STATUS_NAMES = {
+    STATUS_UP: "Connected",
+    STATUS_DOWN: "Unreachable",
+    STATUS_TIMEOUT: "Timeout",
+    STATUS_ERROR: "Error",
+}
+
+ProbeResult = namedtuple('ProbeResult', ['target', 'status', 'output', 'latency', 'timestamp', 'instance'])
+
+def make_probe_result(target, status, output, latency, timestamp=None, instance=''):
+    """Create a ProbeResult, stamping it with the current time by default."""
+    return ProbeResult(target.upper(), status, output, latency,
+                       time.time() if timestamp is None else timestamp, instance or '')
+
+def probe_key(target, instance=''):
+    """Return the (instance, target) key of a probe result."""
+    return instance or '', target.upper()
+
+def write_probe_cache(path, results):
+    """Atomically write an iterable of ProbeResult records to path.
+
+    Only the first MAX_TARGETS results fit; returns how many were left out.
+    """
+    results = list(results)
+    dropped = max(len(results) - MAX_TARGETS, 0)
+    results = results[:MAX_TARGETS]
+    image = bytearray(HEADER.size + SLOT.size * MAX_TARGETS)
+    HEADER.pack_into(image, 0, MAGIC, VERSION, MAX_TARGETS, SLOT.size)
+    for index, result in enumerate(results):
+        output = result.output.encode('utf-8', errors='replace')[:OUTPUT_SIZE]
+        SLOT.pack_into(image, HEADER.size + index * SLOT.size,
+                       result.instance.encode('ascii', errors='replace')[:NAME_SIZE],
+                       result.target.upper().encode('ascii', errors='replace')[:NAME_SIZE],
+                       result.status, len(output), result.timestamp, result.latency, output)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(image)
+    os.replace(temp_path, path)
+    return dropped
+
+def read_probe_cache(path):
+    """Return {(instance, target): ProbeResult} from the cache at path ({} if missing or invalid)."""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _decode(data)
+    except (OSError, ValueError, struct.error):
+        return {}
+
+def _decode(data):
+    """Decode a cache image into {(instance, target): ProbeResult}."""
+    if len(data) < HEADER.size:
+        return {}
+    magic, version, count, slot_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or slot_size != SLOT.size:
+        return {}
+
+    results = {}
+    for index in range(count):
+        offset = HEADER.size + index * SLOT.size
+        if offset + SLOT.size > len(data):
+            break
+        instance, name, status, length, timestamp, latency, output = SLOT.unpack_from(data, offset)
+        if status == STATUS_EMPTY:
+            continue
+        instance = instance.rstrip(b'\0').decode('ascii', errors='replace')
+        target = name.rstrip(b'\0').decode('ascii', errors='replace')
+        results[(instance, target)] = ProbeResult(target, status, output[:length].decode('utf-8', errors='replace'),
+                                                  latency, timestamp, instance)
+    return results
+
+def lookup_probe(path, target, max_age=None, instance=''):
+    """Return the cached ProbeResult of instance for target, or None if absent or older than max_age seconds."""
+    result = read_probe_cache(path).get(probe_key(target, instance))
+    if result is None:
+        return None
+    if max_age is not None and time.time() - result.timestamp > max_age:
+        return None
+    return result
@@ -0,0 +1,130 @@
+"""
+DECNET Job Scheduler
+
+Keeps the daemon's periodic jobs (name updates, known nodes sweeps, counter
+collection, log rotation) in one heap ordered by next run time. A monitoring
+cycle pops the jobs that are due instead of every job checking its own
+timestamp on every cycle, and the monitor loop can sleep until the next one.
+
+Next run times are time.monotonic() values, so a wall clock jump neither fires
+a job early nor holds it back. Popping a due job only schedules its next run;
+the job itself records its run with record_run() once it succeeded, or asks
+for an earlier retry with retry_job() when it failed. Only the wall-clock time
+of each job's last successful run is persisted, atomically, so the schedule
+survives a daemon restart:
+
+  {"names": {"last_run": 1760860800.0, "runs": 12}, ...}
+
+When a job missed runs while the daemon was down, its catch-up policy decides
+what happens at startup: CATCH_UP_ONCE runs it once right away (however many
+runs were missed), CATCH_UP_SKIP waits for the next slot of its old schedule.
+"""
+
+import heapq
+import json
+import os
+import random
+
+CATCH_UP_ONCE = 'once'
+CATCH_UP_SKIP = 'skip'
+
+def load_scheduler(path):
+    """Create a scheduler persisted at path, with the last runs recorded there."""
+    try:
+        with open(path) as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        records = {}
+    return {
+        'path': path,
+        'records': records if isinstance(records, dict) else {},  # name -> {'last_run': epoch, 'runs': n}
+        'jobs': {},  # name -> job
+        'heap': [],  # (monotonic next run, name); entries of re-registered jobs go stale
+    }
+
+def save_scheduler(scheduler):
+    """Atomically write the last run of every job to the scheduler's path."""
+    temp_path = f"{scheduler['path']}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(scheduler['records'], f, indent=1, sort_keys=True)
+    os.replace(temp_path, scheduler['path'])
+
+def jittered(interval, jitter):
+    """Return interval spread by up to +/- jitter (a fraction of it)."""
+    return interval * (1 + random.uniform(-jitter, jitter)) if jitter else interval
+
+def register_job(scheduler, name, interval, now, wall, jitter=0.0, catch_up=CATCH_UP_ONCE):
+    """Run job `name` every interval seconds; return the seconds until its first run.
+
+    now is time.monotonic() and wall is time.time(); the first run follows from
+    the last run on record and the catch-up policy. Returns None (and schedules
+    nothing) when interval <= 0, which disables the job.
+    """
+    if interval <= 0:
+        return None
+    last_run = scheduler['records'].get(name, {}).get('last_run')
+    if not isinstance(last_run, (int, float)):
+        delay = 0.0
+    else:
+        elapsed = max(wall - last_run, 0)  # A last run in the future means the clock went back
+        if elapsed < interval:
+            delay = interval - elapsed
+        elif catch_up == CATCH_UP_SKIP:
+            delay = interval - elapsed % interval
+        else:
+            delay = 0.0
+    job = {'name': name, 'interval': interval, 'jitter': jitter, 'next_run': now + delay}
+    scheduler['jobs'][name] = job
+    heapq.heappush(scheduler['heap'], (job['next_run'], name))
+    return delay
+
+def _is_current(scheduler, entry):
+    """Return True if a heap entry is the job's current next run."""
+    job = scheduler['jobs'].get(entry[1])
+    return job is not None and job['next_run'] == entry[0]
+
+def pop_due_jobs(scheduler, now):
+    """Return the names of the jobs due at now, earliest first, and schedule their next runs.
+
+    The next run is one (jittered) interval after now, so a late cycle does
+    not make a job run several times in a row. Nothing is recorded as run.
+    """
+    heap = scheduler['heap']
+    due = []
+    while heap and heap[0][0] <= now:
+        entry = heapq.heappop(heap)
+        if not _is_current(scheduler, entry):
+            continue
+        job = scheduler['jobs'][entry[1]]
+        job['next_run'] = now + jittered(job['interval'], job['jitter'])
+        heapq.heappush(heap, (job['next_run'], job['name']))
+        due.append(job['name'])
+    return due
+
+def record_run(scheduler, name, wall):
+    """Record that job `name` ran successfully at wall (time.time()); save the scheduler afterwards."""
+    record = scheduler['records'].setdefault(name, {})
+    record['last_run'] = wall
+    record['runs'] = record.get('runs', 0) + 1
+
+def retry_job(scheduler, name, delay, now):
+    """Run job `name` again delay seconds after now, unless it is due sooner anyway."""
+    job = scheduler['jobs'].get(name)
+    if job is None or job['next_run'] <= now + delay:
+        return
+    job['next_run'] = now + delay
+    heapq.heappush(scheduler['heap'], (job['next_run'], name))
+
+def seconds_until_next(scheduler, now):
+    """Return the seconds until the next job is due (0 when one is overdue), or None without jobs."""
+    heap = scheduler['heap']
+    while heap and not _is_current(scheduler, heap[0]):
+        heapq.heappop(heap)
+    if not heap:
+        return None
+    return max(heap[0][0] - now, 0.0)
+
+def seconds_until(scheduler, name, now):
+    """Return the seconds until job `name` is due, or None if it is not scheduled."""
+    job = scheduler['jobs'].get(name)
+    return None if job is None else max(job['next_run'] - now, 0.0)
@@ -0,0 +1,221 @@
+"""
+DECNET Known Nodes Sweep
+
+Turns the output of one bulk 'ncp show known nodes' query into a snapshot of
+the whole network, indexed by DECnet address (area * 1024 + node number):
+
+  * reachable - an int used as a 64k-bit bitmap, bit N set when node N is reachable
+  * hops      - array('B') of hop counts, 0 when unknown
+  * cost      - array('H') of path costs, 0 when unknown
+
+Two snapshots are compared with whole-bitmap operations (XOR, AND NOT) and
+C-level comparisons of the hops/cost arrays, so only the nodes that actually
+changed are visited in Python. Snapshots are saved to a small binary file
+that other scripts can read.
+"""
+
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+MAX_AREA = 63
+NODES_PER_AREA = 1024
+ADDRESS_SPACE = (MAX_AREA + 1) * NODES_PER_AREA  # 65536 addresses
+BITMAP_BYTES = ADDRESS_SPACE // 8
+AREA_BITMAP_BYTES = NODES_PER_AREA // 8
+CHUNK_BYTES = 1024  # Block size used when comparing the hops and cost arrays
+
+MAGIC = b'HNKS'
+VERSION = 1
+# magic, version, reserved, timestamp (epoch), reachable count
+HEADER = struct.Struct('<4sHHdI')
+
+NodeSnapshot = namedtuple('NodeSnapshot', ['reachable', 'hops', 'cost', 'names', 'timestamp'])
+SnapshotDiff = namedtuple('SnapshotDiff', ['came_up', 'went_down', 'route_changed'])
+
+def node_index(address):
+    """Convert a DECnet address such as "1.13" into its index (area * 1024 + node), or None."""
+    area, _, number = address.partition('.')
+    try:
+        area, number = int(area), int(number)
+    except ValueError:
+        return None
+    if not 0 <= area <= MAX_AREA or not 0 <= number < NODES_PER_AREA:
+        return None
+    return area * NODES_PER_AREA + number
+
+def index_address(index):
+    """Convert a node index back into a DECnet address string."""
+    return f"{index // NODES_PER_AREA}.{index % NODES_PER_AREA}"
+
+def empty_snapshot(timestamp=None):
+    """Return a snapshot in which no node is reachable."""
+    return NodeSnapshot(0, array('B', bytes(ADDRESS_SPACE)), array('H', bytes(2 * ADDRESS_SPACE)), {},
+                        time.time() if timestamp is None else timestamp)
+
+def build_snapshot(node_states, timestamp=None):
+    """Build a NodeSnapshot from an iterable of decnet_ncp.NodeState records."""
+    snapshot = empty_snapshot(timestamp)
+    bitmap = bytearray(BITMAP_BYTES)
+    hops, cost, names = snapshot.hops, snapshot.cost, snapshot.names
+    for state in node_states:
+        if not state.address:
+            continue
+        index = node_index(state.address)
+        if index is None:
+            continue
+        if state.name:
+            names[index] = state.name
+        if not state.reachable:
+            continue
+        bitmap[index >> 3] |= 1 << (index & 7)
+        if state.hops is not None:
+            hops[index] = min(state.hops, 255)
+        if state.cost is not None:
+            cost[index] = min(state.cost, 65535)
+    return snapshot._replace(reachable=int.from_bytes(bitmap, 'little'))
+
+def iter_bits(bitmap):
+    """Yield the index of every set bit of an int bitmap, lowest first, in O(set bits)."""
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+def count_bits(bitmap):
+    """Return the number of set bits of an int bitmap."""
+    return bin(bitmap).count('1')
+
+def _changed_indexes(old, new, width):
+    """Return the indexes at which two equally sized arrays differ, as an int bitmap.
+
+    The arrays are compared in CHUNK_BYTES blocks at C speed; only blocks that
+    differ are XORed and walked bit by bit.
+    """
+    old_bytes, new_bytes = old.tobytes(), new.tobytes()
+    if old_bytes == new_bytes:
+        return 0
+    changed = 0
+    for offset in range(0, len(old_bytes), CHUNK_BYTES):
+        old_chunk = old_bytes[offset:offset + CHUNK_BYTES]
+        new_chunk = new_bytes[offset:offset + CHUNK_BYTES]
+        if old_chunk == new_chunk:
+            continue
+        difference = int.from_bytes(old_chunk, 'little') ^ int.from_bytes(new_chunk, 'little')
+        for bit in iter_bits(difference):
+            changed |= 1 << ((offset * 8 + bit) // width)
+    return changed
+
+def diff_snapshots(old, new):
+    """Compare two snapshots; return a SnapshotDiff of sorted node index lists.
+
+    route_changed lists nodes reachable in both snapshots whose hops or cost changed.
+    """
+    both = old.reachable & new.reachable
+    changed = (_changed_indexes(old.hops, new.hops, 8) | _changed_indexes(old.cost, new.cost, 16)) & both
+    return SnapshotDiff(
+        came_up=list(iter_bits(new.reachable & ~old.reachable)),
+        went_down=list(iter_bits(old.reachable & ~new.reachable)),
+        route_changed=list(iter_bits(changed)),
+    )
+
+def area_counts(bitmap):
+    """Return {area: number of set bits} for every area with at least one set bit."""
+    data = bitmap.to_bytes(BITMAP_BYTES, 'little')
+    counts = {}
+    for area in range(MAX_AREA + 1):
+        chunk = data[area * AREA_BITMAP_BYTES:(area + 1) * AREA_BITMAP_BYTES]
+        if chunk.strip(b'\0'):
+            counts[area] = count_bits(int.from_bytes(chunk, 'little'))
+    return counts
+
+def write_snapshot(path, snapshot):
+    """Atomically save a snapshot (without names) to path."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, snapshot.timestamp, count_bits(snapshot.reachable)))
+        f.write(snapshot.reachable.to_bytes(BITMAP_BYTES, 'little'))
+        f.write(snapshot.hops.tobytes())
+        cost = array('H', snapshot.cost)
+        if sys.byteorder != 'little':
+            cost.byteswap()
+        f.write(cost.tobytes())
+    os.replace(temp_path, path)
+
+def read_snapshot(path):
+    """Load a snapshot saved by write_snapshot, or None if it is missing or invalid."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    expected = HEADER.size + BITMAP_BYTES + 3 * ADDRESS_SPACE
+    if len(data) != expected:
+        return None
+    magic, version, _, timestamp, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        return None
+    offset = HEADER.size
+    reachable = int.from_bytes(data[offset:offset + BITMAP_BYTES], 'little')
+    offset += BITMAP_BYTES
+    hops = array('B', data[offset:offset + ADDRESS_SPACE])
+    offset += ADDRESS_SPACE
+    cost = array('H')
+    cost.frombytes(data[offset:])
+    if sys.byteorder != 'little':
+        cost.byteswap()
+    return NodeSnapshot(reachable, hops, cost, {}, timestamp)
+
+# Area history: one fixed-size record per sweep with the reachable node count
+# of every area, appended by the daemon. Reports read the newest records from
+# the end of the file instead of re-reading snapshots or logs.
+AREA_RECORD = struct.Struct(f'<d{MAX_AREA + 1}H')  # timestamp (epoch), reachable nodes per area
+AREA_HISTORY_MAX_RECORDS = 20000  # About 70 days of 5 minute sweeps; the oldest half is dropped beyond this
+
+def append_area_history(path, timestamp, counts):
+    """Append the per-area reachable counts of one sweep to the area history file."""
+    values = [min(counts.get(area, 0), 65535) for area in range(MAX_AREA + 1)]
+    with open(path, 'ab') as f:
+        f.write(AREA_RECORD.pack(timestamp, *values))
+        size = f.tell()
+    if size > AREA_RECORD.size * AREA_HISTORY_MAX_RECORDS:
+        keep = AREA_HISTORY_MAX_RECORDS // 2
+        with open(path, 'rb') as f:
+            f.seek(-AREA_RECORD.size * keep, os.SEEK_END)
+            tail = f.read()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(tail)
+        os.replace(temp_path, path)
+
+def read_area_history(path, since=None, limit=None):
+    """Return [(timestamp, counts tuple)] of the newest records, oldest first.
+
+    Reads backwards from the end of the file, stopping at the first record
+    older than `since` (epoch seconds) or after `limit` records.
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return []
+    records = []
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end - end % AREA_RECORD.size
+        batch = 256 * AREA_RECORD.size
+        while position > 0:
+            start = max(position - batch, 0)
+            f.seek(start)
+            data = f.read(position - start)
+            for offset in range(len(data) - AREA_RECORD.size, -1, -AREA_RECORD.size):
+                record = AREA_RECORD.unpack_from(data, offset)
+                if since is not None and record[0] < since:
+                    return records[::-1]
+                records.append((record[0], record[1:]))
+                if limit is not None and len(records) >= limit:
+                    return records[::-1]
+            position = start
+    return records[::-1]
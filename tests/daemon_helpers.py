@@ -0,0 +1,42 @@
+"""
+Helpers shared by the test scripts.
+
+Importing this module puts the repository root on sys.path, because the
+scripts import their shared modules (decnet_ncp, decnet_scheduler, ...) from
+their own directory. The test scripts import it by name, which works both
+under pytest and when a test script is run directly.
+"""
+
+import importlib.util
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+def load_script(filename, module_name):
+    """Load one of the hyphenated scripts as a module without running it."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_daemon():
+    """Load decnet-daemon.py as a module that neither logs nor sends email."""
+    module = load_script("decnet-daemon.py", "decnet_daemon")
+    module.log_message = lambda message: None
+    module.send_notification = lambda subject, body: None
+    return module
+
+def load_name_update():
+    """Load decnet-name-update.py as a module without running it."""
+    return load_script("decnet-name-update.py", "decnet_name_update")
+
+class FakeClock:
+    """Stand-in for the time module that the test advances by hand."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the area reachability report.
+Joins a node list with a sweep snapshot and the stored area history, and checks
+that the history file is read from the end and kept bounded.
+"""
+
+import os
+import tempfile
+
+from daemon_helpers import load_name_update
+
+import decnet_ncp
+import decnet_sweep
+
+def node(address, reachable=True):
+    """Build a NodeState for one node."""
+    return decnet_ncp.EMPTY_NODE_STATE._replace(address=address, reachable=reachable)
+
+def test_area_history_file():
+    """Records are read newest-first from the end and the file stays bounded."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "area-history.bin")
+        decnet_sweep.AREA_HISTORY_MAX_RECORDS = 100
+        try:
+            for sample in range(150):
+                decnet_sweep.append_area_history(path, 1000.0 + sample, {1: sample, 2: 3})
+        finally:
+            decnet_sweep.AREA_HISTORY_MAX_RECORDS = 20000
+        records = decnet_sweep.read_area_history(path)
+        print(f"Records kept: {len(records)}, first at {records[0][0]}")
+        assert 50 <= len(records) <= 100
+        assert records[-1][0] == 1149.0 and records[-1][1][1] == 149 and records[-1][1][2] == 3
+
+        recent = decnet_sweep.read_area_history(path, since=1140.0)
+        assert [timestamp for timestamp, _ in recent] == [1140.0 + i for i in range(10)]
+        assert len(decnet_sweep.read_area_history(path, limit=3)) == 3
+        assert decnet_sweep.read_area_history(os.path.join(temp_dir, "missing.bin")) == []
+
+def test_area_report_join():
+    """Per-area known and reachable counts plus trends from the history."""
+    name_update = load_name_update()
+    nodes = [("1.13", "MIM"), ("1.14", "FOO"), ("2.10", "GW"), ("7.1", "BAR")]
+    snapshot = decnet_sweep.build_snapshot([node("1.13"), node("2.10"), node("2.11"), node("7.1", reachable=False)])
+    history = [(1000.0, (0, 2, 1) + (0,) * 61), (2000.0, (0, 1, 2) + (0,) * 61)]
+    report = name_update.build_area_report(nodes, snapshot, history)
+
+    areas = {entry['area']: entry for entry in report['areas']}
+    print(f"Report: {report}")
+    assert (report['known'], report['reachable']) == (4, 2)
+    assert (areas[1]['known'], areas[1]['reachable'], areas[1]['reachable_unlisted']) == (2, 1, 0)
+    assert (areas[2]['known'], areas[2]['reachable'], areas[2]['reachable_unlisted']) == (1, 1, 1)
+    assert areas[7]['reachable'] == 0
+    assert areas[1]['trend'] == {'min': 1, 'max': 2, 'average': 1.5, 'change': -1}
+    assert areas[2]['trend']['change'] == 1
+
+    # Without a sweep the report still lists the known nodes
+    report = name_update.build_area_report(nodes, None, [])
+    assert report['snapshot_time'] is None and report['reachable'] == 0
+    assert [entry['known'] for entry in report['areas']] == [2, 1, 1]
+
+def test_read_nodenames_file():
+    """The generated nodenames.conf is read back without downloading anything."""
+    name_update = load_name_update()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nodenames.conf")
+        name_update.generate_nodenames_file([("2.10", "GW"), ("1.13", "MIM")], path)
+        assert name_update.read_nodenames_file(path) == [("1.13", "MIM"), ("2.10", "GW")]
+
+if __name__ == "__main__":
+    print("=== Area Report Test ===")
+    test_area_history_file()
+    test_area_report_join()
+    test_read_nodenames_file()
+    print("✅ Area report works")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the hot paths of the daemon and its helper scripts.
+
+Each benchmark is timed (best of several runs) and compared with the baseline
+recorded in tests/benchmark_baseline.json; a benchmark fails when it is more
+than HECNET_BENCH_TOLERANCE times (default 3) slower than its baseline, plus
+HECNET_BENCH_SLACK_MS (default 5 ms) so sub-millisecond paths don't fail on noise.
+Everything runs offline: node lists are synthetic, the multi-GB log is a
+sparse file, the process table is simulated and ncp is a local stand-in.
+
+Record new baselines after an intended change (or on new hardware) with:
+
+    python tests/test_benchmarks.py --update-baseline
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from daemon_helpers import SCRIPT_DIR, load_name_update, load_script
+
+BASELINE_PATH = os.path.join(SCRIPT_DIR, "tests", "benchmark_baseline.json")
+TOLERANCE = float(os.environ.get('HECNET_BENCH_TOLERANCE', 3.0))
+SLACK = float(os.environ.get('HECNET_BENCH_SLACK_MS', 5)) / 1000
+RUNS = int(os.environ.get('HECNET_BENCH_RUNS', 3))
+LOG_SIZE = 4 * 1024 ** 3  # Sparse, so it takes no disk space
+PROCESS_COUNT = 5000
+
+RESULTS = {}
+
+FAKE_NCP = """#!/bin/sh
+echo "Remote node = 1.13 (MIM)"
+echo "State = reachable"
+echo "Hops = 2, Cost = 5, Circuit = TCP-0-0, Next node = 1.13 (MIM)"
+"""
+
+def load_baseline():
+    """Return the recorded baselines as {name: seconds}."""
+    try:
+        with open(BASELINE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def bench(name, function, runs=RUNS):
+    """Time function (best of runs), record it and check it against its baseline."""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    RESULTS[name] = best
+
+    baseline = load_baseline().get(name)
+    if baseline is None:
+        print(f"{name}: {best * 1000:.2f} ms (no baseline)")
+        return best
+    print(f"{name}: {best * 1000:.2f} ms (baseline {baseline * 1000:.2f} ms, {best / baseline:.2f}x)")
+    assert best <= baseline * TOLERANCE + SLACK, (
+        f"{name} took {best * 1000:.2f} ms, more than {TOLERANCE}x its baseline of {baseline * 1000:.2f} ms")
+    return best
+
+def synthetic_node_list(count):
+    """Return a hecnod style node list with count nodes spread over all areas."""
+    lines = ["# HECnet node list"]
+    for index in range(count):
+        area, number = index % 63 + 1, index // 63 + 1
+        lines.append(f"{area}.{number} (N{index:05d}) Reachable")
+    return "\n".join(lines) + "\n"
+
+def test_parse_node_list():
+    """parse_node_list on 1k, 10k and 64k node lists (its per-node output discarded)."""
+    name_update = load_name_update()
+    for count in (1000, 10000, 64000):
+        content = synthetic_node_list(count)
+        def parse():
+            with contextlib.redirect_stdout(io.StringIO()):
+                nodes = name_update.parse_node_list(content)
+            assert len(nodes) == count
+        bench(f"parse_node_list_{count // 1000}k", parse, runs=1 if count > 10000 else RUNS)
+
+def test_generate_nodenames_file():
+    """Sorting and writing nodenames.conf for 64k nodes."""
+    name_update = load_name_update()
+    with contextlib.redirect_stdout(io.StringIO()):
+        nodes = name_update.parse_node_list(synthetic_node_list(64000))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nodenames.conf")
+        def generate():
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert name_update.generate_nodenames_file(nodes, path)
+        bench("generate_nodenames_file_64k", generate)
+
+def test_get_log_tail():
+    """get_log_tail on a 4 GB (sparse) status log."""
+    status = load_script("decnet-status.py", "decnet_status")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "decnet-status.log")
+        with open(path, "wb") as f:
+            f.truncate(LOG_SIZE)
+            f.seek(LOG_SIZE)
+            for index in range(100):
+                f.write(f"[2026-10-19 10:00:00] Log line {index}\n".encode())
+        def tail():
+            assert status.get_log_tail(path, 5).endswith("Log line 99")
+        bench("get_log_tail_4gb", tail)
+
+class FakeProcess:
+    """Just enough of psutil.Process for find_pydecnet_pids."""
+    def __init__(self, pid, name, cmdline, status):
+        self.info = {'pid': pid, 'name': name, 'cmdline': cmdline, 'create_time': 1000.0 + pid, 'status': status}
+
+def test_process_discovery():
+    """find_pydecnet_pids over a simulated table of thousands of processes."""
+    import psutil
+    daemon = load_script("decnet-daemon.py", "decnet_daemon")
+    daemon.log_message = lambda message: None
+    table = [FakeProcess(pid, "python3", ["/usr/bin/python3", f"/srv/worker-{pid}.py", "--serve"], psutil.STATUS_SLEEPING)
+             for pid in range(100, 100 + PROCESS_COUNT)]
+    table[PROCESS_COUNT // 2] = FakeProcess(4242, "python3", ["/usr/bin/python3", daemon.PYDECNET_BIN], psutil.STATUS_SLEEPING)
+
+    original = psutil.process_iter
+    psutil.process_iter = lambda attrs=None: iter(table)
+    try:
+        def discover():
+            assert daemon.find_pydecnet_pids() == [4242]
+        bench(f"find_pydecnet_pids_{PROCESS_COUNT}", discover)
+    finally:
+        psutil.process_iter = original
+
+def test_monitor_cycle():
+    """One monitoring cycle (process check, ncp probe, caches, metrics) with a local ncp stand-in."""
+    daemon = load_script("decnet-daemon.py", "decnet_daemon")
+    daemon.log_message = lambda message: None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bin_dir = os.path.join(temp_dir, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "ncp"), "w") as f:
+            f.write(FAKE_NCP)
+        os.chmod(os.path.join(bin_dir, "ncp"), 0o755)
+        daemon.PROBE_CACHE_PATH = os.path.join(temp_dir, "probe-cache.bin")
+        daemon.METRICS_PATH = os.path.join(temp_dir, "hecnet-daemon.prom")
+        daemon.SCHEDULE_PATH = os.path.join(temp_dir, "job-schedule.json")
+        daemon.NAME_UPDATE_INTERVAL = 0
+        daemon.find_pydecnet_pids = lambda: [os.getpid()]
+        state = daemon.new_monitor_state()
+
+        original_path = os.environ.get('PATH', '')
+        os.environ['PATH'] = bin_dir + os.pathsep + original_path
+        try:
+            def cycle():
+                assert daemon.monitor_cycle(state)
+                daemon.write_metrics()
+            bench("monitor_cycle", cycle, runs=max(RUNS, 5))
+        finally:
+            os.environ['PATH'] = original_path
+
+def update_baseline():
+    """Run every benchmark and record the results as the new baseline."""
+    global TOLERANCE
+    TOLERANCE = float('inf')
+    for test in (test_parse_node_list, test_generate_nodenames_file, test_get_log_tail,
+                 test_process_discovery, test_monitor_cycle):
+        test()
+    with open(BASELINE_PATH, "w") as f:
+        json.dump({name: round(seconds, 6) for name, seconds in sorted(RESULTS.items())}, f, indent=2)
+        f.write("\n")
+    print(f"Baseline written to {BASELINE_PATH}")
+
+if __name__ == "__main__":
+    print("=== Hot Path Benchmarks ===")
+    if "--update-baseline" in sys.argv:
+        update_baseline()
+    else:
+        test_parse_node_list()
+        test_generate_nodenames_file()
+        test_get_log_tail()
+        test_process_discovery()
+        test_monitor_cycle()
+        print("✅ All benchmarks are within their baselines")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for circuit and line counter collection.
+Parses NCP counter listings, computes deltas across counter resets, round-trips
+the compact counter history, and runs the daemon's collector against a fake
+ncp whose counters advance (and get zeroed) between readings.
+"""
+
+import os
+import tempfile
+
+from daemon_helpers import load_daemon
+
+import decnet_counters
+import decnet_ncp
+
+CIRCUIT_COUNTERS = """Known Circuit Counters as of 19-Oct-2026 10:00:00
+
+Circuit = TCP-0-0
+
+       {zeroed}  Seconds since last zeroed
+       {received}  Terminating packets received
+       1200  Originating packets sent
+          0  Terminating congestion loss
+     >65534  Transit packets received
+       {errors}  Data errors inbound, including:
+                   Block check error
+
+Circuit = ETH-0
+
+        600  Seconds since last zeroed
+         10  Terminating packets received
+"""
+
+LINE_COUNTERS = """Known Line Counters as of 19-Oct-2026 10:00:00
+
+Line = TCP-0-0
+
+       {zeroed}  Seconds since last zeroed
+          4  Remote process errors
+"""
+
+FAKE_NCP = """#!/bin/sh
+case "$3" in
+    circuits) cat "{control}/circuits" ;;
+    lines) cat "{control}/lines" ;;
+esac
+"""
+
+def test_parse_counters():
+    """Every circuit gets its own counters; descriptions become snake case names."""
+    entities = decnet_ncp.parse_counters(CIRCUIT_COUNTERS.format(zeroed=3600, received=500, errors=2))
+    assert set(entities) == {('circuit', 'TCP-0-0'), ('circuit', 'ETH-0')}
+    assert entities[('circuit', 'TCP-0-0')] == {
+        'seconds_since_last_zeroed': 3600,
+        'terminating_packets_received': 500,
+        'originating_packets_sent': 1200,
+        'terminating_congestion_loss': 0,
+        'transit_packets_received': 65535,
+        'data_errors_inbound': 2,
+    }
+    assert decnet_ncp.parse_counters(LINE_COUNTERS.format(zeroed=5)) == {
+        ('line', 'TCP-0-0'): {'seconds_since_last_zeroed': 5, 'remote_process_errors': 4}}
+    print("✅ Counter listings are parsed per circuit and line")
+
+def test_counter_deltas():
+    """Deltas are differences; a zeroed counter contributes what it counted since."""
+    previous = {'seconds_since_last_zeroed': 100, 'sent': 50, 'errors': 3}
+    assert decnet_counters.counter_deltas(previous, {'seconds_since_last_zeroed': 160, 'sent': 80, 'errors': 3}) == (
+        {'sent': 30, 'errors': 0}, False)
+    # One counter wrapped or was zeroed on its own
+    assert decnet_counters.counter_deltas(previous, {'seconds_since_last_zeroed': 160, 'sent': 20, 'errors': 4}) == (
+        {'sent': 20, 'errors': 1}, True)
+    # Everything was zeroed 10 seconds ago
+    current = {'seconds_since_last_zeroed': 10, 'sent': 70, 'errors': 5}
+    assert decnet_counters.counter_deltas(previous, current) == ({'sent': 70, 'errors': 5}, True)
+    assert decnet_counters.counter_interval(previous, current, 60) == 10
+    print("✅ Deltas handle counter resets")
+
+def test_counter_history_round_trip():
+    """Records come back oldest first, filtered by time and series."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "counters.bin")
+        decnet_counters.append_counter_history(path, 1000.0, [("circuit A sent", 60, 5), ("circuit A errors", 60, 0)])
+        decnet_counters.append_counter_history(path, 1060.0, [("circuit A sent", 60, 7), ("circuit B sent", 60, 1)])
+        assert os.path.getsize(path) == 4 * decnet_counters.RECORD.size
+        assert decnet_counters.read_series(path) == ["circuit A sent", "circuit A errors", "circuit B sent"]
+        assert decnet_counters.read_counter_history(path, series={"circuit A sent"}) == [
+            (1000.0, 60.0, "circuit A sent", 5), (1060.0, 60.0, "circuit A sent", 7)]
+        assert [record[2] for record in decnet_counters.read_counter_history(path, since=1030)] == [
+            "circuit A sent", "circuit B sent"]
+    print("✅ The counter history round-trips")
+
+def test_daemon_collects_counters():
+    """Two readings give totals and rates; a reset keeps the totals growing."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        control = os.path.join(temp_dir, "control")
+        os.makedirs(control)
+        ncp = os.path.join(temp_dir, "ncp")
+        with open(ncp, "w") as f:
+            f.write(FAKE_NCP.format(control=control))
+        os.chmod(ncp, 0o755)
+        daemon.COUNTER_HISTORY_PATH = os.path.join(temp_dir, "circuit-counters.bin")
+        instance = dict(daemon.default_instance(), ncp=[ncp])
+
+        def reading(zeroed, received, errors):
+            with open(os.path.join(control, "circuits"), "w") as f:
+                f.write(CIRCUIT_COUNTERS.format(zeroed=zeroed, received=received, errors=errors))
+            with open(os.path.join(control, "lines"), "w") as f:
+                f.write(LINE_COUNTERS.format(zeroed=zeroed))
+            return daemon.collect_counters(state, instance)
+
+        state = daemon.new_counter_state()
+        assert reading(3600, 500, 2) == 3
+        assert not os.path.exists(daemon.COUNTER_HISTORY_PATH), "the first reading has nothing to compare with"
+        assert reading(3660, 560, 5) == 3
+        assert reading(30, 40, 1) == 3  # Zeroed
+
+        received = 'circuit_counter_total{circuit="TCP-0-0",counter="terminating_packets_received"}'
+        errors = 'circuit_counter_total{circuit="TCP-0-0",counter="data_errors_inbound"}'
+        assert daemon.METRICS[received] == 60 + 40
+        assert daemon.METRICS[errors] == 3 + 1
+        assert daemon.METRICS['counter_resets_total{circuit="TCP-0-0"}'] == 1
+        assert 'circuit_counter_rate{circuit="TCP-0-0",counter="terminating_packets_received"}' in daemon.METRICS
+
+        history = decnet_counters.read_counter_history(
+            daemon.COUNTER_HISTORY_PATH, series={"circuit TCP-0-0 terminating_packets_received"})
+        assert [delta for _, _, _, delta in history] == [60, 40]
+        assert 0 < history[-1][1] <= 30
+    print("✅ The daemon collects counter deltas, totals and rates")
+
+if __name__ == "__main__":
+    print("=== Circuit Counter Collection Test ===")
+    test_parse_counters()
+    test_counter_deltas()
+    test_counter_history_round_trip()
+    test_daemon_collects_counters()
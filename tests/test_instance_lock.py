@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the daemon's single-instance lock.
+Verifies that a second daemon fails fast with the holder's PID and that the
+status tool finds the running daemon through the pidfile.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+from daemon_helpers import load_script
+
+def test_second_instance_fails_fast():
+    """Only one daemon can hold the lock; the second one names the holder."""
+    daemon = load_script("decnet-daemon.py", "decnet_daemon")
+    daemon.log_message = lambda message: None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.PIDFILE_PATH = os.path.join(temp_dir, "decnet-daemon.pid")
+        lock_file = daemon.acquire_instance_lock()
+        try:
+            with open(daemon.PIDFILE_PATH) as f:
+                assert f.read().strip() == str(os.getpid())
+
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    daemon.acquire_instance_lock()
+                raise AssertionError("Second instance was allowed to start")
+            except SystemExit as e:
+                assert e.code == 1
+            print(f"Second instance: {output.getvalue().splitlines()[0]}")
+            assert f"PID: {os.getpid()}" in output.getvalue()
+        finally:
+            lock_file.close()
+
+        # Once the first instance is gone the lock can be taken again
+        daemon.acquire_instance_lock().close()
+
+def test_status_reads_pidfile():
+    """decnet-status.py locates the daemon from the pidfile without a process scan."""
+    daemon = load_script("decnet-daemon.py", "decnet_daemon")
+    daemon.log_message = lambda message: None
+    status = load_script("decnet-status.py", "decnet_status")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        status.get_log_directory = lambda: temp_dir
+        daemon.PIDFILE_PATH = os.path.join(temp_dir, "decnet-daemon.pid")
+
+        assert status.read_daemon_pidfile() is False  # No pidfile yet
+
+        lock_file = daemon.acquire_instance_lock()
+        try:
+            assert status.read_daemon_pidfile() == os.getpid()
+            assert [proc.pid for proc in status.check_daemon_status()] == [os.getpid()]
+        finally:
+            lock_file.close()
+
+        # A leftover pidfile without a lock holder means the daemon is stopped
+        assert status.read_daemon_pidfile() is None
+        assert status.check_daemon_status() == []
+    print("✓ Status tool located the daemon through its pidfile")
+
+if __name__ == "__main__":
+    print("=== Single Instance Lock Test ===")
+    test_second_instance_fails_fast()
+    test_status_reads_pidfile()
+    print("✅ Single-instance lock works")
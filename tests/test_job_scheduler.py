@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent job scheduler.
+Checks that jobs come due in order on the monotonic clock whatever the wall
+clock does, that the last runs survive a restart with both catch-up policies,
+and that the daemon registers its jobs, carries over the old name update
+timestamp, saves the schedule only when a job ran, runs the name update off
+the monitoring cycle, retries a failed one soon and follows a manual one.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from daemon_helpers import load_daemon
+
+import decnet_scheduler
+
+WALL = 1760860800.0  # Any epoch time
+
+def test_jobs_follow_the_monotonic_clock():
+    """Jobs run in order of their next run; wall clock jumps change nothing."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scheduler = decnet_scheduler.load_scheduler(os.path.join(temp_dir, "schedule.json"))
+        assert decnet_scheduler.seconds_until_next(scheduler, 0) is None
+        assert decnet_scheduler.register_job(scheduler, 'fast', 10, 0, WALL) == 0
+        assert decnet_scheduler.register_job(scheduler, 'slow', 25, 0, WALL) == 0
+        assert decnet_scheduler.register_job(scheduler, 'off', 0, 0, WALL) is None
+
+        assert decnet_scheduler.pop_due_jobs(scheduler, 0) == ['fast', 'slow']
+        assert decnet_scheduler.seconds_until_next(scheduler, 9) == 1
+        assert decnet_scheduler.pop_due_jobs(scheduler, 10) == ['fast']
+        assert decnet_scheduler.pop_due_jobs(scheduler, 100) == ['fast', 'slow']
+        assert decnet_scheduler.seconds_until(scheduler, 'slow', 100) == 25, "a late cycle runs a job once"
+        assert scheduler['records'] == {}, "popping a job recorded it as run"
+
+        decnet_scheduler.record_run(scheduler, 'fast', WALL)
+        decnet_scheduler.record_run(scheduler, 'fast', WALL + 10)
+        assert scheduler['records']['fast'] == {'last_run': WALL + 10, 'runs': 2}
+
+        # A failed job is retried sooner, never later than it is due anyway
+        decnet_scheduler.retry_job(scheduler, 'slow', 5, 100)
+        assert decnet_scheduler.seconds_until(scheduler, 'slow', 100) == 5
+        decnet_scheduler.retry_job(scheduler, 'fast', 50, 100)
+        assert decnet_scheduler.seconds_until(scheduler, 'fast', 100) == 10
+        assert decnet_scheduler.pop_due_jobs(scheduler, 105) == ['slow']
+        assert decnet_scheduler.pop_due_jobs(scheduler, 110) == ['fast'], "the old slot of a retried job ran"
+
+        # Re-registering replaces the old schedule
+        decnet_scheduler.register_job(scheduler, 'fast', 500, 110, WALL)
+        assert decnet_scheduler.pop_due_jobs(scheduler, 120) == []
+        assert decnet_scheduler.seconds_until_next(scheduler, 120) == 10
+
+        jittered = decnet_scheduler.load_scheduler(os.path.join(temp_dir, "jitter.json"))
+        decnet_scheduler.register_job(jittered, 'job', 100, 0, WALL, jitter=0.1)
+        decnet_scheduler.pop_due_jobs(jittered, 0)
+        assert 90 <= decnet_scheduler.seconds_until(jittered, 'job', 0) <= 110
+    print("✅ Jobs follow the monotonic clock")
+
+def test_schedule_survives_restart():
+    """Last runs are persisted; missed runs are caught up once or skipped."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "schedule.json")
+        scheduler = decnet_scheduler.load_scheduler(path)
+        decnet_scheduler.register_job(scheduler, 'names', 3600, 0, WALL)
+        assert decnet_scheduler.pop_due_jobs(scheduler, 0) == ['names']
+        decnet_scheduler.record_run(scheduler, 'names', WALL)
+        decnet_scheduler.save_scheduler(scheduler)
+        assert not os.path.exists(path + ".tmp")
+        with open(path) as f:
+            assert json.load(f) == {'names': {'last_run': WALL, 'runs': 1}}
+
+        def restart(wall, catch_up=decnet_scheduler.CATCH_UP_ONCE):
+            restarted = decnet_scheduler.load_scheduler(path)
+            return decnet_scheduler.register_job(restarted, 'names', 3600, 5000, wall, catch_up=catch_up)
+
+        assert restart(WALL + 600) == 3000, "a restart keeps the schedule"
+        assert restart(WALL + 3 * 3600 + 600) == 0, "missed runs are caught up once"
+        assert restart(WALL + 3 * 3600 + 600, decnet_scheduler.CATCH_UP_SKIP) == 3000
+        assert restart(WALL - 600) == 3600, "a clock set back waits one interval"
+
+        with open(path, "w") as f:
+            f.write("not json")
+        assert decnet_scheduler.load_scheduler(path)['records'] == {}
+    print("✅ The schedule survives a restart")
+
+def test_daemon_schedules_its_jobs():
+    """The primary instance registers its jobs, imports the old timestamp and saves after runs."""
+    daemon = load_daemon()
+    updates = []
+    daemon.update_decnet_names = lambda: updates.append(True)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.SCHEDULE_PATH = os.path.join(temp_dir, "job-schedule.json")
+        daemon.NAME_UPDATE_TIMESTAMP_FILE = os.path.join(temp_dir, "last_name_update.txt")
+        daemon.STATUS_LOG_PATH = os.path.join(temp_dir, "decnet-status.log")
+        daemon.NAME_UPDATE_INTERVAL = 60
+        daemon.JOB_JITTER = 0
+        with open(daemon.NAME_UPDATE_TIMESTAMP_FILE, "w") as f:
+            f.write(datetime.fromtimestamp(daemon.time.time() - 1800).isoformat())
+
+        schedule = daemon.new_job_schedule(daemon.default_instance())
+        assert sorted(schedule['jobs']) == ['log rotation', 'names']
+        assert 1790 < decnet_scheduler.seconds_until(schedule, 'names', daemon.time.monotonic()) <= 1800
+
+        daemon.STATUS_LOG_MAX_BYTES = 10
+        with open(daemon.STATUS_LOG_PATH, "w") as f:
+            f.write("x" * 20)
+        assert daemon.pop_due_jobs(schedule) == ['log rotation']
+        assert not os.path.exists(daemon.SCHEDULE_PATH), "saved before the job ran"
+        daemon.rotate_status_log()
+        daemon.finish_job(schedule, 'log rotation', True)
+        assert os.path.exists(daemon.STATUS_LOG_PATH + ".1")
+        with open(daemon.STATUS_LOG_PATH, "w") as f:
+            f.write("x")
+        daemon.rotate_status_log()
+        assert not os.path.exists(daemon.STATUS_LOG_PATH + ".2"), "a small status log was rotated"
+        with open(daemon.SCHEDULE_PATH) as f:
+            saved = json.load(f)
+        assert saved['log rotation']['runs'] == 1
+        assert 'runs' not in saved['names'], "the carried-over name update was counted as a run"
+
+        os.remove(daemon.SCHEDULE_PATH)
+        assert daemon.pop_due_jobs(schedule) == []
+        assert not os.path.exists(daemon.SCHEDULE_PATH), "saved without a run"
+        assert updates == []
+    print("✅ The daemon schedules its periodic jobs")
+
+def test_failed_name_update_is_retried():
+    """A failed or skipped name update is retried soon; only a successful one counts as run."""
+    daemon = load_daemon()
+    results = [False, True]
+    daemon.update_decnet_names = lambda: results.pop(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.SCHEDULE_PATH = os.path.join(temp_dir, "job-schedule.json")
+        daemon.NAME_UPDATE_TIMESTAMP_FILE = os.path.join(temp_dir, "last_name_update.txt")
+        daemon.STATUS_LOG_MAX_BYTES = 0
+        daemon.JOB_JITTER = 0
+        daemon.JOB_RETRY_INTERVAL = 300
+        state = daemon.new_monitor_state(daemon.default_instance())
+        schedule = state['schedule']
+        assert daemon.pop_due_jobs(schedule) == ['names']
+
+        assert daemon.run_scheduled_job(schedule, 'names', daemon.update_decnet_names) is False
+        assert 295 < decnet_scheduler.seconds_until(schedule, 'names', daemon.time.monotonic()) <= 300
+        assert not os.path.exists(daemon.SCHEDULE_PATH), "a failed update was recorded"
+
+        daemon.run_scheduled_job(schedule, 'names', daemon.update_decnet_names)
+        with open(daemon.SCHEDULE_PATH) as f:
+            assert json.load(f)['names']['runs'] == 1
+
+        # A run that cannot start because the previous one is still busy is retried too
+        release = threading.Event()
+        daemon.submit_background_probe(state['jobs'], 'names', release.wait, 5)
+        decnet_scheduler.register_job(schedule, 'names', daemon.NAME_UPDATE_INTERVAL * 60,
+                                      daemon.time.monotonic(), daemon.time.time())
+        daemon.submit_scheduled_job(state, 'names', daemon.update_decnet_names)
+        release.set()
+        assert 295 < decnet_scheduler.seconds_until(schedule, 'names', daemon.time.monotonic()) <= 300
+    print("✅ A failed name update is retried")
+
+def test_manual_name_update_moves_the_schedule():
+    """--update-names records its run, and a running daemon postpones its own update."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.SCHEDULE_PATH = os.path.join(temp_dir, "job-schedule.json")
+        daemon.NAME_UPDATE_TIMESTAMP_FILE = os.path.join(temp_dir, "last_name_update.txt")
+        daemon.STATUS_LOG_MAX_BYTES = 0
+        daemon.JOB_JITTER = 0
+        schedule = daemon.new_job_schedule(daemon.default_instance())
+        assert daemon.pop_due_jobs(schedule) == ['names']
+        assert not daemon.defer_name_update(schedule), "no manual update yet"
+
+        daemon.update_name_update_timestamp()
+        daemon.record_manual_name_update()
+        with open(daemon.SCHEDULE_PATH) as f:
+            assert json.load(f)['names']['runs'] == 1
+
+        decnet_scheduler.register_job(schedule, 'names', daemon.NAME_UPDATE_INTERVAL * 60,
+                                      daemon.time.monotonic(), 0)  # Due again for the running daemon
+        assert daemon.defer_name_update(schedule)
+        interval = daemon.NAME_UPDATE_INTERVAL * 60
+        assert interval - 10 < decnet_scheduler.seconds_until(schedule, 'names', daemon.time.monotonic()) <= interval
+    print("✅ A manual name update moves the schedule")
+
+def test_name_update_runs_in_the_background():
+    """A slow name update does not hold up the monitoring cycle that found it due."""
+    daemon = load_daemon()
+    release = threading.Event()
+    daemon.update_decnet_names = lambda: release.wait(10)
+    daemon.find_instance_pids = lambda instance=None: []
+    daemon.supervise_restart = lambda restart_state, instance=None: False
+    daemon.check_decnet_link = lambda target=None, instance=None: (True, "", daemon.decnet_ncp.EMPTY_NODE_STATE)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.SCHEDULE_PATH = os.path.join(temp_dir, "job-schedule.json")
+        daemon.NAME_UPDATE_TIMESTAMP_FILE = os.path.join(temp_dir, "last_name_update.txt")
+        daemon.STATUS_LOG_PATH = os.path.join(temp_dir, "decnet-status.log")
+        state = daemon.new_monitor_state(daemon.default_instance())
+        try:
+            started = time.monotonic()
+            assert daemon.monitor_cycle(state)
+            assert time.monotonic() - started < 5, "the cycle waited for the name update"
+            assert not state['jobs']['names'].done()
+        finally:
+            release.set()
+        state['jobs']['names'].result(timeout=5)
+    print("✅ The name update runs in the background")
+
+if __name__ == "__main__":
+    print("=== Job Scheduler Test ===")
+    test_jobs_follow_the_monotonic_clock()
+    test_schedule_survives_restart()
+    test_daemon_schedules_its_jobs()
+    test_name_update_runs_in_the_background()
+    test_failed_name_update_is_retried()
+    test_manual_name_update_moves_the_schedule()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the bulk known nodes sweep.
+Parses a 'show known nodes' table, builds reachability snapshots, diffs them,
+saves and reloads them, and runs the daemon's sweep against a fake ncp.
+"""
+
+import os
+import tempfile
+import time
+
+from daemon_helpers import SCRIPT_DIR, load_daemon
+
+import decnet_ncp
+import decnet_sweep
+
+KNOWN_NODES_OUTPUT = """Known Node Volatile Summary as of 19-Oct-2026 10:00:00
+
+ Node           State        Active  Delay  Type     Cost  Hops  Circuit    Next node
+                             Links
+ 1.13 (MIM)     reachable                   area        5     2  TCP-0-0    2.10 (GW)
+ 2.10 (GW)      reachable         1         routing IV  3     1  ETH-0      2.10 (GW)
+ 2.20 (BRIDGE)  unreachable
+ 7.1 (FOO)      reachable                   phase IV    9     4  TCP-0-0    2.10 (GW)
+"""
+
+def node(address, reachable=True, hops=1, cost=1):
+    """Build a NodeState for one node."""
+    return decnet_ncp.EMPTY_NODE_STATE._replace(address=address, reachable=reachable, hops=hops, cost=cost)
+
+def test_parse_known_nodes():
+    """Every table row becomes one NodeState."""
+    states = decnet_ncp.parse_known_nodes(KNOWN_NODES_OUTPUT)
+    print(f"Parsed: {[(s.address, s.name, s.reachable, s.hops, s.cost) for s in states]}")
+    assert [(s.address, s.reachable) for s in states] == [
+        ("1.13", True), ("2.10", True), ("2.20", False), ("7.1", True)]
+    assert (states[0].cost, states[0].hops, states[0].next_node) == (5, 2, "2.10 (GW)")
+    assert states[3].type == "phase IV" and states[3].hops == 4
+
+def test_snapshot_diff():
+    """Diffs report nodes that came up, went down or changed route, and nothing else."""
+    old = decnet_sweep.build_snapshot([node("1.13"), node("2.10"), node("7.1", hops=2), node("9.9")])
+    new = decnet_sweep.build_snapshot([node("1.13"), node("2.10", cost=7), node("7.1", hops=3), node("63.1023"),
+                                       node("9.9", reachable=False)])
+    diff = decnet_sweep.diff_snapshots(old, new)
+    named = {key: [decnet_sweep.index_address(i) for i in value] for key, value in diff._asdict().items()}
+    print(f"Diff: {named}")
+    assert named == {'came_up': ["63.1023"], 'went_down': ["9.9"], 'route_changed': ["2.10", "7.1"]}
+    assert decnet_sweep.area_counts(new.reachable) == {1: 1, 2: 1, 7: 1, 63: 1}
+
+def test_snapshot_round_trip_and_speed():
+    """Snapshots survive a save/load, and diffing thousands of nodes is cheap."""
+    states = [node(f"{area}.{number}", hops=number % 7, cost=number % 50)
+              for area in range(1, 61) for number in range(1, 51)]
+    old = decnet_sweep.build_snapshot(states)
+    changed = states[:]
+    changed[10] = changed[10]._replace(reachable=False)
+    changed[2000] = changed[2000]._replace(cost=99)
+    new = decnet_sweep.build_snapshot(changed)
+
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        diff = decnet_sweep.diff_snapshots(old, new)
+    per_diff_us = (time.perf_counter() - started) / runs * 1000000
+    print(f"Diff of {len(states)} nodes: {per_diff_us:.0f} us, {diff}")
+    assert len(diff.went_down) == 1 and len(diff.route_changed) == 1
+    assert per_diff_us < 5000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "known-nodes.bin")
+        decnet_sweep.write_snapshot(path, new)
+        loaded = decnet_sweep.read_snapshot(path)
+    assert loaded.reachable == new.reachable and loaded.hops == new.hops and loaded.cost == new.cost
+    assert decnet_sweep.read_snapshot(os.path.join(SCRIPT_DIR, "missing.bin")) is None
+
+def test_daemon_sweep():
+    """The daemon runs one bulk query, saves the snapshot and reports the difference to the saved one."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = os.path.join(temp_dir, "known-nodes.txt")
+        with open(output_path, "w") as f:
+            f.write(KNOWN_NODES_OUTPUT)
+        daemon.SWEEP_COMMAND = f"cat {output_path}"
+        daemon.KNOWN_NODES_PATH = os.path.join(temp_dir, "known-nodes.bin")
+        daemon.AREA_HISTORY_PATH = os.path.join(temp_dir, "area-history.bin")
+        decnet_sweep.write_snapshot(daemon.KNOWN_NODES_PATH,
+                                    decnet_sweep.build_snapshot([node("1.13", hops=2, cost=5), node("2.20")]))
+
+        state = {'snapshot': None, 'last_run': None}
+        diff = daemon.sweep_known_nodes(state)
+        named = {key: [decnet_sweep.index_address(i) for i in value] for key, value in diff._asdict().items()}
+        print(f"Daemon sweep diff: {named}")
+        assert named == {'came_up': ["2.10", "7.1"], 'went_down': ["2.20"], 'route_changed': []}
+        assert daemon.METRICS['sweep_reachable_nodes'] == 3
+        assert daemon.METRICS['area_reachable_nodes{area="2"}'] == 1
+        assert decnet_sweep.read_snapshot(daemon.KNOWN_NODES_PATH).reachable == state['snapshot'].reachable
+
+        daemon.SWEEP_COMMAND = os.path.join(temp_dir, "no-such-ncp")
+        assert daemon.sweep_known_nodes(state) is None
+
+if __name__ == "__main__":
+    print("=== Known Nodes Sweep Test ===")
+    test_parse_known_nodes()
+    test_snapshot_diff()
+    test_snapshot_round_trip_and_speed()
+    test_daemon_sweep()
+    print("✅ Known nodes sweep works")
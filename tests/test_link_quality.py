@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for link quality measurement.
+Replaces 'ncp loop' with a stand-in that loses every fourth request and checks
+the loss rate, RTT percentiles, history file and threshold alerts.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from daemon_helpers import load_daemon
+
+# Counts its invocations in a file and fails every fourth one
+FAKE_LOOP = """import os, sys
+counter = os.path.join(os.path.dirname(os.path.abspath(__file__)), "count")
+count = int(open(counter).read()) + 1 if os.path.exists(counter) else 1
+open(counter, "w").write(str(count))
+if count % 4 == 0:
+    print("Loop test failed, node unreachable")
+    sys.exit(1)
+print("Loop test to", sys.argv[1], "succeeded")
+"""
+
+def test_percentile():
+    """Nearest-rank percentiles on small samples."""
+    daemon = load_daemon()
+    values = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    assert daemon.percentile(values, 50) == 50
+    assert daemon.percentile(values, 95) == 100
+    assert daemon.percentile(values, 10) == 10
+    assert daemon.percentile([], 50) is None
+
+def test_quality_burst_and_alerts():
+    """Loss and RTT are measured per burst, stored in history and alerted on once."""
+    daemon = load_daemon()
+    alerts = []
+    daemon.send_notification = lambda subject, body: alerts.append(subject)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fake = os.path.join(temp_dir, "fake_loop.py")
+        with open(fake, "w") as f:
+            f.write(FAKE_LOOP)
+        daemon.LOOP_COMMAND = f"{sys.executable} {fake} {{target}}"
+        daemon.LOOP_INTERVAL = 0
+        daemon.LOSS_ALERT_PERCENT = 20
+        daemon.RTT_ALERT_MS = 0
+        daemon.QUALITY_HISTORY_PATH = os.path.join(temp_dir, "link-quality.jsonl")
+
+        quality = daemon.measure_link_quality("MIM", count=8)
+        print(f"Quality: {quality}")
+        assert quality['sent'] == 8 and quality['received'] == 6
+        assert quality['loss_percent'] == 25.0
+        assert quality['rtt_min_ms'] <= quality['rtt_p50_ms'] <= quality['rtt_p95_ms'] <= quality['rtt_max_ms']
+
+        daemon.record_link_quality(quality)
+        with open(daemon.QUALITY_HISTORY_PATH) as f:
+            assert json.loads(f.readline())['loss_percent'] == 25.0
+        assert daemon.METRICS['link_loss_percent{target="MIM"}'] == 25.0
+
+        state = {}
+        daemon.check_quality_thresholds(state, quality)
+        daemon.check_quality_thresholds(state, quality)  # Still degraded: no second alert
+        healthy = dict(quality, received=8, loss_percent=0.0)
+        daemon.check_quality_thresholds(state, healthy)
+        print(f"Alerts: {alerts}")
+        assert alerts == ["DECNET link to MIM is degraded", "DECNET link quality to MIM is back to normal"]
+
+if __name__ == "__main__":
+    print("=== Link Quality Test ===")
+    test_percentile()
+    test_quality_burst_and_alerts()
+    print("✅ Link quality measurement works")
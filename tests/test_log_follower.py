@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for following PyDECNET's output logs.
+Verifies pattern matching, reading only complete new lines across rotation and
+truncation, the per-pattern alert and wake rate limits, and that a matching
+line wakes the monitor loop early.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from daemon_helpers import load_daemon
+
+def test_pattern_matching():
+    """Each line is attributed to the pattern that matched it; bad patterns are left out."""
+    daemon = load_daemon()
+    patterns = dict(daemon.DEFAULT_LOG_PATTERNS, broken='(unclosed', disabled='', custom=r'(?i)mop console')
+    matcher = daemon.compile_log_patterns(patterns)
+    lines = [
+        "Traceback (most recent call last):",
+        "2026-10-19 10:00:00 ERROR: routing layer failed",
+        "Circuit TCP-0-0 down, adjacency lost",
+        "OSError: [Errno 98] Address already in use",
+        "MOP Console request from 1.13",
+        "Node 1.13 reachable",
+    ]
+    events = daemon.match_log_lines(matcher, lines)
+    assert [name for name, _ in events] == ['traceback', 'error', 'circuit_down', 'address_in_use', 'custom']
+    assert daemon.compile_log_patterns({'off': ''}) is None
+    print("✅ Patterns are matched and invalid ones skipped")
+
+def test_read_new_lines():
+    """Only complete lines are returned; rotation and truncation restart at the beginning."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "pydecnet.log")
+        with open(path, "w") as f:
+            f.write("old line\n")
+        _, position = daemon.read_new_lines(path, None)
+
+        with open(path, "a") as f:
+            f.write("first\nsecond half")
+        lines, position = daemon.read_new_lines(path, position)
+        assert lines == ["first"]
+        with open(path, "a") as f:
+            f.write(" done\n")
+        lines, position = daemon.read_new_lines(path, position)
+        assert lines == ["second half done"]
+
+        os.rename(path, path + ".1")
+        with open(path, "w") as f:
+            f.write("after rotation\n")
+        lines, position = daemon.read_new_lines(path, position)
+        assert lines == ["after rotation"]
+
+        with open(path, "w") as f:
+            f.write("x\n")
+        lines, position = daemon.read_new_lines(path, position)
+        assert lines == ["x"]
+
+        os.remove(path)
+        lines, missing_position = daemon.read_new_lines(path, position)
+        assert lines == [] and missing_position == position
+    print("✅ New lines are read across partial writes, rotation and truncation")
+
+def test_alerts_are_rate_limited():
+    """A pattern is emailed once per LOG_ALERT_INTERVAL; the suppressed count goes into the next email."""
+    daemon = load_daemon()
+    sent = []
+    daemon.send_notification = lambda subject, body: sent.append((subject, body))
+    daemon.LOG_ALERT_INTERVAL = 60
+    state = daemon.new_log_alert_state()
+
+    daemon.handle_log_events([('error', "ERROR one"), ('error', "ERROR two")], state, "output")
+    daemon.handle_log_events([('error', "ERROR three")], state, "output")
+    daemon.handle_log_events([('traceback', "Traceback (most recent call last):")], state, "error output")
+    assert [subject for subject, _ in sent] == ["PyDECNET output: error", "PyDECNET error output: traceback"]
+    assert daemon.METRICS['pydecnet_log_events_total{pattern="error"}'] == 3
+
+    state['last_alert']['error'] -= 61
+    daemon.handle_log_events([('error', "ERROR four")], state, "output")
+    assert len(sent) == 3 and "1 earlier matching line(s)" in sent[-1][1]
+    print("✅ Log alerts are rate limited per pattern")
+
+def test_wakes_are_rate_limited():
+    """A pattern that keeps matching wakes the monitor loop once per LOG_WAKE_INTERVAL."""
+    daemon = load_daemon()
+    daemon.send_notification = lambda subject, body: None
+    daemon.LOG_WAKE_INTERVAL = 60
+    daemon.WAKE_EVENT = threading.Event()
+    state = daemon.new_log_alert_state()
+
+    daemon.handle_log_events([('error', "ERROR one")], state, "output")
+    assert daemon.WAKE_EVENT.is_set()
+    daemon.WAKE_EVENT.clear()
+    daemon.handle_log_events([('error', "ERROR two")], state, "output")
+    assert not daemon.WAKE_EVENT.is_set(), "a repeated error woke the monitor loop again"
+    daemon.handle_log_events([('circuit_down', "Circuit TCP-0-0 down")], state, "output")
+    assert daemon.WAKE_EVENT.is_set(), "a new pattern did not wake the monitor loop"
+    daemon.WAKE_EVENT.clear()
+
+    state['last_wake']['error'] -= 61
+    daemon.handle_log_events([('error', "ERROR three")], state, "output")
+    assert daemon.WAKE_EVENT.is_set()
+    print("✅ Early checks are rate limited per pattern")
+
+def test_follower_wakes_monitor_loop():
+    """A traceback written by PyDECNET ends the monitor loop's sleep early."""
+    daemon = load_daemon()
+    daemon.send_notification = lambda subject, body: None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.LOG_INFO_PATH = os.path.join(temp_dir, "pydecnet.log")
+        daemon.LOG_ERROR_PATH = os.path.join(temp_dir, "pydecnet-error.log")
+        with open(daemon.LOG_ERROR_PATH, "w") as f:
+            f.write("Traceback (most recent call last):\n")  # Written before the follower started
+        daemon.WAKE_EVENT = threading.Event()
+        stop_event = threading.Event()
+        thread = threading.Thread(target=daemon.follow_pydecnet_logs, args=(stop_event, 0.05), daemon=True)
+        thread.start()
+        try:
+            time.sleep(0.2)
+            assert not daemon.WAKE_EVENT.is_set(), "old output raised an alert"
+
+            def write_traceback():
+                time.sleep(0.2)
+                with open(daemon.LOG_ERROR_PATH, "a") as f:
+                    f.write("Traceback (most recent call last):\n  File \"pydecnet\"\n")
+            threading.Thread(target=write_traceback).start()
+            started = time.monotonic()
+            daemon.sleep_with_watchdog(10)
+            elapsed = time.monotonic() - started
+        finally:
+            stop_event.set()
+            thread.join(timeout=2)
+    assert elapsed < 2, f"the monitor loop slept {elapsed:.1f}s despite the traceback"
+    assert daemon.METRICS['pydecnet_log_events_total{pattern="traceback"}'] == 1
+    print(f"✅ The monitor loop woke after {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    print("=== PyDECNET Log Follower Test ===")
+    test_pattern_matching()
+    test_read_new_lines()
+    test_alerts_are_rate_limited()
+    test_wakes_are_rate_limited()
+    test_follower_wakes_monitor_loop()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for supervising several PyDECNET instances.
+Starts two stand-in PyDECNET instances with their own config, socket, pidfile
+and logs, and checks that each one only sees its own process, that a crash of
+one restarts only that one, that a stale pidfile is not trusted, that their
+checks run side by side, that an error in one instance's cycle does not affect
+the other, and that a target both instances probe is tracked per instance.
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from daemon_helpers import load_daemon
+
+import decnet_probe_cache
+
+# Forks like 'pydecnet --daemon' and listens on the socket named in its last config file
+FAKE_PYDECNET = """#!{python}
+import os, socket, sys, time
+with open(sys.argv[-1]) as f:
+    socket_path = f.read().strip()
+if os.fork():
+    sys.exit(0)
+os.setsid()
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(socket_path)
+server.listen(1)
+time.sleep(60)
+"""
+
+# Called as '<ncp> <instance> sho node <target>'; each probe takes PROBE_SECONDS
+FAKE_NCP = """#!/bin/sh
+sleep {delay}
+echo "Remote node = 1.13 (MIM)"
+echo "State = reachable"
+echo "Hops = 1, Cost = 3, Circuit = $1-0"
+"""
+PROBE_SECONDS = 0.8
+
+# The 'lab' instance sees MIM unreachable
+UNREACHABLE_NCP = """#!/bin/sh
+echo "Remote node = 1.13 (MIM)"
+echo "State = unreachable"
+"""
+
+def configure(daemon, temp_dir):
+    """Describe two instances, 'ark' and 'lab', living in temp_dir."""
+    daemon.LOG_DIR = temp_dir
+    daemon.CONFIG_DIR = temp_dir
+    daemon.PROBE_CACHE_PATH = os.path.join(temp_dir, "probe-cache.bin")
+    daemon.PYDECNET_BIN = os.path.join(temp_dir, "pydecnet")
+    daemon.STARTUP_TIMEOUT = 5
+    daemon.NAME_UPDATE_INTERVAL = 0
+    daemon.INSTANCE_NAMES = ['ark', 'lab']
+    ncp = os.path.join(temp_dir, "ncp")
+    for name in daemon.INSTANCE_NAMES:
+        socket_path = os.path.join(temp_dir, f"{name}.sock")
+        with open(os.path.join(temp_dir, f"{name}.conf"), "w") as f:
+            f.write(socket_path + "\n")
+        daemon.CONFIG.update({
+            f'hecnet_instance_{name}_config': f"logging.json, {name}.conf",
+            f'hecnet_instance_{name}_socket': socket_path,
+            f'hecnet_instance_{name}_targets': "MIM",
+            f'hecnet_instance_{name}_ncp': f"{ncp} {name}",
+        })
+    with open(daemon.PYDECNET_BIN, "w") as f:
+        f.write(FAKE_PYDECNET.format(python=sys.executable))
+    with open(ncp, "w") as f:
+        f.write(FAKE_NCP.format(delay=PROBE_SECONDS))
+    for path in (daemon.PYDECNET_BIN, ncp):
+        os.chmod(path, 0o755)
+
+def cleanup(daemon):
+    """Kill every stand-in PyDECNET left running."""
+    for pid in daemon.find_pydecnet_pids():
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+def test_instance_configuration():
+    """Named instances get their own paths; missing configs and shared sockets are rejected."""
+    daemon = load_daemon()
+    assert [instance['label'] for instance in daemon.get_instances()] == [None]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure(daemon, temp_dir)
+        ark, lab = daemon.get_instances()
+        assert ark['primary'] and not lab['primary']
+        assert ark['config_files'] == [os.path.join(temp_dir, "logging.json"), os.path.join(temp_dir, "ark.conf")]
+        assert len({ark[key] for key in ('pidfile', 'log_info', 'log_error')} |
+                   {lab[key] for key in ('pidfile', 'log_info', 'log_error')}) == 6
+        assert daemon.instance_metric('link_up{target="MIM"}', ark) == 'link_up{target="MIM",instance="ark"}'
+        assert daemon.validate_instances() == []
+
+        daemon.CONFIG['hecnet_instance_lab_socket'] = ark['socket']
+        del daemon.CONFIG['hecnet_instance_lab_config']
+        problems = daemon.validate_instances()
+        assert any("hecnet_instance_lab_config" in problem for problem in problems)
+        assert any("share the socket" in problem for problem in problems)
+
+        daemon.INSTANCE_NAMES = ['ark', 'laboratory-backup']
+        daemon.CONFIG['hecnet_instance_laboratory-backup_config'] = "lab.conf"
+        daemon.CONFIG['hecnet_instance_laboratory-backup_targets'] = "MIM"
+        assert any("longer than 16 characters" in problem for problem in daemon.validate_instances())
+    print("✅ Instances are described by their own settings and validated")
+
+def test_crash_restarts_only_that_instance():
+    """Killing one instance restarts it alone, and both are checked concurrently."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure(daemon, temp_dir)
+        instances = daemon.get_instances()
+        try:
+            pids = [daemon.start_pydecnet(instance) for instance in instances]
+            assert None not in pids and pids[0] != pids[1]
+            for instance, pid in zip(instances, pids):
+                assert daemon.find_instance_pids(instance) == [pid]
+                with open(instance['pidfile']) as f:
+                    assert int(f.read()) == pid
+
+            states = [daemon.new_monitor_state(instance) for instance in instances]
+            os.kill(pids[0], signal.SIGKILL)
+            while pids[0] in daemon.find_pydecnet_pids():
+                time.sleep(0.01)
+
+            started = time.monotonic()
+            assert daemon.run_monitor_cycles(states) == [True, True]
+            elapsed = time.monotonic() - started
+            ark_pids = daemon.find_instance_pids(instances[0])
+            assert len(ark_pids) == 1 and ark_pids[0] != pids[0]
+            assert daemon.find_instance_pids(instances[1]) == [pids[1]]
+            assert daemon.METRICS['pydecnet_restarts_total{instance="ark"}'] == 1
+            assert 'pydecnet_restarts_total{instance="lab"}' not in daemon.METRICS
+
+            # Without the restart both cycles are just a link probe each
+            started = time.monotonic()
+            daemon.run_monitor_cycles(states)
+            concurrent = time.monotonic() - started
+        finally:
+            cleanup(daemon)
+    print(f"Cycle with a restart: {elapsed:.2f}s, plain cycle: {concurrent:.2f}s")
+    assert concurrent < 1.8 * PROBE_SECONDS, "the instances were not checked concurrently"
+    print("✅ A crashed instance is restarted without touching the other")
+
+def test_pidfile_is_checked():
+    """The pidfile is used only while it names a live process of that instance; a stale one is removed."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure(daemon, temp_dir)
+        ark = daemon.get_instances()[0]
+        with open(ark['pidfile'], "w") as f:
+            f.write(f"{os.getpid()}\n")  # A live process, but not ark's PyDECNET
+        assert daemon.find_instance_pids(ark) == []
+        assert not os.path.exists(ark['pidfile'])
+        try:
+            pid = daemon.start_pydecnet(ark)
+            scan = daemon.find_pydecnet_pids
+            daemon.find_pydecnet_pids = lambda: []  # Only the pidfile can find it now
+            assert daemon.find_instance_pids(ark) == [pid]
+            daemon.find_pydecnet_pids = scan
+            os.kill(pid, signal.SIGKILL)
+            while pid in daemon.find_pydecnet_pids():
+                time.sleep(0.01)
+            assert daemon.find_instance_pids(ark) == []
+            assert not os.path.exists(ark['pidfile'])
+        finally:
+            cleanup(daemon)
+    print("✅ The pidfile is trusted only while it names the instance's own process")
+
+def test_cycle_error_is_isolated():
+    """An exception in one instance's cycle is counted; the other instance is still checked."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure(daemon, temp_dir)
+        states = [daemon.new_monitor_state(instance) for instance in daemon.get_instances()]
+        daemon.find_pydecnet_pids = lambda: []
+        daemon.supervise_restart = lambda restart_state, instance=None: False
+        states[1]['links'] = None  # Breaks the lab cycle
+        assert daemon.run_monitor_cycles(states) == [True, False]
+        assert daemon.METRICS['monitor_cycle_errors_total{instance="lab"}'] == 1
+        assert states[0]['link']['confirmed_up'] is True
+        assert daemon.run_monitor_cycles(states[1:]) == [False], "a single instance's error escaped"
+        assert daemon.METRICS['monitor_cycle_errors_total{instance="lab"}'] == 2
+    print("✅ A failing instance cycle does not affect the others")
+
+def test_shared_target_is_kept_per_instance():
+    """Two instances probing the same target keep their own metrics and cached results."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        configure(daemon, temp_dir)
+        lab_ncp = os.path.join(temp_dir, "ncp-lab")
+        with open(lab_ncp, "w") as f:
+            f.write(UNREACHABLE_NCP)
+        os.chmod(lab_ncp, 0o755)
+        daemon.CONFIG['hecnet_instance_lab_ncp'] = lab_ncp
+        daemon.PROBE_CONFIRM_COUNT = 1
+        daemon.find_pydecnet_pids = lambda: []
+        daemon.supervise_restart = lambda restart_state, instance=None: False
+        states = [daemon.new_monitor_state(instance) for instance in daemon.get_instances()]
+        assert daemon.run_monitor_cycles(states) == [True, False]
+
+        assert daemon.METRICS['link_up{target="MIM",instance="ark"}'] == 1
+        assert daemon.METRICS['link_up{target="MIM",instance="lab"}'] == 0
+        assert daemon.METRICS['route_hops{target="MIM",instance="ark"}'] == 1
+        assert 'route_hops{target="MIM",instance="lab"}' not in daemon.METRICS
+        assert 'probe_latency_seconds{target="MIM",instance="lab"}' in daemon.METRICS
+        assert not any(name.startswith(('link_up{target="MIM"}', 'probe_latency_seconds{target="MIM"}'))
+                       for name in daemon.METRICS), "an unscoped per-target metric was written"
+
+        cached = decnet_probe_cache.read_probe_cache(daemon.PROBE_CACHE_PATH)
+        assert sorted(cached) == [("ark", "MIM"), ("lab", "MIM")]
+        assert cached[("ark", "MIM")].status == decnet_probe_cache.STATUS_UP
+        assert cached[("lab", "MIM")].status == decnet_probe_cache.STATUS_DOWN
+
+        daemon.handle_log_events([('error', "ERROR lab only")], daemon.new_log_alert_state(), "'lab' output", states[1]['instance'])
+        assert daemon.METRICS['pydecnet_log_events_total{pattern="error",instance="lab"}'] == 1
+    print("✅ A target shared by two instances is tracked per instance")
+
+if __name__ == "__main__":
+    print("=== Multiple PyDECNET Instances Test ===")
+    test_instance_configuration()
+    test_crash_restarts_only_that_instance()
+    test_pidfile_is_checked()
+    test_cycle_error_is_isolated()
+    test_shared_target_is_kept_per_instance()
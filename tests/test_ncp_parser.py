@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the 'ncp show node' output parser.
+Checks both NCP layouts (column tables and key/value lines), unreachable and
+empty output, and that parsing stays cheap enough to run on every probe.
+"""
+
+import time
+
+import daemon_helpers  # Puts the scripts' directory on sys.path
+
+import decnet_ncp
+
+TABLE_OUTPUT = """Node Volatile Status as of 19-Oct-2026 10:00:00
+
+ Node           State      Active  Delay  Type     Cost  Hops  Circuit    Next node
+                           Links
+ 1.13 (MIM)     reachable       2      1  area        5     2  TCP-0-0    2.10 (GW)
+"""
+
+KEY_VALUE_OUTPUT = """Node Volatile Summary as of 19-Oct-2026 10:00:00
+
+Remote node = 1.13 (MIM)
+
+    State = reachable
+    Hops = 3, Cost = 12, Circuit = ETH-0, Next node = 2.20 (BRIDGE)
+"""
+
+UNREACHABLE_OUTPUT = """Node Volatile Summary as of 19-Oct-2026 10:00:00
+
+ Node           State        Circuit    Next node
+ 1.13 (MIM)     unreachable
+"""
+
+def test_table_layout():
+    """Column tables are split by header position."""
+    node = decnet_ncp.parse_show_node(TABLE_OUTPUT)
+    print(f"Table: {node}")
+    assert (node.address, node.name, node.state, node.reachable) == ("1.13", "MIM", "reachable", True)
+    assert (node.active_links, node.delay, node.type) == (2, 1, "area")
+    assert (node.cost, node.hops, node.circuit, node.next_node) == (5, 2, "TCP-0-0", "2.10 (GW)")
+
+def test_key_value_layout():
+    """Key/value lines, including several pairs on one line."""
+    node = decnet_ncp.parse_show_node(KEY_VALUE_OUTPUT)
+    print(f"Key/value: {node}")
+    assert (node.address, node.name, node.state) == ("1.13", "MIM", "reachable")
+    assert decnet_ncp.route_of(node) == ("2.20 (BRIDGE)", 12, 3, "ETH-0")
+    assert decnet_ncp.describe_node_state(node) == "reachable, hops 3, cost 12, via ETH-0, next node 2.20 (BRIDGE)"
+
+def test_unreachable_and_empty():
+    """Unreachable nodes and failed probes (no output) are not reachable."""
+    node = decnet_ncp.parse_show_node(UNREACHABLE_OUTPUT)
+    assert node.state == "unreachable" and not node.reachable and node.next_node is None
+    assert not decnet_ncp.parse_show_node("").reachable
+    assert not decnet_ncp.parse_show_node("Node 1.13 (MIM) Unreachable").reachable
+    assert decnet_ncp.parse_show_node("Node 1.13 (MIM) is up").reachable
+
+def test_loop_failures():
+    """Only ncp's failure lines mark a loop request as lost, not words inside a reply."""
+    for output in ("Loop test failed, node unreachable",
+                   "%NCP-F-CONNECT, Connect failed\nRemote node = 1.13 (MIM)",
+                   "NCP -- Listener response - Connect failed, Unrecognized object",
+                   "Node unreachable",
+                   "Error: no route to 63.1"):
+        assert decnet_ncp.loop_failed(output), output
+    for output in ("Loop test to FAILED succeeded",
+                   "Loop node ERROR1 (12.7) ok, 1 message",
+                   "    0  Data errors inbound\n    2  Response timeouts",
+                   ""):
+        assert not decnet_ncp.loop_failed(output), output
+
+def test_parse_speed():
+    """Parsing must be cheap enough to run for many targets every cycle."""
+    runs = 2000
+    started = time.perf_counter()
+    for _ in range(runs):
+        decnet_ncp.parse_show_node(TABLE_OUTPUT)
+        decnet_ncp.parse_show_node(KEY_VALUE_OUTPUT)
+    per_parse_us = (time.perf_counter() - started) / (runs * 2) * 1000000
+    print(f"Average parse time: {per_parse_us:.1f} us")
+    assert per_parse_us < 1000
+
+if __name__ == "__main__":
+    print("=== NCP Parser Test ===")
+    test_table_layout()
+    test_key_value_layout()
+    test_unreachable_and_empty()
+    test_loop_failures()
+    test_parse_speed()
+    print("✅ NCP output parser works")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled node directory.
+Builds a directory from a node list, looks nodes up by address and by name,
+checks that invalid files are rejected, that the name update writes the
+directory next to nodenames.conf, and that the daemon picks up a replaced
+directory.
+"""
+
+import os
+import tempfile
+
+from daemon_helpers import load_name_update, load_script
+
+import decnet_nodedb
+import decnet_sweep
+
+NODES = [("1.13", "MIM"), ("2.10", "ark"), ("63.1023", "LAST"), ("0.0", "ZERO"), ("5.5", "TOOLONGNAME"),
+         ("64.1", "BAD"), ("2.10", "ARK2")]
+
+def test_lookups():
+    """Addresses and names resolve both ways; invalid entries are left out."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nodenames.db")
+        assert decnet_nodedb.write_node_db(path, NODES, timestamp=1000.0) == 4
+        db = decnet_nodedb.open_node_db(path)
+        try:
+            assert db.count == 4 and db.timestamp == 1000.0
+            assert decnet_nodedb.lookup_name(db, "1.13") == "MIM"
+            assert decnet_nodedb.lookup_name(db, "2.10") == "ARK2", "the last name of an address wins"
+            assert decnet_nodedb.lookup_name(db, "63.1023") == "LAST"
+            assert decnet_nodedb.lookup_name(db, "5.5") is None
+            assert decnet_nodedb.lookup_name(db, "not an address") is None
+            assert decnet_nodedb.lookup_address(db, "mim") == "1.13"
+            assert decnet_nodedb.lookup_address(db, "ZERO") == "0.0"
+            assert decnet_nodedb.lookup_address(db, "ARK") is None
+            assert decnet_nodedb.lookup_address(db, "TOOLONGNAME") is None
+            assert list(decnet_nodedb.iter_nodes(db)) == [
+                ("0.0", "ZERO"), ("1.13", "MIM"), ("2.10", "ARK2"), ("63.1023", "LAST")]
+            assert decnet_sweep.area_counts(decnet_nodedb.known_bitmap(db)) == {0: 1, 1: 1, 2: 1, 63: 1}
+        finally:
+            decnet_nodedb.close_node_db(db)
+    print("✅ Nodes are looked up by address and by name")
+
+def test_invalid_files():
+    """Missing, truncated and foreign files are not opened."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nodenames.db")
+        assert decnet_nodedb.open_node_db(path) is None
+        decnet_nodedb.write_node_db(path, NODES)
+        with open(path, "rb") as f:
+            data = f.read()
+        for broken in (b"", data[:-1], b"XXXX" + data[4:]):
+            with open(path, "wb") as f:
+                f.write(broken)
+            assert decnet_nodedb.open_node_db(path) is None
+    print("✅ Invalid node directories are rejected")
+
+def test_name_update_writes_directory():
+    """The name update compiles the same nodes as nodenames.conf, with MIM named MIM."""
+    name_update = load_name_update()
+    nodes = [("10.1", "TEN"), ("1.13", "OTHER"), ("2.3", "TWO")]
+    assert sorted(nodes, key=name_update.node_sort_key) == [("1.13", "OTHER"), ("2.3", "TWO"), ("10.1", "TEN")]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nodenames.db")
+        assert name_update.generate_node_db(nodes, path)
+        db = decnet_nodedb.open_node_db(path)
+        assert list(decnet_nodedb.iter_nodes(db)) == [("1.13", "MIM"), ("2.3", "TWO"), ("10.1", "TEN")]
+        decnet_nodedb.close_node_db(db)
+    configured = os.path.join(os.sep, "srv", "hecnet", "nodes.db")
+    assert name_update.get_node_db_path({'hecnet_node_db': configured}, "/home/pi/.local/bin") == configured
+    assert name_update.get_node_db_path({}, "/home/pi/.local/bin") == "/home/pi/.local/bin/nodenames.db"
+    print("✅ The name update writes the node directory")
+
+def test_daemon_reopens_replaced_directory():
+    """The daemon names swept nodes from the directory and follows a name update."""
+    daemon = load_script("decnet-daemon.py", "decnet_daemon")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.NODE_DB_PATH = os.path.join(temp_dir, "nodenames.db")
+        index = decnet_sweep.node_index("2.10")
+        assert daemon.format_node_list([index], {}) == "2.10"
+        decnet_nodedb.write_node_db(daemon.NODE_DB_PATH, NODES)
+        assert daemon.format_node_list([index], {}) == "2.10 (ARK2)"
+        assert daemon.format_node_list([index], {index: "FROMSWEEP"}) == "2.10 (FROMSWEEP)"
+        decnet_nodedb.write_node_db(daemon.NODE_DB_PATH, [("2.10", "NEW")])
+        assert daemon.format_node_list([index], {}) == "2.10 (NEW)"
+        os.remove(daemon.NODE_DB_PATH)
+        assert daemon.format_node_list([index], {}) == "2.10"
+    print("✅ The daemon picks up a replaced node directory")
+
+if __name__ == "__main__":
+    print("=== Node Directory Test ===")
+    test_lookups()
+    test_invalid_files()
+    test_name_update_writes_directory()
+    test_daemon_reopens_replaced_directory()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the resilient node list download.
+Serves mirrors from a local HTTP server (slow, failing, truncated and good)
+and verifies hedged requests, retries and the cached last-good copy.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from daemon_helpers import load_name_update
+
+FULL_LIST = "".join(f"{area}.{number} (N{area}X{number}) Reachable\n" for area in range(1, 5) for number in range(1, 11))
+SHORT_LIST = "1.13 (MIM) Reachable\n"
+REQUESTS = []
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    """Serves /slow, /broken, /short and /good node lists."""
+    def do_GET(self):
+        REQUESTS.append(self.path)
+        if self.path == "/slow":
+            time.sleep(2)
+        if self.path == "/broken":
+            self.send_error(500)
+            return
+        if self.path not in ("/slow", "/short", "/good"):
+            self.send_error(404)
+            return
+        body = (SHORT_LIST if self.path == "/short" else FULL_LIST).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    """Start the mirror server on a free port; return (server, base URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_hedged_request_beats_slow_mirror():
+    """A slow primary is overtaken by the hedged request to the next mirror."""
+    name_update = load_name_update()
+    server, base = start_server()
+    try:
+        started = time.monotonic()
+        content, url = name_update.fetch_node_list_hedged([f"{base}/slow", f"{base}/good"], timeout=5, hedge_delay=0.2)
+        elapsed = time.monotonic() - started
+    finally:
+        server.shutdown()
+    print(f"Hedged fetch took {elapsed:.2f} s from {url}")
+    assert url.endswith("/good") and content == FULL_LIST
+    assert elapsed < 1.5
+
+def test_retries_then_cache_fallback():
+    """Failed rounds are retried, and the cached copy is used when every mirror fails."""
+    name_update = load_name_update()
+    server, base = start_server()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = os.path.join(temp_dir, "hecnod-cache.txt")
+        config = {'hecnet_node_list_urls': f"{base}/good", 'hecnet_node_list_retries': '0'}
+        try:
+            assert name_update.get_node_list(config, cache_path) == FULL_LIST
+            assert os.path.exists(cache_path)
+
+            REQUESTS.clear()
+            content = name_update.fetch_node_list([f"{base}/broken"], timeout=5, retries=2, hedge_delay=0.1, backoff=0)
+            assert content is None and REQUESTS == ["/broken"] * 3
+
+            config['hecnet_node_list_urls'] = f"{base}/broken, {base}/missing"
+            assert name_update.get_node_list(config, cache_path) == FULL_LIST
+
+            # A truncated list does not replace the complete cached one
+            config['hecnet_node_list_urls'] = f"{base}/short"
+            assert name_update.get_node_list(config, cache_path) == FULL_LIST
+            with open(cache_path) as f:
+                assert f.read() == FULL_LIST
+        finally:
+            server.shutdown()
+
+def test_mirror_configuration():
+    """Mirrors come from hecnet_node_list_urls, falling back to MIM."""
+    name_update = load_name_update()
+    assert name_update.get_node_list_urls({}) == [name_update.DEFAULT_NODE_LIST_URL]
+    assert name_update.get_node_list_urls({'hecnet_node_list_urls': "http://a/hecnod, http://b/hecnod"}) == [
+        "http://a/hecnod", "http://b/hecnod"]
+    assert name_update.count_node_entries(FULL_LIST) == 40
+
+if __name__ == "__main__":
+    print("=== Node List Fetch Test ===")
+    test_hedged_request_beats_slow_mirror()
+    test_retries_then_cache_fallback()
+    test_mirror_configuration()
+    print("✅ Node list download is resilient")
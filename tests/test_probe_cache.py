@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared probe cache.
+Verifies that probe results written by the daemon round-trip through the
+fixed-layout cache file with one slot per instance and target, that targets
+which do not fit are counted and that stale entries are ignored by readers.
+"""
+
+import os
+import tempfile
+import time
+
+import daemon_helpers  # Puts the scripts' directory on sys.path
+
+import decnet_probe_cache
+
+def test_cache_round_trip():
+    """Every target's status, output, latency and timestamp survive a round trip."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "probe-cache.bin")
+        results = [
+            decnet_probe_cache.make_probe_result("mim", decnet_probe_cache.STATUS_UP, "Node 1.13 (MIM)\nReachable", 0.125),
+            decnet_probe_cache.make_probe_result("BITXOO", decnet_probe_cache.STATUS_DOWN, "Unreachable " * 500, 2.5),
+        ]
+        assert decnet_probe_cache.write_probe_cache(path, results) == 0
+        assert os.path.getsize(path) == (decnet_probe_cache.HEADER.size +
+                                         decnet_probe_cache.SLOT.size * decnet_probe_cache.MAX_TARGETS)
+
+        cached = decnet_probe_cache.read_probe_cache(path)
+        print(f"Cached targets: {sorted(cached)}")
+        assert sorted(cached) == [("", "BITXOO"), ("", "MIM")]
+        assert cached[("", "MIM")] == results[0]
+        assert cached[("", "BITXOO")].latency == 2.5
+        assert len(cached[("", "BITXOO")].output) == decnet_probe_cache.OUTPUT_SIZE  # Truncated, not rejected
+        assert not os.path.exists(path + ".tmp")
+
+def test_overflow_is_reported():
+    """Targets beyond MAX_TARGETS are left out and counted, never silently."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "probe-cache.bin")
+        results = [decnet_probe_cache.make_probe_result(f"NODE{index}", decnet_probe_cache.STATUS_UP, "", 0.1)
+                   for index in range(decnet_probe_cache.MAX_TARGETS + 3)]
+        assert decnet_probe_cache.write_probe_cache(path, results) == 3
+        cached = decnet_probe_cache.read_probe_cache(path)
+        assert sorted(cached) == sorted(("", result.target) for result in results[:decnet_probe_cache.MAX_TARGETS])
+    print("✓ Targets that do not fit the cache are counted")
+
+def test_instances_keep_their_own_slots():
+    """Two instances probing the same target do not overwrite each other."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "probe-cache.bin")
+        decnet_probe_cache.write_probe_cache(path, [
+            decnet_probe_cache.make_probe_result("MIM", decnet_probe_cache.STATUS_UP, "", 0.1, instance="ark"),
+            decnet_probe_cache.make_probe_result("MIM", decnet_probe_cache.STATUS_DOWN, "", 0.2, instance="lab"),
+        ])
+        assert decnet_probe_cache.lookup_probe(path, "mim", instance="ark").status == decnet_probe_cache.STATUS_UP
+        assert decnet_probe_cache.lookup_probe(path, "mim", instance="lab").status == decnet_probe_cache.STATUS_DOWN
+        assert decnet_probe_cache.lookup_probe(path, "mim") is None
+    print("✓ Instances keep their own cache slots")
+
+def test_freshness_ttl():
+    """Readers only accept results younger than the TTL."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "probe-cache.bin")
+        old = decnet_probe_cache.make_probe_result("MIM", decnet_probe_cache.STATUS_UP, "", 0.1,
+                                                   timestamp=time.time() - 600)
+        decnet_probe_cache.write_probe_cache(path, [old])
+        assert decnet_probe_cache.lookup_probe(path, "mim") is not None
+        assert decnet_probe_cache.lookup_probe(path, "mim", max_age=300) is None
+        assert decnet_probe_cache.lookup_probe(path, "other") is None
+
+        # Missing or corrupt caches read as empty
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+        assert decnet_probe_cache.read_probe_cache(path) == {}
+        assert decnet_probe_cache.read_probe_cache(os.path.join(temp_dir, "missing.bin")) == {}
+    print("✓ Stale, missing and corrupt caches are ignored")
+
+if __name__ == "__main__":
+    print("=== Probe Cache Test ===")
+    test_cache_round_trip()
+    test_overflow_is_reported()
+    test_instances_keep_their_own_slots()
+    test_freshness_ttl()
+    print("✅ Probe cache works")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the adaptive probe scheduler.
+Verifies the fast recheck after failures, the exponential backoff while the
+link is healthy, and that notifications are only sent on confirmed transitions.
+"""
+
+from daemon_helpers import load_daemon
+
+def test_backoff_intervals():
+    """Healthy probes back off toward the ceiling, failures recheck fast."""
+    daemon = load_daemon()
+    daemon.PROBE_JITTER = 0
+    daemon.PROBE_RECHECK_INTERVAL = 5
+    daemon.PROBE_BASE_INTERVAL = 15
+    daemon.PROBE_MAX_INTERVAL = 120
+
+    healthy = [daemon.next_probe_interval(True, streak) for streak in range(1, 7)]
+    print(f"Healthy intervals: {healthy}")
+    assert healthy == [15, 30, 60, 120, 120, 120]
+
+    failing = [daemon.next_probe_interval(False, streak) for streak in range(1, 5)]
+    print(f"Failing intervals: {failing}")
+    assert failing == [5, 10, 15, 15]
+
+    # Very long streaks must not overflow
+    assert daemon.next_probe_interval(True, 10 ** 6) == 120
+
+def test_jitter_bounds():
+    """Jitter stays within the configured fraction of the interval."""
+    daemon = load_daemon()
+    daemon.PROBE_JITTER = 0.1
+    daemon.PROBE_BASE_INTERVAL = 100
+    daemon.PROBE_MAX_INTERVAL = 100
+    samples = [daemon.next_probe_interval(True, 1) for _ in range(200)]
+    print(f"Jittered range: {min(samples):.1f} - {max(samples):.1f}")
+    assert all(90 <= sample <= 110 for sample in samples)
+    assert len(set(samples)) > 1
+
+def test_confirmed_transitions():
+    """One failed probe is a suspicion; emails go out only on confirmed changes."""
+    daemon = load_daemon()
+    daemon.PROBE_CONFIRM_COUNT = 2
+    emails = []
+    daemon.send_email = lambda output, is_down, target=None: emails.append(is_down)
+
+    state = daemon.new_link_state()
+    for is_up in [True, True, False, True, False, False, False, True]:
+        daemon.update_link_state(state, is_up, "output")
+
+    print(f"Notifications sent (isDown): {emails}")
+    assert emails == [True, False]
+    assert state['confirmed_up'] is True
+    assert state['streak'] == 1
+
+if __name__ == "__main__":
+    print("=== Adaptive Probe Scheduler Test ===")
+    test_backoff_intervals()
+    test_jitter_bounds()
+    test_confirmed_transitions()
+    print("✅ Probe scheduler behaves as expected")
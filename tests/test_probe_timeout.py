@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for timeout-enforced probes.
+Verifies that a hung probe is killed together with its children, that the
+timeout and a non-zero exit status count as failed probes, and that slow
+background probes do not delay the monitoring cycle.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from daemon_helpers import load_daemon
+
+import decnet_probe_cache
+
+# Starts a child that would outlive a plain kill of the ncp process itself
+HUNG_NCP = """#!/bin/sh
+sleep 60 &
+echo $! > "$(dirname "$0")/child.pid"
+wait
+"""
+
+# Prints a reachable node but exits with an error, as ncp does when the management link drops mid-reply
+FAILING_NCP = """#!/bin/sh
+echo "Node Volatile Summary"
+echo "    1.13 (MIM)        reachable                 area        5     2  TCP-0-0    1.13 (MIM)"
+echo "%NCP-F-CONNECT, management connection lost" >&2
+exit 1
+"""
+
+def process_is_alive(pid):
+    """Return True if pid is running (zombies waiting to be reaped don't count)."""
+    import psutil
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+def test_hung_probe_is_killed_with_its_group():
+    """A hung ncp fails the probe after the deadline, and its children die with it."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ncp = os.path.join(temp_dir, "ncp")
+        with open(ncp, "w") as f:
+            f.write(HUNG_NCP)
+        os.chmod(ncp, 0o755)
+        daemon.PROBE_TIMEOUT = 0.5
+        daemon.PROBE_CACHE_PATH = os.path.join(temp_dir, "probe-cache.bin")
+
+        original_path = os.environ.get('PATH', '')
+        os.environ['PATH'] = temp_dir + os.pathsep + original_path
+        try:
+            started = time.monotonic()
+            is_up, output, node_state = daemon.check_decnet_link()
+            elapsed = time.monotonic() - started
+        finally:
+            os.environ['PATH'] = original_path
+
+        with open(os.path.join(temp_dir, "child.pid")) as f:
+            child_pid = int(f.read())
+        deadline = time.monotonic() + 2
+        while process_is_alive(child_pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        print(f"Hung probe returned after {elapsed:.2f}s, metrics: {daemon.METRICS}")
+        assert not is_up and not node_state.reachable
+        assert elapsed < 2
+        assert not process_is_alive(child_pid)
+        assert daemon.METRICS['probe_timeouts_total{target="MIM"}'] == 1
+        cached = decnet_probe_cache.lookup_probe(daemon.PROBE_CACHE_PATH, "MIM")
+        assert cached.status == decnet_probe_cache.STATUS_TIMEOUT
+
+def test_failed_probe_is_an_error():
+    """An ncp that exits non-zero fails the probe whatever it printed."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ncp = os.path.join(temp_dir, "ncp")
+        with open(ncp, "w") as f:
+            f.write(FAILING_NCP)
+        os.chmod(ncp, 0o755)
+        daemon.PROBE_CACHE_PATH = os.path.join(temp_dir, "probe-cache.bin")
+
+        original_path = os.environ.get('PATH', '')
+        os.environ['PATH'] = temp_dir + os.pathsep + original_path
+        try:
+            is_up, output, node_state = daemon.check_decnet_link()
+        finally:
+            os.environ['PATH'] = original_path
+
+        assert not is_up and not node_state.reachable
+        assert "%NCP-F-CONNECT" in output
+        assert daemon.METRICS['probe_errors_total{target="MIM"}'] == 1
+        cached = decnet_probe_cache.lookup_probe(daemon.PROBE_CACHE_PATH, "MIM")
+        assert cached.status == decnet_probe_cache.STATUS_ERROR
+
+def test_run_probe_results():
+    """Finished probes return their output; hung ones raise TimeoutExpired."""
+    daemon = load_daemon()
+    result = daemon.run_probe([sys.executable, "-c", "print('reachable')"], timeout=10)
+    assert result.returncode == 0 and result.stdout.strip() == "reachable"
+    try:
+        daemon.run_probe("sleep 30", timeout=0.2)
+        assert False, "run_probe did not time out"
+    except subprocess.TimeoutExpired:
+        pass
+
+def test_background_probes_do_not_pile_up():
+    """Only one job per name is in flight, and finished jobs are collected."""
+    daemon = load_daemon()
+    release = threading.Event()
+    jobs = {}
+    assert daemon.submit_background_probe(jobs, 'sweep', release.wait, 5)
+    assert not daemon.submit_background_probe(jobs, 'sweep', release.wait, 5)
+    assert daemon.METRICS['background_probe_skipped_total{probe="sweep"}'] == 1
+
+    started = time.monotonic()
+    daemon.collect_background_probes(jobs)
+    assert time.monotonic() - started < 0.1 and 'sweep' in jobs
+    release.set()
+    jobs['sweep'].result(timeout=5)
+    daemon.collect_background_probes(jobs)
+    assert jobs == {}
+
+    assert daemon.submit_background_probe(jobs, 'broken', lambda: 1 / 0)
+    jobs['broken'].exception(timeout=5)
+    daemon.collect_background_probes(jobs)
+    assert daemon.METRICS['background_probe_errors_total{probe="broken"}'] == 1
+
+if __name__ == "__main__":
+    print("=== Probe Timeout Test ===")
+    test_hung_probe_is_killed_with_its_group()
+    test_failed_probe_is_an_error()
+    test_run_probe_results()
+    test_background_probes_do_not_pile_up()
+    print("✅ Probes are isolated and bounded")
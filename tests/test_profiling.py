@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for on-demand profiling of the running daemon.
+Sends SIGUSR1 to a daemon loaded in this process and checks that the cProfile
+of the main thread, the sampled stacks of the other threads and the tracemalloc
+snapshot are written, that nothing is traced before or after, and that
+'--profile' only signals a daemon that holds the pidfile lock.
+"""
+
+import os
+import pstats
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from daemon_helpers import load_daemon
+
+# Takes the pidfile lock like the daemon and reports SIGUSR1 on stdout
+FAKE_DAEMON = """
+import fcntl, os, signal, sys, time
+lock_file = open(sys.argv[1], "a+")
+fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+lock_file.truncate(0)
+lock_file.write(f"{os.getpid()}\\n")
+lock_file.flush()
+signal.signal(signal.SIGUSR1, lambda signum, frame: print("profile requested", flush=True))
+print("ready", flush=True)
+time.sleep(10)
+"""
+
+def busy_monitor_cycle(seconds):
+    """Stand-in for the monitor loop: burns CPU on the main thread."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+def background_probe(stop_event):
+    """Stand-in for a background probe thread."""
+    while not stop_event.is_set():
+        sum(range(1000))
+
+def test_signal_writes_profile():
+    """SIGUSR1 profiles the main thread, samples the others and snapshots allocations."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.LOG_DIR = temp_dir
+        daemon.PROFILE_SECONDS = 0.5
+        previous = {sig: signal.getsignal(sig) for sig in (signal.SIGUSR1, signal.SIGALRM)}
+        stop_event = threading.Event()
+        worker = threading.Thread(target=background_probe, args=(stop_event,), name="probe")
+        try:
+            assert daemon.install_profile_handler()
+            worker.start()
+            assert sys.getprofile() is None and not tracemalloc.is_tracing(), "traced before any request"
+
+            os.kill(os.getpid(), signal.SIGUSR1)
+            busy_monitor_cycle(1)
+            deadline = time.monotonic() + 10
+            while daemon.PROFILE['profiler'] is not None and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop_event.set()
+            worker.join()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        assert sys.getprofile() is None and not tracemalloc.is_tracing(), "still traced after the profile"
+        prefixes = {name.split(".")[0] for name in os.listdir(temp_dir)}
+        assert len(prefixes) == 1
+        prefix = os.path.join(temp_dir, prefixes.pop())
+
+        stats = pstats.Stats(f"{prefix}.pstats")
+        assert any(function == "busy_monitor_cycle" for _, _, function in stats.stats), "main thread not profiled"
+        with open(f"{prefix}.collapsed") as f:
+            stacks = [line.rsplit(" ", 1) for line in f.read().splitlines()]
+        assert any(stack.startswith("probe;") and "background_probe" in stack for stack, _ in stacks)
+        assert all(count.isdigit() for _, count in stacks)
+        assert not any("sample_stacks" in stack for stack, _ in stacks), "the profiler sampled itself"
+        tracemalloc.Snapshot.load(f"{prefix}.tracemalloc")
+        assert daemon.METRICS["profiles_total"] == 1
+    print("✅ SIGUSR1 writes a cProfile, collapsed stacks and an allocation snapshot")
+
+def test_prune_profiles():
+    """Only the newest PROFILE_KEEP profiles are kept."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.LOG_DIR = temp_dir
+        for stamp in ("20261019-100000", "20261019-110000", "20261019-120000"):
+            for extension in ("pstats", "collapsed", "tracemalloc"):
+                open(os.path.join(temp_dir, f"profile-{stamp}.{extension}"), "w").close()
+        open(os.path.join(temp_dir, "decnet-status.log"), "w").close()
+        daemon.prune_profiles(keep=2)
+        assert sorted(os.listdir(temp_dir)) == ["decnet-status.log"] + sorted(
+            f"profile-{stamp}.{extension}" for stamp in ("20261019-110000", "20261019-120000")
+            for extension in ("pstats", "collapsed", "tracemalloc"))
+    print("✅ Old profiles are pruned")
+
+def test_profile_request_signals_running_daemon():
+    """--profile signals the process holding the pidfile lock, and nothing without one."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.PIDFILE_PATH = os.path.join(temp_dir, "decnet-daemon.pid")
+        with open(daemon.PIDFILE_PATH, "w") as f:
+            f.write(f"{os.getpid()}\n")  # Stale: nobody holds the lock
+        assert not daemon.request_daemon_profile()
+
+        process = subprocess.Popen([sys.executable, "-c", FAKE_DAEMON, daemon.PIDFILE_PATH],
+                                   stdout=subprocess.PIPE, text=True)
+        try:
+            assert process.stdout.readline().strip() == "ready"
+            assert daemon.request_daemon_profile()
+            assert process.stdout.readline().strip() == "profile requested"
+        finally:
+            process.kill()
+            process.wait()
+    print("✅ --profile only signals a running daemon")
+
+if __name__ == "__main__":
+    print("=== On-demand Profiling Test ===")
+    test_signal_writes_profile()
+    test_prune_profiles()
+    test_profile_request_signals_running_daemon()
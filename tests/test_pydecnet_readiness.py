@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the PyDECNET startup handshake.
+Starts a stand-in 'pydecnet --daemon' that forks like the real one and checks
+that the daemon waits for the API socket and reports the surviving PID (never
+the launcher, unless it listens itself), and that a PyDECNET which never opens
+its socket counts as a failed startup.
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from daemon_helpers import load_daemon
+
+# Forks, lets the parent exit, then listens on the socket after a short delay
+FAKE_PYDECNET = """#!{python}
+import os, socket, sys, time
+if os.fork():
+    sys.exit(0)
+os.setsid()
+time.sleep(0.3)
+if {listen}:
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind({socket_path!r})
+    server.listen(1)
+time.sleep(30)
+"""
+
+# Takes a while to fork; its socket is already being listened on by someone else
+SLOW_FORK_PYDECNET = """#!{python}
+import os, sys, time
+time.sleep(0.5)
+if os.fork():
+    sys.exit(0)
+os.setsid()
+time.sleep(30)
+"""
+
+# Does not daemonize: the launcher itself listens on the socket
+FOREGROUND_PYDECNET = """#!{python}
+import socket, time
+time.sleep(0.3)
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind({socket_path!r})
+server.listen(1)
+time.sleep(30)
+"""
+
+def start_fake_pydecnet(temp_dir, listen, script=FAKE_PYDECNET):
+    """Point a fresh daemon module at a fake PyDECNET and start it."""
+    daemon = load_daemon()
+    daemon.SOCKET_PATH = os.path.join(temp_dir, "decnetapi.sock")
+    daemon.PYDECNET_BIN = os.path.join(temp_dir, "pydecnet")
+    daemon.LOG_INFO_PATH = os.path.join(temp_dir, "info.log")
+    daemon.LOG_ERROR_PATH = os.path.join(temp_dir, "error.log")
+    daemon.STARTUP_TIMEOUT = 3
+    with open(daemon.PYDECNET_BIN, "w") as f:
+        f.write(script.format(python=sys.executable, listen=listen,
+                              socket_path=daemon.SOCKET_PATH))
+    os.chmod(daemon.PYDECNET_BIN, 0o755)
+
+    started = time.monotonic()
+    pid = daemon.start_pydecnet()
+    return daemon, pid, time.monotonic() - started
+
+def cleanup(daemon):
+    """Kill any fake PyDECNET left running."""
+    for pid in daemon.find_pydecnet_pids():
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+def test_ready_pydecnet():
+    """The surviving daemonized PID is reported once the socket accepts connections."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon, pid, elapsed = start_fake_pydecnet(temp_dir, listen=True)
+        try:
+            print(f"Ready PID: {pid} after {elapsed:.2f}s, metrics: {daemon.METRICS}")
+            assert pid is not None
+            assert daemon.find_pydecnet_pids() == [pid]
+            assert daemon.METRICS["pydecnet_ready"] == 1
+            assert 0.2 < daemon.METRICS["pydecnet_startup_seconds"] < 3
+        finally:
+            cleanup(daemon)
+
+def test_never_ready_pydecnet():
+    """A PyDECNET that never opens its socket is a failed startup after the timeout."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon, pid, elapsed = start_fake_pydecnet(temp_dir, listen=False)
+        try:
+            print(f"Never-ready result: {pid} after {elapsed:.2f}s, metrics: {daemon.METRICS}")
+            assert pid is None
+            assert 3 <= elapsed < 5
+            assert daemon.METRICS["pydecnet_ready"] == 0
+            assert daemon.METRICS["pydecnet_startup_failures_total"] == 1
+        finally:
+            cleanup(daemon)
+
+def test_launcher_is_not_taken_for_the_daemon():
+    """While the launcher has not forked yet, a socket that answers is not enough."""
+    import socket
+    with tempfile.TemporaryDirectory() as temp_dir:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(os.path.join(temp_dir, "decnetapi.sock"))
+        listener.listen(1)
+        try:
+            daemon, pid, elapsed = start_fake_pydecnet(temp_dir, listen=False, script=SLOW_FORK_PYDECNET)
+            try:
+                print(f"Slow fork PID: {pid} after {elapsed:.2f}s")
+                assert pid is not None and elapsed >= 0.5
+                assert daemon.find_pydecnet_pids() == [pid], "the exited launcher was reported"
+            finally:
+                cleanup(daemon)
+        finally:
+            listener.close()
+
+def test_foreground_pydecnet():
+    """A launcher that listens on the socket itself is the PyDECNET process."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon, pid, elapsed = start_fake_pydecnet(temp_dir, listen=True, script=FOREGROUND_PYDECNET)
+        try:
+            print(f"Foreground PID: {pid} after {elapsed:.2f}s")
+            assert pid is not None
+            assert daemon.find_pydecnet_pids() == [pid]
+            assert daemon.METRICS["pydecnet_ready"] == 1
+        finally:
+            cleanup(daemon)
+
+if __name__ == "__main__":
+    print("=== PyDECNET Readiness Test ===")
+    test_ready_pydecnet()
+    test_never_ready_pydecnet()
+    test_launcher_is_not_taken_for_the_daemon()
+    test_foreground_pydecnet()
+    print("✅ PyDECNET readiness detection works")
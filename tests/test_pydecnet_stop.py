@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for stopping PyDECNET.
+Verifies that only the supervised PIDs are signalled, that a cooperative
+process exits on SIGTERM and that a stuck one is escalated to SIGKILL.
+"""
+
+import subprocess
+import sys
+import time
+
+from daemon_helpers import load_daemon
+
+IGNORE_SIGTERM = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(60)"
+COOPERATIVE = "import time; print('ready', flush=True); time.sleep(60)"
+
+def spawn(code):
+    """Start a child Python process and wait until it has installed its handlers."""
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()
+    return proc
+
+def test_graceful_and_forced_stop():
+    """SIGTERM stops cooperative processes; stuck ones are killed after the timeout."""
+    daemon = load_daemon()
+    cooperative = spawn(COOPERATIVE)
+    stuck = spawn(IGNORE_SIGTERM)
+    bystander = spawn(COOPERATIVE)
+    try:
+        started = time.monotonic()
+        statuses = daemon.stop_pydecnet([cooperative.pid, stuck.pid], timeout=1)
+        elapsed = time.monotonic() - started
+        print(f"Statuses: {statuses} in {elapsed:.2f}s")
+
+        assert statuses[cooperative.pid] == "exited with status -15"
+        assert statuses[stuck.pid] == "exited with status -9" or statuses[stuck.pid] == "killed"
+        assert 1 <= elapsed < 3
+        assert daemon.METRICS["pydecnet_forced_kills_total"] == 1
+        # Processes that are not supervised are never touched
+        assert bystander.poll() is None
+    finally:
+        for proc in (cooperative, stuck, bystander):
+            proc.kill()
+            proc.wait()
+
+def test_pydecnet_cmdline_matching():
+    """Only processes that execute the PyDECNET binary are treated as PyDECNET."""
+    daemon = load_daemon()
+    daemon.PYDECNET_BIN = "/home/user/hecnet/bin/pydecnet"
+    assert daemon.runs_pydecnet_bin(["/home/user/hecnet/bin/pydecnet", "--daemon"])
+    assert daemon.runs_pydecnet_bin(["/usr/bin/python3", "/home/user/hecnet/bin/pydecnet", "--daemon"])
+    assert not daemon.runs_pydecnet_bin(["vim", "/home/user/hecnet/bin/pydecnet"])
+    assert not daemon.runs_pydecnet_bin(["python3", "decnet-status.py"])
+    print("✓ Command line matching only selects the PyDECNET binary")
+
+if __name__ == "__main__":
+    print("=== PyDECNET Stop Test ===")
+    test_graceful_and_forced_stop()
+    test_pydecnet_cmdline_matching()
+    print("✅ PyDECNET stop is graceful and targeted")
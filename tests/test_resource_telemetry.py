@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for PyDECNET resource telemetry.
+Reads real /proc data, fits trends to simulated samples and verifies that a
+steady leak is reported once (also with short cycles) and leads to a planned
+restart in quiet hours, while a noisy but flat process is left alone.
+"""
+
+import os
+import random
+
+from daemon_helpers import FakeClock, load_daemon
+
+MB = 1024 * 1024
+
+def simulate(daemon, rss_at, hours=2, step=60, link_up=True):
+    """Sample a fake PyDECNET every `step` seconds; return (alerts, restarts)."""
+    clock = FakeClock()
+    daemon.time = clock
+    alerts, restarts = [], []
+    daemon.send_notification = lambda subject, body: alerts.append(subject)
+    daemon.restart_pydecnet = lambda instance=None: restarts.append(clock.now) or 4321
+    telemetry = daemon.new_telemetry_state()
+    link_state = {'confirmed_up': link_up, 'last_result': link_up, 'streak': 1}
+    start = clock.now
+    while clock.now - start <= hours * 3600:
+        elapsed = clock.now - start
+        daemon.read_process_resources = lambda pid: {
+            'rss_bytes': int(rss_at(elapsed)), 'open_fds': 12, 'threads': 3, 'cpu_seconds': elapsed / 100}
+        daemon.sample_pydecnet_resources(telemetry, 1234)
+        daemon.check_resource_trends(telemetry, link_state)
+        clock.now += step
+    return alerts, restarts
+
+def test_read_process_resources():
+    """The /proc reader reports this test's own process."""
+    daemon = load_daemon()
+    resources = daemon.read_process_resources(os.getpid())
+    print(f"Own resources: {resources}")
+    assert resources['rss_bytes'] > MB and resources['open_fds'] > 0 and resources['threads'] >= 1
+    assert resources['cpu_seconds'] > 0
+    assert daemon.read_process_resources(2 ** 22 + 1) is None
+
+def test_fit_trend():
+    """A straight line is fitted exactly; noise has a poor fit."""
+    daemon = load_daemon()
+    slope, r2 = daemon.fit_trend([(t, 5 + 2 * t) for t in range(10)])
+    assert abs(slope - 2) < 1e-9 and abs(r2 - 1) < 1e-9
+    rng = random.Random(1)
+    _, r2 = daemon.fit_trend([(t, rng.random()) for t in range(100)])
+    assert r2 < 0.2
+
+def test_leak_alert_and_planned_restart():
+    """A steady 20 MB/hour leak alerts once and restarts PyDECNET only in quiet hours."""
+    daemon = load_daemon()
+    daemon.LEAK_RESTART = True
+    daemon.in_quiet_hours = lambda hour=None: False
+    leak = lambda elapsed: 100 * MB + 20 * MB * elapsed / 3600
+    alerts, restarts = simulate(daemon, leak)
+    print(f"Outside quiet hours: alerts {alerts}, restarts {len(restarts)}")
+    assert alerts == ["PyDECNET resource usage is growing"]
+    assert restarts == []
+    assert daemon.METRICS["pydecnet_resource_leak"] == 1
+    assert 19 * MB < daemon.METRICS["pydecnet_rss_growth_bytes_per_hour"] < 21 * MB
+
+    daemon.in_quiet_hours = lambda hour=None: True
+    alerts, restarts = simulate(daemon, leak)
+    print(f"In quiet hours: alerts {alerts}, restarts {len(restarts)}")
+    assert len(restarts) == 1
+    assert alerts == ["PyDECNET resource usage is growing", "Planned PyDECNET restart"]
+
+    # Never during an outage, unless the memory limit is close
+    alerts, restarts = simulate(daemon, leak, link_up=False)
+    assert restarts == []
+    daemon.in_quiet_hours = lambda hour=None: False
+    daemon.PYDECNET_RSS_LIMIT_MB = 150
+    alerts, restarts = simulate(daemon, leak, link_up=False)
+    assert len(restarts) == 1
+
+def test_short_cycles_still_detect_leaks():
+    """With 5 second cycles the window still spans TELEMETRY_MIN_SPAN, so a leak is found."""
+    daemon = load_daemon()
+    alerts, _ = simulate(daemon, lambda elapsed: 100 * MB + 20 * MB * elapsed / 3600, step=5)
+    print(f"Short cycles: alerts {alerts}")
+    assert alerts == ["PyDECNET resource usage is growing"]
+    assert 'pydecnet_cpu_percent' in daemon.METRICS
+
+def test_noisy_flat_process_is_not_a_leak():
+    """RSS that moves around without trending up does not alert."""
+    daemon = load_daemon()
+    rng = random.Random(7)
+    alerts, restarts = simulate(daemon, lambda elapsed: 100 * MB + rng.randint(-20, 20) * MB)
+    print(f"Noisy process: alerts {alerts}")
+    assert alerts == [] and restarts == []
+    assert daemon.METRICS["pydecnet_resource_leak"] == 0
+
+def test_quiet_hours():
+    """Quiet hour windows may wrap around midnight."""
+    daemon = load_daemon()
+    daemon.LEAK_RESTART_HOURS = "3-5"
+    assert [daemon.in_quiet_hours(hour) for hour in (2, 3, 4, 5)] == [False, True, True, False]
+    daemon.LEAK_RESTART_HOURS = "23-2"
+    assert [daemon.in_quiet_hours(hour) for hour in (22, 23, 0, 1, 2)] == [False, True, True, True, False]
+
+if __name__ == "__main__":
+    print("=== Resource Telemetry Test ===")
+    test_read_process_resources()
+    test_fit_trend()
+    test_leak_alert_and_planned_restart()
+    test_short_cycles_still_detect_leaks()
+    test_noisy_flat_process_is_not_a_leak()
+    test_quiet_hours()
+    print("✅ Resource telemetry behaves as expected")
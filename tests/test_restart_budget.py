@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the PyDECNET restart budget.
+Simulates a PyDECNET that never stays up, or crashes soon after becoming
+ready, and verifies the token bucket, the exponential backoff, the single
+crash-loop alert and launch log rotation.
+"""
+
+import os
+import tempfile
+
+from daemon_helpers import FakeClock, load_daemon
+
+def test_crash_loop_budget():
+    """A crash-looping PyDECNET is restarted a bounded number of times with one alert."""
+    daemon = load_daemon()
+    clock = FakeClock()
+    daemon.time = clock
+    daemon.RESTART_BURST = 3
+    daemon.RESTART_REFILL_SECONDS = 600
+    daemon.RESTART_BACKOFF_BASE = 30
+    daemon.RESTART_BACKOFF_MAX = 120
+
+    restarts = []
+    alerts = []
+    daemon.restart_pydecnet = lambda instance=None: restarts.append(clock.now)
+    daemon.send_notification = lambda subject, body: alerts.append(subject)
+
+    state = daemon.new_restart_state()
+    # PyDECNET is missing on every 5 second cycle for 12.5 minutes
+    for _ in range(150):
+        daemon.supervise_restart(state)
+        clock.now += 5
+
+    gaps = [later - earlier for earlier, later in zip(restarts, restarts[1:])]
+    print(f"Restarts: {len(restarts)}, gaps: {gaps}, alerts: {alerts}")
+    assert len(restarts) == 4  # Burst of 3 plus one token refilled after 600 seconds
+    assert gaps[:2] == [30, 60]
+    assert alerts == ["PyDECNET is crash-looping"]
+    assert state['crash_loop']
+
+    clock.now = restarts[-1] + daemon.RESTART_STABLE_SECONDS
+    daemon.record_pydecnet_running(state)
+    assert not state['crash_loop'] and state['attempts'] == 0
+
+def test_crash_after_ready_loop():
+    """A PyDECNET that comes up and crashes a minute later still exhausts the budget."""
+    daemon = load_daemon()
+    clock = FakeClock()
+    daemon.time = clock
+    daemon.RESTART_BURST = 3
+    daemon.RESTART_REFILL_SECONDS = 600
+    daemon.RESTART_BACKOFF_BASE = 30
+    daemon.RESTART_BACKOFF_MAX = 120
+    daemon.RESTART_STABLE_SECONDS = 300
+
+    restarts = []
+    alerts = []
+    daemon.restart_pydecnet = lambda instance=None: restarts.append(clock.now)
+    daemon.send_notification = lambda subject, body: alerts.append(subject)
+
+    state = daemon.new_restart_state()
+    running_until = None
+    # Every restart is seen healthy for 60 seconds of 5 second cycles, then it crashes
+    for _ in range(150):
+        if running_until is not None and clock.now < running_until:
+            daemon.record_pydecnet_running(state)
+        elif daemon.supervise_restart(state):
+            running_until = clock.now + 60
+        clock.now += 5
+
+    gaps = [later - earlier for earlier, later in zip(restarts, restarts[1:])]
+    print(f"Crash-after-ready restarts: {len(restarts)}, gaps: {gaps}, alerts: {alerts}")
+    assert len(restarts) == 4
+    assert gaps[:2] == [60, 60] and gaps[2] > 120, "the backoff was reset by a short healthy run"
+    assert alerts == ["PyDECNET is crash-looping"]
+    assert state['crash_loop']
+
+def test_launch_log_rotation():
+    """Each start attempt keeps the previous output as path.1, path.2, ..."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "decnet-status-error.log")
+        for attempt in range(5):
+            daemon.rotate_log_file(path, keep=3)
+            with open(path, "w") as f:
+                f.write(f"attempt {attempt}\n")
+
+        kept = sorted(os.listdir(temp_dir))
+        print(f"Kept log files: {kept}")
+        assert kept == ["decnet-status-error.log", "decnet-status-error.log.1",
+                        "decnet-status-error.log.2", "decnet-status-error.log.3"]
+        with open(f"{path}.3") as f:
+            assert f.read() == "attempt 1\n"
+
+if __name__ == "__main__":
+    print("=== PyDECNET Restart Budget Test ===")
+    test_crash_loop_budget()
+    test_crash_after_ready_loop()
+    test_launch_log_rotation()
+    print("✅ Restart budget behaves as expected")
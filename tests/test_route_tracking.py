@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for route-change tracking.
+Feeds a sequence of parsed node states to the tracker and verifies that route
+changes are confirmed before they are reported, that repeated routes are not
+reported twice and that route-change emails are rate limited.
+"""
+
+from daemon_helpers import load_daemon
+
+import decnet_ncp
+
+def node(next_node, cost=5, hops=2, reachable=True):
+    """Build a NodeState with the given route."""
+    return decnet_ncp.EMPTY_NODE_STATE._replace(
+        address="1.13", name="MIM", state="reachable" if reachable else "unreachable",
+        reachable=reachable, next_node=next_node, cost=cost, hops=hops, circuit="TCP-0-0")
+
+def test_changes_are_confirmed_and_deduplicated():
+    """A route must be seen twice in a row, and the same route is never reported again."""
+    daemon = load_daemon()
+    daemon.ROUTE_CONFIRM_COUNT = 2
+    routes = {}
+    sequence = [node("2.10 (GW)"), node("2.10 (GW)"),
+                node("2.20 (BRIDGE)"),                       # A single odd probe is not a change
+                node("2.10 (GW)"),
+                node("2.20 (BRIDGE)"), node("2.20 (BRIDGE)"), node("2.20 (BRIDGE)"),
+                node(None, reachable=False),                 # Outages belong to the link state
+                node("2.20 (BRIDGE)", cost=9), node("2.20 (BRIDGE)", cost=9)]
+    changes = [daemon.track_route(routes, "MIM", state) for state in sequence]
+    changes = [change for change in changes if change]
+
+    print(f"Route changes: {changes}")
+    assert changes == [
+        (("2.10 (GW)", 5, 2, "TCP-0-0"), ("2.20 (BRIDGE)", 5, 2, "TCP-0-0")),
+        (("2.20 (BRIDGE)", 5, 2, "TCP-0-0"), ("2.20 (BRIDGE)", 9, 2, "TCP-0-0")),
+    ]
+    assert len(routes["MIM"]["history"]) == 2
+
+def test_history_is_bounded():
+    """Per-target history keeps only the most recent changes."""
+    daemon = load_daemon()
+    daemon.ROUTE_CONFIRM_COUNT = 1
+    daemon.ROUTE_HISTORY_SIZE = 4
+    routes = {}
+    for cost in range(20):
+        daemon.track_route(routes, "MIM", node("2.10 (GW)", cost=cost))
+    history = routes["MIM"]["history"]
+    print(f"History length: {len(history)}")
+    assert len(history) == 4
+    assert history[-1][2][1] == 19
+
+def test_route_emails_are_rate_limited():
+    """Only the first change in ROUTE_NOTIFY_INTERVAL is emailed; metrics count all of them."""
+    daemon = load_daemon()
+    daemon.ROUTE_CONFIRM_COUNT = 1
+    daemon.ROUTE_NOTIFY_INTERVAL = 3600
+    emails = []
+    daemon.send_notification = lambda subject, body: emails.append((subject, body))
+    routes = {}
+    daemon.track_route(routes, "MIM", node("2.10 (GW)"))
+    for next_node in ["2.20 (BRIDGE)", "2.10 (GW)", "2.20 (BRIDGE)"]:
+        change = daemon.track_route(routes, "MIM", node(next_node))
+        daemon.report_route_change(routes, "MIM", *change)
+
+    print(f"Emails: {[subject for subject, _ in emails]}, metrics: {daemon.METRICS}")
+    assert [subject for subject, _ in emails] == ["Route to MIM changed"]
+    assert daemon.METRICS['route_changes_total{target="MIM"}'] == 3
+    assert routes["MIM"]["suppressed"] == 2
+
+if __name__ == "__main__":
+    print("=== Route Tracking Test ===")
+    test_changes_are_confirmed_and_deduplicated()
+    test_history_is_bounded()
+    test_route_emails_are_rate_limited()
+    print("✅ Route changes are tracked as expected")
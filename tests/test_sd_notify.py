@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the systemd notify integration.
+Binds a local datagram socket as a stand-in for systemd's $NOTIFY_SOCKET and
+checks the READY/STATUS/WATCHDOG messages the daemon sends.
+"""
+
+import os
+import socket
+import tempfile
+import time
+
+from daemon_helpers import load_daemon
+
+def receive_all(sock):
+    """Return every datagram waiting on sock."""
+    messages = []
+    sock.setblocking(False)
+    while True:
+        try:
+            messages.append(sock.recv(4096).decode('utf-8'))
+        except BlockingIOError:
+            return messages
+
+def with_notify_socket(address, test):
+    """Run test(daemon, sock) with NOTIFY_SOCKET pointing at a local datagram socket."""
+    daemon = load_daemon()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(address.replace('@', '\0', 1) if address.startswith('@') else address)
+    saved = {key: os.environ.get(key) for key in ('NOTIFY_SOCKET', 'WATCHDOG_USEC', 'WATCHDOG_PID')}
+    os.environ['NOTIFY_SOCKET'] = address
+    try:
+        test(daemon, sock)
+    finally:
+        sock.close()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def test_status_messages():
+    """READY and STATUS reach the socket, including the daemon's own state."""
+    def check(daemon, sock):
+        link_state = daemon.new_link_state()
+        restart_state = daemon.new_restart_state()
+        daemon.update_link_state(link_state, True, "output")
+        restart_state['total_restarts'] = 2
+
+        assert daemon.sd_notify("READY=1")
+        assert daemon.sd_notify(f"STATUS={daemon.format_daemon_status(link_state, restart_state)}")
+        messages = receive_all(sock)
+        print(f"Received: {messages}")
+        assert messages[0] == "READY=1"
+        assert messages[1] == f"STATUS=Link to {daemon.TARGET_HOST} up (last probe up), PyDECNET restarts: 2"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with_notify_socket(os.path.join(temp_dir, "notify.sock"), check)
+
+def test_abstract_socket_and_watchdog():
+    """Watchdog pings keep coming while the daemon sleeps between healthy cycles."""
+    def check(daemon, sock):
+        os.environ['WATCHDOG_USEC'] = "200000"
+        os.environ['WATCHDOG_PID'] = str(os.getpid())
+        assert daemon.watchdog_interval() == 0.2
+
+        started = time.monotonic()
+        daemon.sleep_with_watchdog(0.5)
+        elapsed = time.monotonic() - started
+        pings = [message for message in receive_all(sock) if message == "WATCHDOG=1"]
+        print(f"Watchdog pings during {elapsed:.2f}s sleep: {len(pings)}")
+        assert 0.5 <= elapsed < 0.8
+        assert len(pings) >= 4
+
+        # The watchdog belongs to another process: no pings expected
+        os.environ['WATCHDOG_PID'] = "1"
+        assert daemon.watchdog_interval() is None
+
+    with_notify_socket(f"@hecnet-notify-test-{os.getpid()}", check)
+
+def test_without_systemd():
+    """Outside systemd, notifications are a silent no-op."""
+    daemon = load_daemon()
+    saved = os.environ.pop('NOTIFY_SOCKET', None)
+    try:
+        assert not daemon.sd_notify("READY=1")
+    finally:
+        if saved is not None:
+            os.environ['NOTIFY_SOCKET'] = saved
+
+if __name__ == "__main__":
+    print("=== systemd Notify Test ===")
+    test_status_messages()
+    test_abstract_socket_and_watchdog()
+    test_without_systemd()
+    print("✅ systemd notifications work")
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Offline simulation harness for the HECNET daemon.
+
+Copies the scripts into a temporary installation and replaces everything the
+daemon talks to with local stand-ins:
+
+  * ncp      - a script on PATH that answers up, down or slow, as the scenario says
+  * pydecnet - a stub that forks like the real one, opens the API socket and
+               crashes (or refuses to start) on command
+  * SMTP     - a local mail sink that records every notification
+  * HTTP     - a local server for the hecnod node list
+
+The daemon's monitoring cycles are then driven in accelerated time: the sleeps
+between cycles are skipped on a virtual clock, and sleeps inside a cycle (such
+as waiting for PyDECNET to become ready) run SPEEDUP times faster. The report
+lists alert counts, restart latency, CPU time and I/O. Crashes are injected
+right before a cycle, so the restart latency is the time from detection to a
+ready PyDECNET; on average a real crash waits another half probe interval.
+
+    python tests/test_simulation.py --cycles 5000 [--json]
+"""
+
+import argparse
+import email
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import signal
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["decnet-daemon.py", "decnet-name-update.py", "decnet_counters.py", "decnet_ncp.py", "decnet_nodedb.py",
+           "decnet_probe_cache.py", "decnet_scheduler.py", "decnet_sweep.py"]
+SPEEDUP = 10  # In-cycle sleeps run this many times faster than real time
+TARGET_HOST = "MIM"
+
+FAKE_NCP = """#!/bin/sh
+mode=$(cat {control}/ncp-mode 2>/dev/null)
+case "$mode" in
+  down)
+    echo "Node 1.13 (MIM) Unreachable"
+    exit 0 ;;
+  slow)
+    sleep 0.2 ;;
+esac
+echo "Remote node = 1.13 (MIM)"
+echo "State = reachable"
+echo "Hops = 2, Cost = 5, Circuit = TCP-0-0, Next node = 2.10 (GW)"
+"""
+
+# Forks like 'pydecnet --daemon', listens on the API socket and exits when told to
+FAKE_PYDECNET = """#!{python}
+import os, socket, sys, time
+control = {control!r}
+if os.path.exists(os.path.join(control, "fail-start")):
+    sys.exit(1)
+if os.fork():
+    sys.exit(0)
+os.setsid()
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind({socket_path!r})
+server.listen(8)
+crash = os.path.join(control, "crash")
+while not os.path.exists(crash):
+    time.sleep(0.02)
+os.remove(crash)
+server.close()  # Leaves a stale socket behind, like a real crash
+os._exit(1)
+"""
+
+NODE_LIST = "".join(f"{area}.{number} (N{area}X{number})\n" for area in range(1, 11) for number in range(1, 21))
+
+class SimClock:
+    """Virtual clock: real time plus the time skipped by advance() and accelerated sleeps."""
+    def __init__(self, speedup=SPEEDUP):
+        self.speedup = speedup
+        self.skipped = 0.0
+        self.epoch = time.time()
+        self.real_start = time.monotonic()
+
+    def monotonic(self):
+        return time.monotonic() + self.skipped
+
+    def time(self):
+        return self.epoch + (time.monotonic() - self.real_start) + self.skipped
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speedup)
+            self.skipped += seconds * (1 - 1 / self.speedup)
+
+    def advance(self, seconds):
+        self.skipped += max(seconds, 0)
+
+def make_sim_datetime(clock):
+    """Return a datetime class whose now() follows the virtual clock."""
+    class SimDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromtimestamp(clock.time(), tz)
+    return SimDatetime
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Just enough SMTP to accept the daemon's notifications."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.messages = []
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 sim ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-sim")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    data.append(data_line)
+                self.server.messages.append(email.message_from_bytes(b"".join(data)))
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+class HecnodHandler(BaseHTTPRequestHandler):
+    """Serves the node list and counts the downloads."""
+    def do_GET(self):
+        self.server.downloads += 1
+        body = NODE_LIST.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(server):
+    """Serve in a background thread and return the server."""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def default_scenario(cycles):
+    """Return the default scenario, scaled to roughly `cycles` monitoring cycles.
+
+    Each step runs `cycles` cycles with ncp in the given mode; `crash` kills
+    PyDECNET before the step and `fail_start` makes restarts fail during it.
+    """
+    unit = max(cycles // 20, 5)
+    return [
+        {'cycles': 3 * unit, 'ncp': 'up'},
+        {'cycles': unit, 'ncp': 'down'},                        # Outage: one down and one up alert
+        {'cycles': 2 * unit, 'ncp': 'up'},
+        {'cycles': unit, 'ncp': 'slow'},
+        {'cycles': 2 * unit, 'ncp': 'up', 'crash': True},       # PyDECNET crashes and is restarted
+        {'cycles': unit, 'ncp': 'down'},                        # Second outage
+        {'cycles': 2 * unit, 'ncp': 'up', 'crash': True},
+        {'cycles': 3 * unit, 'ncp': 'up', 'crash': True, 'fail_start': True},  # Crash loop: one alert
+        {'cycles': 4 * unit, 'ncp': 'up'},
+    ]
+
+def write_config(install_dir, smtp_port, http_port, pydecnet_bin):
+    """Write the pyvenv.cfg of the simulated installation."""
+    settings = {
+        'hecnet_sender_email': 'daemon@sim.invalid',
+        'hecnet_sender_password': 'secret',
+        'hecnet_receiver_email': 'operator@sim.invalid',
+        'hecnet_target_host': TARGET_HOST,
+        'hecnet_pydecnet_bin': pydecnet_bin,
+        'hecnet_smtp_host': '127.0.0.1',
+        'hecnet_smtp_port': smtp_port,
+        'hecnet_smtp_starttls': 'false',
+        'hecnet_node_list_urls': f"http://127.0.0.1:{http_port}/hecnod",
+        'hecnet_node_list_retries': 0,
+        'hecnet_name_update_interval': 720,
+        'hecnet_restart_refill_seconds': 3600,
+        'hecnet_startup_timeout': 10,
+    }
+    with open(os.path.join(install_dir, "pyvenv.cfg"), "w") as f:
+        for key, value in settings.items():
+            f.write(f"{key} = {value}\n")
+
+def load_daemon(install_dir):
+    """Load the daemon of the simulated installation as a module."""
+    sys.path.insert(0, install_dir)
+    try:
+        spec = importlib.util.spec_from_file_location("decnet_daemon_sim", os.path.join(install_dir, "decnet-daemon.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(install_dir)
+    return module
+
+def read_proc_io():
+    """Return this process's read and written bytes from /proc, or None where unavailable."""
+    try:
+        with open("/proc/self/io") as f:
+            values = dict(line.split(":") for line in f)
+        return {key: int(values[key]) for key in ("rchar", "wchar")}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def directory_size(path):
+    """Return the total size in bytes of the files below path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def wait_for_exit(daemon, timeout=2.0):
+    """Wait (in real time) until no stub PyDECNET is running."""
+    deadline = time.monotonic() + timeout
+    while daemon.find_pydecnet_pids() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def run_cycles(daemon, state, clock, control_dir, scenario):
+    """Drive the daemon through the scenario and return the raw measurements."""
+    stats = {'cycles': 0, 'restart_latencies': [], 'crashes': 0}
+    link_state_up = []
+    for step in scenario:
+        with open(os.path.join(control_dir, "ncp-mode"), "w") as f:
+            f.write(step['ncp'])
+        fail_start = os.path.join(control_dir, "fail-start")
+        if step.get('fail_start'):
+            open(fail_start, "w").close()
+        elif os.path.exists(fail_start):
+            os.remove(fail_start)
+
+        crashed_at = None
+        restarts_before = daemon.METRICS.get("pydecnet_restarts_total", 0)
+        if step.get('crash') and daemon.find_pydecnet_pids():
+            open(os.path.join(control_dir, "crash"), "w").close()
+            wait_for_exit(daemon)
+            crashed_at = clock.monotonic()
+            stats['crashes'] += 1
+
+        for _ in range(step['cycles']):
+            is_up = daemon.monitor_cycle(state)
+            stats['cycles'] += 1
+            link_state_up.append(state['link']['confirmed_up'])
+            if (crashed_at is not None and daemon.METRICS.get("pydecnet_restarts_total", 0) > restarts_before
+                    and daemon.METRICS.get("pydecnet_ready") == 1):
+                stats['restart_latencies'].append(clock.monotonic() - crashed_at)
+                crashed_at = None
+            interval = daemon.next_probe_interval(is_up, state['link']['streak'])
+            daemon.write_metrics()
+            clock.advance(interval)
+    stats['link_transitions'] = sum(1 for previous, current in zip(link_state_up, link_state_up[1:])
+                                    if previous is not None and previous != current)
+    return stats
+
+def simulate(scenario, speedup=SPEEDUP):
+    """Run a scenario against a fresh simulated installation and return the report."""
+    temp_dir = tempfile.mkdtemp(prefix="hecnet-sim-")
+    install_dir = os.path.join(temp_dir, "install")
+    control_dir = os.path.join(temp_dir, "control")
+    bin_dir = os.path.join(temp_dir, "bin")
+    for path in (install_dir, control_dir, bin_dir):
+        os.makedirs(path)
+    for filename in SCRIPTS:
+        shutil.copy(os.path.join(SCRIPT_DIR, filename), install_dir)
+
+    socket_path = os.path.join(temp_dir, "decnetapi.sock")
+    pydecnet_bin = os.path.join(bin_dir, "pydecnet")
+    with open(os.path.join(bin_dir, "ncp"), "w") as f:
+        f.write(FAKE_NCP.format(control=control_dir))
+    with open(pydecnet_bin, "w") as f:
+        f.write(FAKE_PYDECNET.format(python=sys.executable, control=control_dir, socket_path=socket_path))
+    for path in (os.path.join(bin_dir, "ncp"), pydecnet_bin):
+        os.chmod(path, 0o755)
+
+    smtp = start_server(SmtpSink())
+    http = ThreadingHTTPServer(("127.0.0.1", 0), HecnodHandler)
+    http.daemon_threads = True
+    http.downloads = 0
+    start_server(http)
+    write_config(install_dir, smtp.server_address[1], http.server_address[1], pydecnet_bin)
+
+    saved_env = {key: os.environ.get(key) for key in ("PATH", "HOME", "NOTIFY_SOCKET")}
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+    os.environ['HOME'] = temp_dir
+    os.environ.pop('NOTIFY_SOCKET', None)
+    saved_stdout = os.dup(1)
+    daemon = None
+    try:
+        daemon = load_daemon(install_dir)
+        clock = SimClock(speedup)
+        daemon.time = clock
+        daemon.datetime = make_sim_datetime(clock)
+        daemon.SOCKET_PATH = socket_path
+        daemon.ensure_directories()
+        state = daemon.new_monitor_state()
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        io_before = read_proc_io()
+        real_start, virtual_start = time.monotonic(), clock.monotonic()
+
+        # The daemon logs to stdout as well as its log file; keep the harness output readable
+        with open(os.devnull, "w") as devnull:
+            sys.stdout.flush()
+            os.dup2(devnull.fileno(), 1)
+            try:
+                stats = run_cycles(daemon, state, clock, control_dir, scenario)
+            finally:
+                sys.stdout.flush()
+                os.dup2(saved_stdout, 1)
+
+        real_seconds = time.monotonic() - real_start
+        virtual_seconds = clock.monotonic() - virtual_start
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        io_after = read_proc_io()
+        time.sleep(0.2)  # Let the mail sink finish the last message
+
+        subjects = {}
+        for message in smtp.messages:
+            subjects[message['Subject']] = subjects.get(message['Subject'], 0) + 1
+        latencies = stats['restart_latencies']
+        return {
+            'cycles': stats['cycles'],
+            'virtual_seconds': round(virtual_seconds, 1),
+            'real_seconds': round(real_seconds, 2),
+            'acceleration': round(virtual_seconds / real_seconds, 1) if real_seconds else None,
+            'alerts': {'total': len(smtp.messages), 'by_subject': subjects},
+            'link_transitions': stats['link_transitions'],
+            'crashes': stats['crashes'],
+            'restarts': daemon.METRICS.get("pydecnet_restarts_total", 0),
+            'restart_latency_seconds': {
+                'count': len(latencies),
+                'min': round(min(latencies), 2) if latencies else None,
+                'max': round(max(latencies), 2) if latencies else None,
+                'average': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            },
+            'name_list_downloads': http.downloads,
+            'cpu_seconds': {
+                'daemon': round(usage.ru_utime + usage.ru_stime - usage_before.ru_utime - usage_before.ru_stime, 2),
+                'children': round(children.ru_utime + children.ru_stime
+                                  - children_before.ru_utime - children_before.ru_stime, 2),
+            },
+            'io': {
+                'bytes_read': io_after['rchar'] - io_before['rchar'] if io_before and io_after else None,
+                'bytes_written': io_after['wchar'] - io_before['wchar'] if io_before and io_after else None,
+                'block_reads': usage.ru_inblock - usage_before.ru_inblock,
+                'block_writes': usage.ru_oublock - usage_before.ru_oublock,
+                'log_directory_bytes': directory_size(daemon.LOG_DIR),
+            },
+        }
+    finally:
+        os.close(saved_stdout)
+        if daemon is not None:
+            for pid in daemon.find_pydecnet_pids():
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        smtp.shutdown()
+        http.shutdown()
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def print_report(report):
+    """Print a simulation report."""
+    print(f"Cycles:            {report['cycles']} ({report['virtual_seconds'] / 3600:.1f} simulated hours "
+          f"in {report['real_seconds']:.1f} s, {report['acceleration']}x)")
+    print(f"Alerts:            {report['alerts']['total']}")
+    for subject, count in sorted(report['alerts']['by_subject'].items()):
+        print(f"  {count:>4}  {subject}")
+    print(f"Link transitions:  {report['link_transitions']}")
+    latency = report['restart_latency_seconds']
+    print(f"PyDECNET crashes:  {report['crashes']}, restarts: {report['restarts']}, "
+          f"restart latency min/avg/max {latency['min']}/{latency['average']}/{latency['max']} s")
+    print(f"Node list fetches: {report['name_list_downloads']}")
+    print(f"CPU time:          daemon {report['cpu_seconds']['daemon']} s, "
+          f"stand-ins {report['cpu_seconds']['children']} s")
+    io = report['io']
+    print(f"I/O:               {io['bytes_read']} bytes read, {io['bytes_written']} bytes written, "
+          f"{io['log_directory_bytes']} bytes in the log directory")
+
+def test_simulated_day():
+    """Outages, crashes and a crash loop produce exactly the expected alerts and restarts."""
+    report = simulate(default_scenario(200))
+    print_report(report)
+    subjects = report['alerts']['by_subject']
+    assert subjects.get(f"DECNET link to {TARGET_HOST} is down") == 2
+    assert subjects.get(f"DECNET link to {TARGET_HOST} is up") == 2
+    assert subjects.get("PyDECNET is crash-looping") == 1
+    assert report['crashes'] == 3
+    assert report['restart_latency_seconds']['count'] == 2  # The crash-looping restart never succeeds
+    assert report['restart_latency_seconds']['max'] < 300
+    assert report['name_list_downloads'] >= 1
+    assert report['virtual_seconds'] > 10 * report['real_seconds']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the HECNET daemon against local stand-ins")
+    parser.add_argument("--cycles", type=int, default=2000, help="Approximate number of monitoring cycles")
+    parser.add_argument("--speedup", type=float, default=SPEEDUP, help="Acceleration of sleeps inside a cycle")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    result = simulate(default_scenario(args.cycles), args.speedup)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("=== HECNET Daemon Simulation ===")
+        print_report(result)
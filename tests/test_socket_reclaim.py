@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script for stale API socket reclamation.
+Verifies that a socket left behind by a dead PyDECNET is removed in-process,
+while a socket with a live listener (or a regular file) is left alone.
+"""
+
+import os
+import socket
+import tempfile
+
+from daemon_helpers import load_daemon
+
+def bind_socket(path, listen):
+    """Create a Unix socket at path; closing it without unlinking leaves it stale."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    if listen:
+        sock.listen(1)
+    return sock
+
+def test_reclaim_socket():
+    """Stale sockets are removed, live sockets and other files are kept."""
+    daemon = load_daemon()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        daemon.SOCKET_PATH = os.path.join(temp_dir, "decnetapi.sock")
+
+        # Nothing there: free to start
+        assert daemon.reclaim_stale_socket()
+
+        # Left over from a dead PyDECNET: removed
+        bind_socket(daemon.SOCKET_PATH, listen=False).close()
+        assert daemon.socket_is_stale(daemon.SOCKET_PATH)
+        assert daemon.reclaim_stale_socket()
+        assert not os.path.exists(daemon.SOCKET_PATH)
+
+        # A live PyDECNET is listening: kept
+        live = bind_socket(daemon.SOCKET_PATH, listen=True)
+        try:
+            assert not daemon.socket_is_stale(daemon.SOCKET_PATH)
+            assert not daemon.reclaim_stale_socket()
+            assert os.path.exists(daemon.SOCKET_PATH)
+        finally:
+            live.close()
+            os.remove(daemon.SOCKET_PATH)
+
+        # Not a socket at all: kept
+        with open(daemon.SOCKET_PATH, "w") as f:
+            f.write("not a socket")
+        assert not daemon.reclaim_stale_socket()
+        assert os.path.exists(daemon.SOCKET_PATH)
+    print("✓ Stale, live and non-socket paths handled correctly")
+
+if __name__ == "__main__":
+    print("=== API Socket Reclamation Test ===")
+    test_reclaim_socket()
+    print("✅ Socket reclamation works")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Startup time budget checks for the command line entry points.
+
+Runs the scripts under 'python -X importtime' and verifies that the cheap code
+paths (decnet-daemon.py --version, importing decnet-status.py and a status
+report answered from the daemon's probe cache) stay under a fixed millisecond
+budget and never load the heavy modules (psutil, daemon, smtplib, email.mime)
+that only the monitoring paths need.
+
+The cached status report lists the daemon and PyDECNET processes, so it has
+to import psutil (about 25 ms on its own) and gets its own import budget; the
+other entry points keep the original 40 ms. Each entry point is timed over
+RUNS runs and the fastest run counts, so one run slowed down by a busy machine
+does not fail the check.
+
+Budgets can be overridden with the HECNET_IMPORT_BUDGET_MS,
+HECNET_STATUS_IMPORT_BUDGET_MS and HECNET_STARTUP_BUDGET_MS environment
+variables on slow machines.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAEMON_SCRIPT = os.path.join(SCRIPT_DIR, "decnet-daemon.py")
+STATUS_SCRIPT = os.path.join(SCRIPT_DIR, "decnet-status.py")
+
+# Time spent importing modules beyond what a bare interpreter imports
+IMPORT_BUDGET_MS = float(os.environ.get('HECNET_IMPORT_BUDGET_MS', 40))
+# The same for the cached status report, psutil included
+STATUS_IMPORT_BUDGET_MS = float(os.environ.get('HECNET_STATUS_IMPORT_BUDGET_MS', 80))
+# Wall clock time of a complete run, interpreter startup included
+STARTUP_BUDGET_MS = float(os.environ.get('HECNET_STARTUP_BUDGET_MS', 250))
+RUNS = 7
+
+HEAVY_MODULES = ['psutil', 'daemon', 'smtplib', 'email.mime', 'email.mime.text', 'email.mime.multipart']
+# The status report itself needs psutil for the process details
+STATUS_HEAVY_MODULES = [m for m in HEAVY_MODULES if m != 'psutil']
+
+# Records that it was run, so the test can tell a cached report from a live probe
+FAKE_NCP = """#!/bin/sh
+touch "$(dirname "$0")/ncp-was-run"
+echo "Node 1.13 (MIM) Reachable"
+"""
+
+LOAD_STATUS_CODE = (
+    "import importlib.util;"
+    f"spec = importlib.util.spec_from_file_location('decnet_status', {STATUS_SCRIPT!r});"
+    "module = importlib.util.module_from_spec(spec);"
+    "spec.loader.exec_module(module)"
+)
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: cumulative_us} for top-level imports."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split('|')
+        # Nested imports are indented; only count top-level ones to avoid double counting
+        if name.startswith('   '):
+            continue
+        imports[name.strip()] = int(cumulative.strip())
+    return imports
+
+def all_imported_modules(stderr):
+    """Return every module name mentioned in -X importtime output."""
+    names = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "imported package" not in line:
+            names.add(line.split('|')[-1].strip())
+    return names
+
+def run_importtime(args, cwd=SCRIPT_DIR, env=None):
+    """Run python -X importtime with args and return (wall_ms, stderr)."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args,
+                            capture_output=True, text=True, cwd=cwd, env=env)
+    # A non-zero exit is fine (the status tool reports a stopped daemon that way), a crash is not
+    assert "Traceback" not in result.stderr, f"{' '.join(args)} crashed:\n{result.stderr[-2000:]}"
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, result.stderr
+
+def measure(args, cwd=SCRIPT_DIR, env=None):
+    """Return (best wall ms, best extra import ms, imported modules) over several runs."""
+    _, baseline_stderr = run_importtime(["-c", "pass"])
+    baseline = set(parse_importtime(baseline_stderr))
+
+    best_wall = best_import = None
+    modules = set()
+    for _ in range(RUNS):
+        wall_ms, stderr = run_importtime(args, cwd, env)
+        extra = parse_importtime(stderr)
+        import_ms = sum(us for name, us in extra.items() if name not in baseline) / 1000
+        best_wall = wall_ms if best_wall is None else min(best_wall, wall_ms)
+        best_import = import_ms if best_import is None else min(best_import, import_ms)
+        modules |= all_imported_modules(stderr)
+    return best_wall, best_import, modules
+
+def check_budget(label, args, forbidden=HEAVY_MODULES, cwd=SCRIPT_DIR, env=None, import_budget=IMPORT_BUDGET_MS):
+    """Measure one entry point and assert it stays within the budgets."""
+    wall_ms, import_ms, modules = measure(args, cwd, env)
+    print(f"{label}: wall {wall_ms:.1f} ms (budget {STARTUP_BUDGET_MS:.0f} ms), "
+          f"imports {import_ms:.1f} ms (budget {import_budget:.0f} ms)")
+
+    heavy = sorted(m for m in forbidden if m in modules)
+    assert not heavy, f"{label} imported heavy modules: {', '.join(heavy)}"
+    assert import_ms <= import_budget, f"{label} import time {import_ms:.1f} ms exceeds budget"
+    assert wall_ms <= STARTUP_BUDGET_MS, f"{label} startup time {wall_ms:.1f} ms exceeds budget"
+
+def test_daemon_version_startup():
+    """decnet-daemon.py --version must not pay for the monitoring imports."""
+    check_budget("decnet-daemon.py --version", [DAEMON_SCRIPT, "--version"])
+
+def test_status_import_startup():
+    """Importing decnet-status.py must not load psutil or run any checks."""
+    check_budget("decnet-status.py import", ["-c", LOAD_STATUS_CODE])
+
+def test_cached_status_startup():
+    """A status report answered from a fresh probe cache never runs ncp."""
+    sys.path.insert(0, SCRIPT_DIR)
+    import decnet_probe_cache
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for filename in ("decnet-status.py", "decnet_probe_cache.py", "decnet_ncp.py", "decnet_nodedb.py",
+                         "decnet_sweep.py"):
+            shutil.copy(os.path.join(SCRIPT_DIR, filename), temp_dir)
+        with open(os.path.join(temp_dir, "pyvenv.cfg"), "w") as f:
+            f.write("hecnet_target_host = MIM\n")
+        log_dir = os.path.join(temp_dir, "hecnet", "logs")
+        os.makedirs(log_dir)
+        decnet_probe_cache.write_probe_cache(
+            os.path.join(log_dir, "probe-cache.bin"),
+            [decnet_probe_cache.make_probe_result("MIM", decnet_probe_cache.STATUS_UP, "Node 1.13 (MIM) Reachable", 0.05)])
+
+        bin_dir = os.path.join(temp_dir, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "ncp"), "w") as f:
+            f.write(FAKE_NCP)
+        os.chmod(os.path.join(bin_dir, "ncp"), 0o755)
+        env = dict(os.environ, PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''))
+
+        check_budget("decnet-status.py (cached)", [os.path.join(temp_dir, "decnet-status.py")],
+                     forbidden=STATUS_HEAVY_MODULES, cwd=temp_dir, env=env, import_budget=STATUS_IMPORT_BUDGET_MS)
+        assert not os.path.exists(os.path.join(bin_dir, "ncp-was-run")), "cached status ran a live ncp probe"
+
+if __name__ == "__main__":
+    print("=== Startup Time Budget Test ===")
+    test_daemon_version_startup()
+    test_status_import_startup()
+    test_cached_status_startup()
+    print("✅ All entry points are within their startup budgets")